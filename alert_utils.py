@@ -2,14 +2,14 @@
 Utilidades para análisis mejorado de alertas
 """
 import re
-from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional, Set, Iterable, Union
 
+from market_calendar import is_in_session
+from matcher import MultiPatternMatcher
+from ticker_index import get_ticker_index
 
-# Tickers argentinos más relevantes
-RELEVANT_TICKERS = {
-    'YPF', 'GGAL', 'PAMP', 'ALUA', 'TRAN', 'EDN', 'LOMA', 'TXAR', 'COME', 'MIRG',
-    'ERAR', 'CRES', 'SUPV', 'TGNO4', 'TGSU2', 'BMA', 'CEPU', 'VALO', 'BYMA', 'CGPA2'
-}
 
 # Palabras clave mejoradas con contexto
 KEYWORD_PATTERNS = {
@@ -70,156 +70,272 @@ MAGNITUDE_WORDS = {
     'millonaria': 1.3,
 }
 
+# Umbrales mínimos de score por prioridad
+ALERT_THRESHOLDS = {
+    'critical': 0.8,
+    'high': 0.6,
+    'medium': 0.5,
+    'positive': 0.7,
+    'low': 0.4
+}
+
+# Durante la rueda los umbrales bajan un 20% (más sensible)
+MARKET_HOURS_THRESHOLD_FACTOR = 0.8
+
 # Palabras que indican porcentajes relevantes
 PERCENTAGE_PATTERN = r'(\d+(?:\.\d+)?)\s*%'
 
+# Expresiones compiladas una sola vez
+PERCENTAGE_REGEX = re.compile(PERCENTAGE_PATTERN)
+MONEY_REGEXES = [
+    re.compile(r'\$\s*\d+(?:\.\d+)?\s*(?:millones?|mil millones?|billones?)', re.IGNORECASE),
+    re.compile(r'USD?\s*\d+(?:\.\d+)?\s*(?:millones?|mil millones?|M|B)', re.IGNORECASE),
+    re.compile(r'\d+(?:\.\d+)?\s*(?:millones?|mil millones?)\s*(?:de)?\s*(?:pesos|dólares)', re.IGNORECASE),
+]
+
 
 def extract_tickers(text: str, title_priority: bool = True) -> List[str]:
     """
-    Extrae tickers financieros del texto
-    Prioriza tickers argentinos conocidos
+    Extrae tickers financieros del texto: símbolos ($GGAL, GGAL) y nombres de
+    empresas (Galicia → GGAL) del índice de tickers, en orden de aparición
     """
-    # Patrón para tickers: palabras en mayúsculas de 2-5 letras
-    ticker_pattern = r'\b[A-Z]{2,5}\b'
-    all_tickers = re.findall(ticker_pattern, text)
-    
-    # Filtrar tickers conocidos
-    known_tickers = [t for t in all_tickers if t in RELEVANT_TICKERS]
-    
-    # Si hay tickers conocidos, priorizarlos
-    if known_tickers:
-        return list(dict.fromkeys(known_tickers))  # Eliminar duplicados manteniendo orden
-    
-    # Si no, retornar todos pero sin palabras comunes
-    common_words = {'EN', 'LA', 'EL', 'DE', 'CON', 'POR', 'PARA', 'SI', 'NO', 'SE', 'AL'}
-    filtered = [t for t in all_tickers if t not in common_words]
-    
-    return list(dict.fromkeys(filtered[:3]))  # Máximo 3 tickers
+    return get_ticker_index().resolve(text)
+
+
+def extract_cashtags(text: str) -> List[str]:
+    """
+    Extrae tickers con formato $TICKER (sin el `$`). En tweets solo cuentan
+    estas menciones: un "Galicia" o "La Pampa" al pasar no es un ticker.
+    """
+    return get_ticker_index().cashtags(text)
 
 
 def extract_percentages(text: str) -> List[float]:
     """Extrae porcentajes del texto"""
-    matches = re.findall(PERCENTAGE_PATTERN, text)
+    matches = PERCENTAGE_REGEX.findall(text)
     return [float(m) for m in matches]
 
 
-def calculate_relevance_score(text: str, keyword: str, priority: str) -> float:
+def extract_money_amounts(text: str) -> List[str]:
+    """Extrae montos de dinero mencionados"""
+    amounts = []
+    for regex in MONEY_REGEXES:
+        amounts.extend(regex.findall(text))
+    
+    return amounts
+
+
+class KeywordMatcher:
     """
-    Calcula un score de relevancia basado en:
-    - Presencia del keyword
-    - Palabras de contexto cercanas
-    - Magnitud mencionada
-    - Porcentajes mencionados
+    Compila KEYWORD_PATTERNS y MAGNITUDE_WORDS en un único matcher.
+    
+    Keywords, palabras de contexto y palabras de magnitud se detectan en una
+    sola pasada sobre el texto; el scoring después trabaja solo sobre el
+    conjunto de términos encontrados.
     """
-    score = 0.0
-    text_lower = text.lower()
     
-    if keyword not in text_lower:
-        return 0.0
+    def __init__(self, keyword_patterns: Dict, magnitude_words: Dict[str, float]):
+        self.keyword_patterns = keyword_patterns
+        self.magnitude_words = list(magnitude_words.items())
+        
+        terms = set(magnitude_words)
+        for keywords in keyword_patterns.values():
+            for keyword, info in keywords.items():
+                terms.add(keyword)
+                terms.update(info.get('context', []))
+        self.terms = frozenset(terms)
+        
+        self._matcher = MultiPatternMatcher(terms)
     
-    # Score base por prioridad
-    keyword_info = KEYWORD_PATTERNS.get(priority, {}).get(keyword, {})
-    score = keyword_info.get('weight', 0.5)
+    def scan(self, text_lower: str) -> Set[str]:
+        """Retorna los términos conocidos presentes en el texto (ya en minúsculas)"""
+        return self._matcher.found(text_lower)
     
-    # Bonus por palabras de contexto relevantes
-    context_words = keyword_info.get('context', [])
-    for context in context_words:
-        if context in text_lower:
-            score += 0.2
+    def magnitude_multiplier(self, found: Set[str]) -> Optional[float]:
+        """Multiplicador de la primera palabra de magnitud presente (en orden de MAGNITUDE_WORDS)"""
+        for magnitude_word, multiplier in self.magnitude_words:
+            if magnitude_word in found:
+                return multiplier
+        return None
     
-    # Bonus por palabras de magnitud
-    for magnitude_word, multiplier in MAGNITUDE_WORDS.items():
-        if magnitude_word in text_lower:
-            score *= multiplier
-            break  # Solo aplicar el primero encontrado
+    def score(self, features: 'DocumentFeatures', keyword: str, priority: str) -> float:
+        """Score de relevancia de un keyword a partir de las características del documento"""
+        if keyword in self.terms:
+            if keyword not in features.matches:
+                return 0.0
+        elif keyword not in features.text:
+            return 0.0
+        
+        # Score base por prioridad
+        keyword_info = self.keyword_patterns.get(priority, {}).get(keyword, {})
+        score = keyword_info.get('weight', 0.5)
+        
+        # Bonus por palabras de contexto relevantes
+        for context in keyword_info.get('context', []):
+            if context in features.matches:
+                score += 0.2
+        
+        # Bonus por palabras de magnitud (solo la primera encontrada)
+        if features.magnitude is not None:
+            score *= features.magnitude
+        
+        # Bonus por porcentajes relevantes
+        max_pct = features.max_percentage
+        if max_pct is not None:
+            if priority in ['critical', 'high'] and max_pct >= 5:
+                score += 0.3
+            elif priority == 'positive' and max_pct >= 3:
+                score += 0.2
+        
+        return round(score, 2)
     
-    # Bonus por porcentajes relevantes
-    percentages = extract_percentages(text)
-    if percentages:
-        max_pct = max(percentages)
-        if priority in ['critical', 'high'] and max_pct >= 5:
-            score += 0.3
-        elif priority == 'positive' and max_pct >= 3:
-            score += 0.2
+    def best_keyword(self, features: 'DocumentFeatures', keywords: Iterable[str],
+                     priority: str) -> Optional[Tuple[str, float]]:
+        """Mejor keyword de una prioridad con su score"""
+        best_keyword = None
+        best_score = 0.0
+        
+        for keyword in keywords:
+            score = self.score(features, keyword, priority)
+            if score > best_score:
+                best_score = score
+                best_keyword = keyword
+        
+        return (best_keyword, best_score) if best_keyword else None
     
-    return round(score, 2)
+    def best_keywords(self, features: 'DocumentFeatures') -> Dict[str, Tuple[str, float]]:
+        """Mejor keyword de cada prioridad de las reglas compiladas"""
+        results = {}
+        for priority, keywords in self.keyword_patterns.items():
+            result = self.best_keyword(features, keywords.keys(), priority)
+            if result:
+                results[priority] = result
+        return results
+
+
+DEFAULT_MATCHER = KeywordMatcher(KEYWORD_PATTERNS, MAGNITUDE_WORDS)
 
 
-def find_best_keyword(text: str, keywords_dict: Dict, priority: str) -> Optional[Tuple[str, float]]:
+@dataclass
+class DocumentFeatures:
     """
-    Encuentra la mejor palabra clave con su score
+    Características de un documento (noticia o tweet) calculadas una sola vez
+    y compartidas por todas las etapas de scoring
     """
-    best_keyword = None
-    best_score = 0.0
+    text: str  # Texto normalizado (minúsculas)
+    tickers: List[str] = field(default_factory=list)
+    percentages: List[float] = field(default_factory=list)
+    money_amounts: List[str] = field(default_factory=list)
+    max_percentage: Optional[float] = None
+    engagement: int = 0
+    matches: Set[str] = field(default_factory=set)  # Términos de KEYWORD_PATTERNS/MAGNITUDE_WORDS presentes
+    magnitude: Optional[float] = None  # Multiplicador de magnitud aplicable
+    during_market_hours: bool = False  # El documento se publicó durante una rueda
     
-    for keyword in keywords_dict.keys():
-        score = calculate_relevance_score(text, keyword, priority)
-        if score > best_score:
-            best_score = score
-            best_keyword = keyword
+    @classmethod
+    def from_text(cls, text: str, tickers: Optional[List[str]] = None, engagement: int = 0,
+                  matcher: KeywordMatcher = DEFAULT_MATCHER,
+                  during_market_hours: bool = False) -> 'DocumentFeatures':
+        """Construye las características a partir de un texto libre"""
+        text_lower = text.lower()
+        percentages = extract_percentages(text_lower)
+        matches = matcher.scan(text_lower)
+        
+        return cls(
+            text=text_lower,
+            tickers=tickers if tickers is not None else extract_tickers(text),
+            percentages=percentages,
+            money_amounts=extract_money_amounts(text_lower),
+            max_percentage=max(percentages) if percentages else None,
+            engagement=engagement,
+            matches=matches,
+            magnitude=matcher.magnitude_multiplier(matches),
+            during_market_hours=during_market_hours,
+        )
     
-    return (best_keyword, best_score) if best_keyword else None
+    @classmethod
+    def from_news(cls, news, matcher: KeywordMatcher = DEFAULT_MATCHER,
+                  now: Optional[datetime] = None) -> 'DocumentFeatures':
+        """
+        Características de una noticia: título + contenido, tickers del título.
+        El horario de mercado se evalúa en la fecha de publicación (o en `now`
+        si no tiene, para leer el reloj una sola vez por lote).
+        """
+        text_full = f"{news.title or ''} {news.content or ''}"
+        return cls.from_text(
+            text_full, tickers=extract_tickers(news.title or ''), matcher=matcher,
+            during_market_hours=is_in_session(news.published_date or now)
+        )
+    
+    @classmethod
+    def from_tweet(cls, tweet, matcher: KeywordMatcher = DEFAULT_MATCHER,
+                   now: Optional[datetime] = None) -> 'DocumentFeatures':
+        """Características de un tweet: cashtags ($GGAL) y engagement total (ver from_news)"""
+        text = tweet.text or ''
+        engagement = (tweet.retweet_count or 0) + (tweet.like_count or 0) + (tweet.reply_count or 0)
+        return cls.from_text(
+            text, tickers=extract_cashtags(text), engagement=engagement, matcher=matcher,
+            during_market_hours=is_in_session(tweet.created_at or now)
+        )
 
 
-def extract_money_amounts(text: str) -> List[str]:
-    """Extrae montos de dinero mencionados"""
-    # Patrones para diferentes formatos
-    patterns = [
-        r'\$\s*\d+(?:\.\d+)?\s*(?:millones?|mil millones?|billones?)',
-        r'USD?\s*\d+(?:\.\d+)?\s*(?:millones?|mil millones?|M|B)',
-        r'\d+(?:\.\d+)?\s*(?:millones?|mil millones?)\s*(?:de)?\s*(?:pesos|dólares)',
-    ]
-    
-    amounts = []
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        amounts.extend(matches)
-    
-    return amounts
+def _as_features(document) -> DocumentFeatures:
+    """Acepta tanto DocumentFeatures como texto plano"""
+    if isinstance(document, DocumentFeatures):
+        return document
+    return DocumentFeatures.from_text(document, tickers=[])
+
+
+def calculate_relevance_score(document: Union[DocumentFeatures, str], keyword: str, priority: str) -> float:
+    """
+    Calcula un score de relevancia basado en:
+    - Presencia del keyword
+    - Palabras de contexto cercanas
+    - Magnitud mencionada
+    - Porcentajes mencionados
+    """
+    return DEFAULT_MATCHER.score(_as_features(document), keyword, priority)
+
+
+def find_best_keyword(document: Union[DocumentFeatures, str], keywords_dict: Dict,
+                      priority: str) -> Optional[Tuple[str, float]]:
+    """
+    Encuentra la mejor palabra clave con su score
+    """
+    return DEFAULT_MATCHER.best_keyword(_as_features(document), keywords_dict.keys(), priority)
 
 
-def is_market_hours() -> bool:
+def find_best_keywords(document: Union[DocumentFeatures, str]) -> Dict[str, Tuple[str, float]]:
+    """
+    Encuentra la mejor palabra clave de cada prioridad de KEYWORD_PATTERNS
+    a partir de una única extracción de características
+    """
+    return DEFAULT_MATCHER.best_keywords(_as_features(document))
+
+
+def is_market_hours(ts: Optional[datetime] = None) -> bool:
     """
     Verifica si es horario de mercado (más relevante)
-    Mercado argentino: Lunes a Viernes, 11:00 - 17:00 ART
+    Mercado argentino: rueda de BYMA, días hábiles de 11:00 a 17:00 ART.
+    Sin `ts` se evalúa el momento actual.
     """
-    from datetime import datetime
-    import pytz
-    
-    try:
-        # Zona horaria de Argentina
-        tz = pytz.timezone('America/Argentina/Buenos_Aires')
-        now = datetime.now(tz)
-        
-        # Verificar día de semana (0 = Lunes, 4 = Viernes)
-        if now.weekday() > 4:
-            return False
-        
-        # Verificar horario (11:00 - 17:00)
-        hour = now.hour
-        return 11 <= hour < 17
-    except:
-        # Si hay error, asumir que sí es horario de mercado
-        return True
+    return is_in_session(ts)
 
 
-def should_create_alert(score: float, priority: str, during_market_hours: bool = False) -> bool:
+def should_create_alert(score: float, priority: str, during_market_hours: bool = False,
+                        thresholds: Optional[Dict[str, float]] = None,
+                        market_hours_factor: float = MARKET_HOURS_THRESHOLD_FACTOR) -> bool:
     """
     Determina si se debe crear una alerta basado en el score y contexto
     """
     # Umbrales mínimos por prioridad
-    thresholds = {
-        'critical': 0.8,
-        'high': 0.6,
-        'medium': 0.5,
-        'positive': 0.7,
-        'low': 0.4
-    }
+    if thresholds is None:
+        thresholds = ALERT_THRESHOLDS
     
     threshold = thresholds.get(priority, 0.5)
     
     # Reducir umbral durante horario de mercado (más sensible)
     if during_market_hours:
-        threshold *= 0.8
+        threshold *= market_hours_factor
     
     return score >= threshold
@@ -0,0 +1,159 @@
+"""
+Memoización del análisis por (fuente, _id, hash del contenido, versión de reglas).
+
+Un documento ya analizado con el mismo contenido y las mismas reglas no se
+vuelve a analizar ni a guardar: sus alertas (si tuvo) ya están en `alerts`.
+La verificación tiene dos niveles:
+
+1. LRU en memoria con las claves confirmadas recientemente.
+2. Colección `analysis_cache` en MongoDB (persistente, con TTL), consultada
+   con un único `$in` por lote para las claves que no están en la LRU.
+
+La colección es la única fuente de verdad: otros workers y contenedores
+registran claves que este proceso no vio, así que una clave que no está en
+memoria siempre se verifica en Mongo.
+
+No hay filtro de Bloom delante de la colección (el pedido original lo
+proponía como primer nivel): un filtro por proceso no conoce las claves de
+los demás, así que un "no visto" igual tiene que confirmarse en Mongo, y un
+"posiblemente visto" también; el filtro no evitaría ninguna consulta. La LRU
+cumple el rol de respuesta rápida con claves ya confirmadas.
+
+Las claves se registran recién después de guardar las alertas del lote, así
+que una corrida interrumpida nunca deja documentos marcados sin sus alertas.
+"""
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from config import settings
+from database import get_database
+from rules import RuleSet
+from ticker_index import get_ticker_index
+
+
+# Campos que determinan el resultado del análisis de cada fuente
+CONTENT_FIELDS = {
+    "news": ("title", "content", "published_date"),
+    "tweets": ("text", "created_at", "retweet_count", "like_count", "reply_count", "username"),
+}
+
+
+def _field(document: Any, name: str) -> Any:
+    if isinstance(document, dict):
+        return document.get(name)
+    return getattr(document, name, None)
+
+
+def content_hash(source: str, document: Any) -> str:
+    """Hash de los campos que influyen en el análisis"""
+    digest = hashlib.blake2b(digest_size=12)
+    for name in CONTENT_FIELDS[source]:
+        digest.update(repr(_field(document, name)).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def source_id_of(document: Any) -> Optional[str]:
+    source_id = document.get("_id") if isinstance(document, dict) else getattr(document, "id", None)
+    return str(source_id) if source_id is not None else None
+
+
+class AnalysisCache:
+    """Documentos ya analizados (ver docstring del módulo)"""
+    
+    def __init__(self, lru_size: Optional[int] = None):
+        self.lru_size = lru_size or settings.analysis_cache_size
+        self.lru: "OrderedDict[str, None]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def key(self, source: str, document: Any, rules: RuleSet) -> Optional[str]:
+        """Clave del documento; None si no tiene _id (no se cachea)"""
+        source_id = source_id_of(document)
+        if source_id is None:
+            return None
+        version = f"{rules.version}.{get_ticker_index().version}"
+        return f"{source}:{source_id}:{content_hash(source, document)}:{version}"
+    
+    def _remember(self, key: str):
+        self.lru[key] = None
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+    
+    async def warm_up(self):
+        """Carga en la LRU las claves más recientes de `analysis_cache`"""
+        db = await get_database()
+        cursor = db["analysis_cache"].find({}, {"_id": 1}).sort("createdAt", -1).limit(self.lru_size)
+        keys = [doc["_id"] async for doc in cursor]
+        # De la más vieja a la más nueva, para que la LRU quede en orden de uso
+        for key in reversed(keys):
+            self._remember(key)
+        print(f"✓ Caché de análisis: {len(keys)} claves cargadas")
+    
+    async def split(self, source: str, documents: List[Any],
+                    rules: RuleSet) -> Tuple[List[Any], List[Optional[str]], int]:
+        """
+        Separa un lote en documentos a analizar y ya analizados.
+        Retorna (documentos nuevos o modificados, sus claves, cantidad de hits).
+        """
+        keys = [self.key(source, document, rules) for document in documents]
+        
+        seen = set()
+        to_check = []
+        for key in keys:
+            if key is None:
+                continue
+            if key in self.lru:
+                self.lru.move_to_end(key)
+                seen.add(key)
+            else:
+                to_check.append(key)
+        
+        if to_check:
+            db = await get_database()
+            async for doc in db["analysis_cache"].find({"_id": {"$in": to_check}}, {"_id": 1}):
+                seen.add(doc["_id"])
+                self._remember(doc["_id"])
+        
+        pending = [(document, key) for document, key in zip(documents, keys) if key is None or key not in seen]
+        hits = len(documents) - len(pending)
+        self.hits += hits
+        self.misses += len(pending)
+        return [document for document, _ in pending], [key for _, key in pending], hits
+    
+    async def add(self, keys: Iterable[Optional[str]]):
+        """Registra claves ya analizadas y con sus alertas guardadas"""
+        keys = list(dict.fromkeys(key for key in keys if key is not None))
+        if not keys:
+            return
+        
+        now = datetime.utcnow()
+        db = await get_database()
+        try:
+            await db["analysis_cache"].bulk_write(
+                [InsertOne({"_id": key, "createdAt": now}) for key in keys], ordered=False
+            )
+        except BulkWriteError as e:
+            # Claves ya registradas por otro proceso: se ignoran
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        
+        for key in keys:
+            self._remember(key)
+
+
+_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """Caché compartida del proceso (None si está deshabilitada)"""
+    global _cache
+    if _cache is None and settings.analysis_cache_enabled:
+        _cache = AnalysisCache()
+    return _cache
@@ -0,0 +1,162 @@
+"""
+Motor de análisis multi-proceso para corpus grandes.
+
+El análisis de AlertService es CPU puro y con un solo proceso usa un solo
+core. AnalysisEngine reparte lotes de documentos entre procesos worker:
+cada worker compila el set de reglas una sola vez al iniciar y devuelve
+las alertas ya serializadas (dicts listos para save_alert_documents), no
+objetos Pydantic. Sin el pool, el pipeline y el backfill llaman a
+analyze_documents en un thread del propio proceso.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, List, Optional
+
+from config import settings
+from rules import RuleSet, get_active_rules
+from ticker_index import get_ticker_index
+
+
+# Estado del proceso que analiza (worker del pool o el principal): analizadores y reglas compiladas
+_worker = {}
+
+
+def _init_worker(ticker_entries: Optional[List[dict]] = None):
+    """Inicializa un proceso worker: importa los analizadores y compila las reglas"""
+    from alert_utils import DocumentFeatures
+    from models import News, Tweet
+    from services import AlertService
+    from ticker_index import TickerIndex, get_ticker_index, set_ticker_index
+    
+    # El universo de tickers del proceso principal (puede venir de Mongo)
+    if ticker_entries is not None:
+        set_ticker_index(TickerIndex(ticker_entries))
+    get_ticker_index()
+    from rules import DEFAULT_RULES
+    
+    # Reglas compiladas por versión (se compilan una vez por proceso)
+    _worker["rules"] = {DEFAULT_RULES.version: DEFAULT_RULES}
+    _worker["analyzers"] = {
+        "news": (News, DocumentFeatures.from_news, AlertService.analyze_news_for_alerts),
+        "tweets": (Tweet, DocumentFeatures.from_tweet, AlertService.analyze_tweet_for_alerts),
+    }
+    _worker["to_document"] = AlertService.alert_to_document
+
+
+def _rules_for(spec: Optional[dict]):
+    """RuleSet de la versión indicada, compilado la primera vez que llega al proceso"""
+    from rules import RuleSet, get_active_rules
+    
+    if spec is None:
+        return get_active_rules()
+    
+    cache = _worker["rules"]
+    rules = cache.get(spec["version"])
+    if rules is None:
+        rules = RuleSet.from_spec(spec)
+        # Solo interesan la versión vigente y la anterior (lotes en vuelo)
+        while len(cache) >= 2:
+            cache.pop(min(cache))
+        cache[rules.version] = rules
+    return rules
+
+
+def analyze_documents(source: str, documents: List[Any], rules_spec: Optional[dict] = None) -> List[dict]:
+    """
+    Analiza un lote de documentos de `source` ('news' o 'tweets') con las
+    reglas `rules_spec` (por defecto, las activas del proceso).
+    Acepta documentos de Mongo (dicts) o modelos; retorna alertas serializadas.
+    """
+    if not _worker:
+        _init_worker()
+    
+    model, features_of, analyze = _worker["analyzers"][source]
+    to_document = _worker["to_document"]
+    rules = _rules_for(rules_spec)
+    # Documentos sin fecha: horario de mercado evaluado una vez por lote
+    now = datetime.utcnow()
+    
+    results = []
+    for document in documents:
+        if isinstance(document, dict):
+            document = dict(document)
+            if "_id" in document:
+                document["_id"] = str(document["_id"])
+            document = model(**document)
+        for alert in analyze(document, features_of(document, matcher=rules.matcher, now=now), rules):
+            results.append(to_document(alert))
+    
+    return results
+
+
+class AnalysisEngine:
+    """Pool de procesos para analizar lotes de documentos en paralelo"""
+    
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.analysis_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def start(self):
+        """Levanta los procesos worker (spawn: no heredan el cliente de Mongo ni el event loop)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(get_ticker_index().entries,)
+            )
+            print(f"✓ Motor de análisis iniciado con {self.workers} procesos")
+    
+    def restart(self):
+        """
+        Reemplaza los procesos worker (p. ej. tras recargar el índice de tickers).
+        Los lotes ya enviados terminan en el pool anterior.
+        """
+        if self._executor is not None:
+            previous, self._executor = self._executor, None
+            previous.shutdown(wait=False)
+            self.start()
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            print("✓ Motor de análisis detenido")
+    
+    async def analyze(self, source: str, documents: List[Any], rules: Optional[RuleSet] = None) -> List[dict]:
+        """Analiza un lote en un proceso worker (por defecto con las reglas activas de este proceso)"""
+        if self._executor is None:
+            self.start()
+        if rules is None:
+            rules = get_active_rules()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, analyze_documents, source, documents, rules.spec
+        )
+
+
+# Motor compartido por el proceso de la API (None: análisis en un thread)
+_engine: Optional[AnalysisEngine] = None
+
+
+def get_engine() -> Optional[AnalysisEngine]:
+    return _engine
+
+
+def start_engine(workers: Optional[int] = None) -> AnalysisEngine:
+    """Inicia el motor compartido"""
+    global _engine
+    if _engine is None:
+        _engine = AnalysisEngine(workers)
+        _engine.start()
+    return _engine
+
+
+def stop_engine():
+    global _engine
+    if _engine is not None:
+        _engine.shutdown()
+        _engine = None
@@ -0,0 +1,194 @@
+"""
+Re-scoring del historial completo de noticias y tweets.
+
+Recorre las colecciones `news` y `tweets` en orden de `_id`, por lotes,
+analiza cada lote con el motor multi-proceso y guarda las alertas con el
+camino bulk de AlertService. El avance se guarda en `checkpoints`
+(`backfill:news` / `backfill:tweets`), así que una corrida interrumpida
+continúa donde quedó.
+
+Uso:
+    python backfill.py                      # news y tweets
+    python backfill.py --source news --batch-size 1000 --workers 8
+    python backfill.py --reset              # empezar desde el principio
+    python backfill.py --reset --no-cache   # re-analizar también lo ya analizado
+    python backfill.py --no-dedup           # sin agrupar casi duplicados
+
+Los documentos ya analizados con el mismo contenido y la misma versión de
+reglas se omiten (ver analysis_cache.py), y los casi duplicados de una
+historia ya vista solo suman un disparo a sus alertas (ver dedup.py).
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, List, Optional, Tuple
+
+from analysis_cache import AnalysisCache, get_analysis_cache
+from analysis_engine import AnalysisEngine, analyze_documents
+from database import get_database, connect_to_mongo, close_mongo_connection
+from dedup import StoryIndex, get_story_index
+from rules import RuleSet, get_active_rules, load_active_rules
+from services import AlertService, CheckpointService
+from ticker_index import reload_ticker_index
+
+
+class BackfillProgress:
+    """Métricas de avance: docs/s, alertas/s y ETA"""
+    
+    def __init__(self, source: str, total: int):
+        self.source = source
+        self.total = total
+        self.documents = 0
+        self.alerts = 0
+        self.saved = 0
+        self.started = time.monotonic()
+    
+    def update(self, documents: int, alerts: int, saved: int):
+        self.documents += documents
+        self.alerts += alerts
+        self.saved += saved
+    
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        docs_per_sec = self.documents / elapsed
+        alerts_per_sec = self.alerts / elapsed
+        remaining = max(self.total - self.documents, 0)
+        eta = remaining / docs_per_sec if docs_per_sec > 0 else 0
+        pct = 100 * self.documents / self.total if self.total else 100
+        print(
+            f"[{self.source}] {self.documents}/{self.total} ({pct:.1f}%) | "
+            f"{docs_per_sec:.0f} docs/s | {alerts_per_sec:.1f} alertas/s | "
+            f"{self.saved} creadas/modificadas | ETA {_format_seconds(eta)}"
+        )
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+async def _read_round(source: str, after_id: Any, batch_size: int, batches: int) -> List[List[dict]]:
+    """Lee los próximos `batches` lotes posteriores a after_id, en orden de _id"""
+    db = await get_database()
+    query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+    cursor = db[source].find(query).sort("_id", 1).limit(batch_size * batches)
+    documents = await cursor.to_list(length=None)
+    return [documents[i:i + batch_size] for i in range(0, len(documents), batch_size)]
+
+
+async def _prepare(cache: Optional[AnalysisCache], stories: Optional[StoryIndex], source: str,
+                   documents: List[dict], rules: RuleSet) -> Tuple[List[dict], List[Optional[str]], list]:
+    """
+    Omite los documentos ya analizados con las reglas activas y separa los
+    casi duplicados de historias ya vistas. Retorna (a analizar, claves, miembros).
+    """
+    keys = []
+    if cache:
+        documents, keys, _ = await cache.split(source, documents, rules)
+    members = []
+    if stories and documents:
+        signatures = await asyncio.to_thread(stories.signatures, source, documents)
+        documents, members = stories.split(source, documents, signatures, rules.version)
+    return documents, keys, members
+
+
+async def _analyze(engine: Optional[AnalysisEngine], source: str, documents: List[dict], rules: RuleSet) -> List[dict]:
+    if not documents:
+        return []
+    if engine:
+        return await engine.analyze(source, documents, rules)
+    return await asyncio.to_thread(analyze_documents, source, documents, rules.spec)
+
+
+async def backfill_source(source: str, batch_size: int, engine: Optional[AnalysisEngine],
+                          reset: bool = False, cache: Optional[AnalysisCache] = None,
+                          stories: Optional[StoryIndex] = None):
+    """Re-scorea toda la colección `source` desde su checkpoint"""
+    checkpoint = f"backfill:{source}"
+    if reset:
+        await CheckpointService.reset(checkpoint)
+    
+    after_id = await CheckpointService.get_last_id(checkpoint)
+    db = await get_database()
+    total = await db[source].count_documents({"_id": {"$gt": after_id}} if after_id is not None else {})
+    if after_id is not None:
+        print(f"[{source}] Reanudando desde _id {after_id}")
+    
+    progress = BackfillProgress(source, total)
+    parallel = engine.workers if engine else 1
+    
+    # Mientras se analiza una ronda se lee la siguiente
+    next_round = asyncio.create_task(_read_round(source, after_id, batch_size, parallel))
+    while True:
+        batches = await next_round
+        if not batches:
+            break
+        
+        last_id = batches[-1][-1]["_id"]
+        next_round = asyncio.create_task(_read_round(source, last_id, batch_size, parallel))
+        
+        rules = get_active_rules()
+        # Los lotes se agrupan en historias en orden, uno por vez
+        prepared = [await _prepare(cache, stories, source, batch, rules) for batch in batches]
+        results = await asyncio.gather(*(_analyze(engine, source, pending, rules) for pending, _, _ in prepared))
+        
+        documents = []
+        for (pending, _, members), alerts in zip(prepared, results):
+            documents.extend(stories.resolve(source, pending, alerts, members) if stories else alerts)
+        saved = await AlertService.save_alert_documents(documents) if documents else 0
+        if cache:
+            await cache.add(key for _, keys, _ in prepared for key in keys)
+        await CheckpointService.advance(checkpoint, last_id)
+        
+        progress.update(sum(len(batch) for batch in batches), len(documents), saved)
+        progress.report()
+    
+    print(f"✓ [{source}] Backfill completo: {progress.documents} documentos, {progress.alerts} alertas")
+
+
+async def main(args: argparse.Namespace):
+    sources = ["news", "tweets"] if args.source == "all" else [args.source]
+    
+    await connect_to_mongo()
+    await reload_ticker_index()
+    # Todo el backfill con la versión de reglas activa al empezar
+    await load_active_rules()
+    cache = None if args.no_cache else get_analysis_cache()
+    stories = None if args.no_dedup else get_story_index()
+    if cache:
+        await cache.warm_up()
+    engine = AnalysisEngine(args.workers) if args.workers != 0 else None
+    if engine:
+        engine.start()
+    try:
+        for source in sources:
+            await backfill_source(source, args.batch_size, engine, reset=args.reset, cache=cache, stories=stories)
+    finally:
+        if engine:
+            engine.shutdown()
+        await close_mongo_connection()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-scoring del historial de noticias y tweets")
+    parser.add_argument("--source", choices=["news", "tweets", "all"], default="all",
+                        help="Colección a procesar (por defecto: ambas)")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="Documentos por lote (por defecto: 500)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos de análisis (por defecto: ANALYSIS_WORKERS o cantidad de CPUs; 0: sin pool)")
+    parser.add_argument("--reset", action="store_true",
+                        help="Ignorar el checkpoint y empezar desde el principio")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No omitir documentos ya analizados con las reglas activas")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Analizar también los casi duplicados de historias ya vistas")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        print("\nInterrumpido: la próxima corrida continúa desde el último lote guardado")
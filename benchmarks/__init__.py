@@ -0,0 +1 @@
+"""Benchmarks del análisis y del guardado de alertas (ver benchmarks/run.py)"""
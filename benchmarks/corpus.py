@@ -0,0 +1,224 @@
+"""
+Generador de un corpus sintético de noticias y tweets financieros en español.
+
+Usa el vocabulario real del análisis (KEYWORD_PATTERNS y MAGNITUDE_WORDS)
+y los tickers más operados (RELEVANT_TICKERS) mezclados con texto de relleno, porcentajes y montos, de modo
+que el corpus ejercite los mismos caminos que los datos de producción. Con la
+misma semilla el corpus es idéntico entre corridas.
+
+Uso:
+    python -m benchmarks.corpus --news 1000 --tweets 1000 --output corpus.json
+"""
+import argparse
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from alert_utils import KEYWORD_PATTERNS, MAGNITUDE_WORDS
+
+
+# Tickers argentinos más relevantes (la mayoría de las menciones del corpus)
+RELEVANT_TICKERS = {
+    'YPF', 'GGAL', 'PAMP', 'ALUA', 'TRAN', 'EDN', 'LOMA', 'TXAR', 'COME', 'MIRG',
+    'ERAR', 'CRES', 'SUPV', 'TGNO4', 'TGSU2', 'BMA', 'CEPU', 'VALO', 'BYMA', 'CGPA2'
+}
+
+
+FILLER_WORDS = [
+    'el', 'la', 'los', 'las', 'de', 'del', 'en', 'por', 'para', 'con', 'que', 'según',
+    'mercado', 'acciones', 'bonos', 'inversores', 'analistas', 'empresa', 'compañía',
+    'gobierno', 'banco', 'central', 'dólar', 'peso', 'inflación', 'tasa', 'interés',
+    'balance', 'trimestre', 'resultado', 'operaciones', 'rueda', 'jornada', 'sesión',
+    'índice', 'merval', 'panel', 'líder', 'cotización', 'precio', 'papeles', 'sector',
+    'energía', 'petróleo', 'gas', 'financiero', 'bancario', 'reservas', 'deuda',
+    'informe', 'semana', 'anuncio', 'directorio', 'accionistas', 'dividendos',
+    'licitación', 'emisión', 'obligaciones', 'negociables', 'tendencia', 'volumen',
+]
+
+SOURCES = ['Ámbito', 'El Cronista', 'Infobae', 'La Nación', 'Clarín', 'iProfesional']
+CATEGORIES = ['mercados', 'economía', 'empresas', 'finanzas']
+HASHTAGS = ['#Merval', '#Bolsa', '#Dólar', '#Bonos', '#Mercados', '#Inversiones']
+OTHER_TICKERS = ['AAPL', 'TSLA', 'MELI', 'GLOB', 'VIST', 'BBAR', 'IRSA', 'HARG']
+
+MONEY_TEMPLATES = [
+    'US$ {amount} millones',
+    '${amount} millones',
+    '{amount} millones de dólares',
+    '{amount} mil millones de pesos',
+]
+
+
+@dataclass
+class CorpusConfig:
+    """Parámetros del corpus"""
+    seed: int = 42
+    # Largo de las noticias en palabras (normal truncada)
+    news_words_mean: int = 180
+    news_words_std: int = 80
+    news_words_min: int = 20
+    news_words_max: int = 800
+    # Probabilidad de que una oración incluya una palabra clave / un ticker
+    keyword_rate: float = 0.25
+    ticker_rate: float = 0.2
+    # Probabilidad de incluir porcentajes y montos
+    percentage_rate: float = 0.15
+    money_rate: float = 0.08
+    # Engagement de tweets: Pareto (cola larga, la mayoría con poco engagement)
+    engagement_alpha: float = 1.2
+    engagement_scale: int = 10
+    # Fracción de documentos sin fecha
+    missing_date_rate: float = 0.05
+
+
+class CorpusGenerator:
+    """Genera documentos con la forma de las colecciones `news` y `tweets`"""
+    
+    def __init__(self, config: Optional[CorpusConfig] = None):
+        self.config = config or CorpusConfig()
+        self.random = random.Random(self.config.seed)
+        self.keywords = [
+            (priority, keyword, info['context'])
+            for priority, keywords in KEYWORD_PATTERNS.items()
+            for keyword, info in keywords.items()
+        ]
+        self.magnitudes = list(MAGNITUDE_WORDS)
+        self.tickers = sorted(RELEVANT_TICKERS)
+        self.now = datetime(2025, 6, 2, 15, 0)
+        self._next_id = 0
+    
+    def _object_id(self) -> str:
+        self._next_id += 1
+        return f"{self._next_id:024x}"
+    
+    def _date(self, max_hours: int) -> Optional[datetime]:
+        if self.random.random() < self.config.missing_date_rate:
+            return None
+        return self.now - timedelta(minutes=self.random.randint(0, max_hours * 60))
+    
+    def _ticker(self) -> str:
+        # La mayoría de las menciones son de tickers relevantes
+        if self.random.random() < 0.8:
+            return self.random.choice(self.tickers)
+        return self.random.choice(OTHER_TICKERS)
+    
+    def _percentage(self) -> str:
+        value = round(self.random.expovariate(1 / 4), self.random.choice([0, 1, 2]))
+        return f"{value:g}%"
+    
+    def _money(self) -> str:
+        amount = self.random.choice([
+            str(self.random.randint(1, 999)),
+            f"{self.random.randint(1, 99)},{self.random.randint(0, 9)}",
+            f"{self.random.randint(1, 9)}.{self.random.randint(100, 999)}",
+        ])
+        return self.random.choice(MONEY_TEMPLATES).format(amount=amount)
+    
+    def _sentence(self, length: int) -> str:
+        config = self.config
+        words = [self.random.choice(FILLER_WORDS) for _ in range(length)]
+        
+        if self.random.random() < config.keyword_rate:
+            _, keyword, context = self.random.choice(self.keywords)
+            insert = [keyword]
+            if context and self.random.random() < 0.5:
+                insert.append(self.random.choice(context))
+            if self.random.random() < 0.3:
+                insert.insert(0, self.random.choice(self.magnitudes))
+            words[self.random.randrange(len(words) + 1):0] = insert
+        if self.random.random() < config.ticker_rate:
+            words.insert(self.random.randrange(len(words) + 1), self._ticker())
+        if self.random.random() < config.percentage_rate:
+            words.insert(self.random.randrange(len(words) + 1), self._percentage())
+        if self.random.random() < config.money_rate:
+            words.insert(self.random.randrange(len(words) + 1), self._money())
+        
+        sentence = ' '.join(words)
+        return sentence[0].upper() + sentence[1:] + '.'
+    
+    def _text(self, words: int) -> str:
+        sentences = []
+        while words > 0:
+            length = min(words, self.random.randint(8, 25))
+            sentences.append(self._sentence(length))
+            words -= length
+        return ' '.join(sentences)
+    
+    def _title(self) -> str:
+        _, keyword, context = self.random.choice(self.keywords)
+        parts = [self._ticker(), keyword]
+        if context:
+            parts.append(self.random.choice(context))
+        parts += [self.random.choice(FILLER_WORDS) for _ in range(self.random.randint(2, 6))]
+        if self.random.random() < 0.4:
+            parts.append(self._percentage())
+        title = ' '.join(parts)
+        return title[0].upper() + title[1:]
+    
+    def news(self, count: int) -> List[dict]:
+        """Genera `count` noticias"""
+        config = self.config
+        documents = []
+        for _ in range(count):
+            words = int(self.random.gauss(config.news_words_mean, config.news_words_std))
+            words = max(config.news_words_min, min(config.news_words_max, words))
+            documents.append({
+                "_id": self._object_id(),
+                "title": self._title(),
+                "content": self._text(words),
+                "source": self.random.choice(SOURCES),
+                "url": f"https://noticias.example.com/{self._next_id}",
+                "published_date": self._date(168),
+                "category": self.random.choice(CATEGORIES),
+                "keywords": [],
+            })
+        return documents
+    
+    def tweets(self, count: int) -> List[dict]:
+        """Genera `count` tweets (hasta 280 caracteres)"""
+        config = self.config
+        documents = []
+        for _ in range(count):
+            text = self._text(self.random.randint(8, 35))
+            if self.random.random() < 0.6:
+                text = f"${self._ticker()} {text}"
+            hashtags = self.random.sample(HASHTAGS, self.random.randint(0, 2))
+            text = ' '.join([text] + hashtags)[:280]
+            
+            retweets = int(config.engagement_scale * (self.random.paretovariate(config.engagement_alpha) - 1))
+            likes = int(retweets * self.random.uniform(1.5, 6))
+            username = f"trader{self.random.randint(1, 500)}"
+            documents.append({
+                "_id": self._object_id(),
+                "text": text,
+                "author": username.capitalize(),
+                "username": username,
+                "created_at": self._date(72),
+                "retweet_count": retweets,
+                "like_count": likes,
+                "reply_count": int(retweets * self.random.uniform(0, 0.5)),
+                "hashtags": hashtags,
+                "mentions": [],
+                "url": f"https://x.example.com/{username}/status/{self._next_id}",
+            })
+        return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un corpus sintético de noticias y tweets")
+    parser.add_argument("--news", type=int, default=1000)
+    parser.add_argument("--tweets", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="corpus.json")
+    args = parser.parse_args()
+    
+    generator = CorpusGenerator(CorpusConfig(seed=args.seed))
+    corpus = {"news": generator.news(args.news), "tweets": generator.tweets(args.tweets)}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False, default=lambda v: v.isoformat())
+    print(f"✓ Corpus generado: {args.news} noticias, {args.tweets} tweets → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
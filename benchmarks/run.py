@@ -0,0 +1,230 @@
+"""
+Suite de benchmarks del análisis de alertas.
+
+Mide extract_tickers, calculate_relevance_score, find_best_keyword, los dos
+AlertService.analyze_* y, con --mongodb-uri, save_alerts contra un mongod
+local, sobre corpus sintéticos de 1k/10k/100k documentos. Los resultados se
+escriben en JSON para comparar corridas (--compare).
+
+Uso:
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 1000 10000 --output antes.json
+    python -m benchmarks.run --sizes 1000 --compare antes.json
+    python -m benchmarks.run --mongodb-uri mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DATABASE = "alertas_benchmark"
+
+# services importa la configuración, que exige estas variables
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", BENCHMARK_DATABASE)
+
+from alert_utils import KEYWORD_PATTERNS, calculate_relevance_score, extract_tickers, find_best_keyword
+from benchmarks.corpus import CorpusConfig, CorpusGenerator
+from models import News, Tweet
+
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def _measure(name: str, size: int, fn: Callable[[], int], repeat: int) -> Dict:
+    """Ejecuta fn `repeat` veces y se queda con la mejor; fn retorna la cantidad de operaciones"""
+    timings = []
+    operations = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operations = fn()
+        timings.append(time.perf_counter() - start)
+    
+    best = min(timings)
+    result = {
+        "benchmark": name,
+        "size": size,
+        "operations": operations,
+        "seconds": round(best, 6),
+        "ops_per_sec": round(operations / best, 1) if best else None,
+        "us_per_op": round(best / operations * 1e6, 3) if operations else None,
+        "runs": [round(t, 6) for t in timings],
+    }
+    print(f"  {name:<32} {size:>7} docs  {best:9.3f}s  {result['ops_per_sec'] or 0:>12,.0f} ops/s")
+    return result
+
+
+def run_analysis(size: int, repeat: int, seed: int) -> List[Dict]:
+    from services import AlertService
+    
+    generator = CorpusGenerator(CorpusConfig(seed=seed))
+    news_docs = generator.news(size)
+    tweet_docs = generator.tweets(size)
+    news_texts = [f"{doc['title']} {doc['content']}" for doc in news_docs]
+    news_models = [News(**doc) for doc in news_docs]
+    tweet_models = [Tweet(**doc) for doc in tweet_docs]
+    
+    critical = KEYWORD_PATTERNS['critical']
+    high = KEYWORD_PATTERNS['high']
+    
+    def bench_extract_tickers():
+        for text in news_texts:
+            extract_tickers(text)
+        return len(news_texts)
+    
+    def bench_relevance_score():
+        for text in news_texts:
+            calculate_relevance_score(text, 'crisis', 'critical')
+        return len(news_texts)
+    
+    def bench_find_best_keyword():
+        for text in news_texts:
+            find_best_keyword(text, critical, 'critical')
+            find_best_keyword(text, high, 'high')
+        return len(news_texts)
+    
+    def bench_analyze_news():
+        for news in news_models:
+            AlertService.analyze_news_for_alerts(news)
+        return len(news_models)
+    
+    def bench_analyze_tweets():
+        for tweet in tweet_models:
+            AlertService.analyze_tweet_for_alerts(tweet)
+        return len(tweet_models)
+    
+    return [
+        _measure("extract_tickers", size, bench_extract_tickers, repeat),
+        _measure("calculate_relevance_score", size, bench_relevance_score, repeat),
+        _measure("find_best_keyword", size, bench_find_best_keyword, repeat),
+        _measure("analyze_news_for_alerts", size, bench_analyze_news, repeat),
+        _measure("analyze_tweet_for_alerts", size, bench_analyze_tweets, repeat),
+    ]
+
+
+async def run_save_alerts(size: int, seed: int, batch_size: int = 500) -> List[Dict]:
+    """Guarda las alertas del corpus en una base vacía y luego repite (camino de duplicados)"""
+    from database import get_database
+    from services import AlertService
+    
+    generator = CorpusGenerator(CorpusConfig(seed=seed))
+    alerts = []
+    for doc in generator.news(size):
+        alerts += AlertService.analyze_news_for_alerts(News(**doc))
+    for doc in generator.tweets(size):
+        alerts += AlertService.analyze_tweet_for_alerts(Tweet(**doc))
+    batches = [alerts[i:i + batch_size] for i in range(0, len(alerts), batch_size)]
+    
+    db = await get_database()
+    await db["alerts"].drop()
+    await db["alerts"].create_index("title", unique=True, name="title_unique")
+    
+    results = []
+    for name in ("save_alerts", "save_alerts (repetidas)"):
+        start = time.perf_counter()
+        for batch in batches:
+            await AlertService.save_alerts(batch)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "benchmark": name,
+            "size": size,
+            "operations": len(alerts),
+            "seconds": round(elapsed, 6),
+            "ops_per_sec": round(len(alerts) / elapsed, 1) if elapsed else None,
+            "us_per_op": round(elapsed / len(alerts) * 1e6, 3) if alerts else None,
+            "runs": [round(elapsed, 6)],
+        })
+        print(f"  {name:<32} {size:>7} docs  {elapsed:9.3f}s  {results[-1]['ops_per_sec'] or 0:>12,.0f} alertas/s")
+    
+    await db["alerts"].drop()
+    return results
+
+
+async def _run_mongo(sizes: List[int], seed: int) -> List[Dict]:
+    from database import connect_to_mongo, close_mongo_connection
+    
+    await connect_to_mongo()
+    try:
+        results = []
+        for size in sizes:
+            results += await run_save_alerts(size, seed)
+        return results
+    finally:
+        await close_mongo_connection()
+
+
+def _environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(previous: Dict, current: Dict):
+    """Imprime la variación de cada benchmark respecto de una corrida anterior"""
+    before = {(r["benchmark"], r["size"]): r for r in previous["results"]}
+    print(f"\nComparación contra {previous['environment'].get('commit')}:")
+    for result in current["results"]:
+        old = before.get((result["benchmark"], result["size"]))
+        if not old or not old["seconds"]:
+            continue
+        speedup = old["seconds"] / result["seconds"] if result["seconds"] else float("inf")
+        print(f"  {result['benchmark']:<32} {result['size']:>7} docs  "
+              f"{old['seconds']:9.3f}s → {result['seconds']:9.3f}s  ({speedup:.2f}x)")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmarks del análisis y guardado de alertas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Cantidad de documentos por corrida (por defecto: 1000 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repeticiones por benchmark; se reporta la mejor (por defecto: 3)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongodb-uri", default=None,
+                        help=f"mongod para medir save_alerts (usa la base {BENCHMARK_DATABASE})")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", default=None, help="Resultados anteriores para comparar")
+    args = parser.parse_args(argv)
+    
+    if args.mongodb_uri:
+        from config import settings
+        # Base propia: el benchmark borra la colección alerts
+        settings.mongodb_uri = args.mongodb_uri
+        settings.database_name = BENCHMARK_DATABASE
+    
+    results = []
+    for size in args.sizes:
+        print(f"\n▶ {size} documentos")
+        results += run_analysis(size, args.repeat, args.seed)
+    
+    if args.mongodb_uri:
+        print("\n▶ save_alerts")
+        results += asyncio.run(_run_mongo(args.sizes, args.seed))
+    
+    report = {"environment": _environment(), "sizes": args.sizes, "seed": args.seed, "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Resultados guardados en {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
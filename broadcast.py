@@ -0,0 +1,265 @@
+"""
+Feed de alertas en vivo (GET /alerts/stream por SSE y /alerts/ws por WebSocket).
+
+Un único AlertBroadcaster por proceso reparte cada alerta creada o
+actualizada entre las conexiones abiertas: el evento se serializa una sola
+vez y cada suscriptor lo recibe en su propia cola acotada. Un suscriptor que
+no consume a tiempo (la cola se llena) se desconecta con un evento
+`overflow` en lugar de frenar al resto; el cliente se pone al día con
+GET /alerts y vuelve a conectarse.
+
+Origen de los eventos (ALERT_STREAM_SOURCE):
+- "local": los publica AlertService.save_alert_documents en el mismo proceso.
+  Solo ve las alertas guardadas por ese worker: sirve únicamente con un solo
+  proceso que además genere las alertas.
+- "change_stream": cada proceso observa la colección `alerts` con un change
+  stream (uno por proceso, no por cliente) y ve lo guardado por cualquier
+  worker, el scheduler o stream_worker.py. Requiere un replica set.
+- "auto" (por defecto): "change_stream" si el servidor es un replica set o un
+  mongos, "local" si no (con un aviso en el log).
+"""
+import asyncio
+from typing import Iterable, List, Optional, Set, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from config import settings
+from database import get_database
+from metrics import ALERT_STREAM_DROPPED, ALERT_STREAM_EVENTS, ALERT_STREAM_SUBSCRIBERS
+from models import Alert
+from serialization import DocumentShape, dumps
+
+
+ALERT_SHAPE = DocumentShape(Alert)
+
+RETRY_DELAY_SECONDS = 5
+
+# Marca de fin de una suscripción en su cola
+_CLOSED = object()
+
+# Origen efectivo de los eventos del proceso (ver resolve_stream_source)
+_source: Optional[str] = None
+
+
+class AlertEvent:
+    """Una alerta creada ("created"), modificada ("updated") o re-disparada ("triggered")"""
+    __slots__ = ("name", "alert", "data")
+    
+    def __init__(self, name: str, doc: dict):
+        self.name = name
+        self.alert = ALERT_SHAPE.to_dict(doc)
+        # Se serializa una vez para todos los suscriptores
+        self.data = dumps({"event": name, "alert": self.alert})
+    
+    def sse(self) -> bytes:
+        return b"event: " + self.name.encode() + b"\ndata: " + self.data + b"\n\n"
+
+
+class AlertFilter:
+    """Filtros de una suscripción; un filtro vacío deja pasar todo"""
+    
+    def __init__(self, priorities: Optional[Iterable[str]] = None, symbols: Optional[Iterable[str]] = None,
+                 alert_types: Optional[Iterable[str]] = None):
+        self.priorities = _normalize(priorities, str.lower)
+        self.symbols = _normalize(symbols, str.upper)
+        self.alert_types = _normalize(alert_types, str.lower)
+    
+    def matches(self, alert: dict) -> bool:
+        if self.priorities and (alert.get("priority") or "").lower() not in self.priorities:
+            return False
+        if self.alert_types and (alert.get("type") or "").lower() not in self.alert_types:
+            return False
+        if self.symbols:
+            symbols = {str(keyword).upper() for keyword in alert.get("keywords") or []}
+            symbol = (alert.get("config") or {}).get("symbol")
+            if symbol:
+                symbols.add(str(symbol).upper())
+            if not symbols & self.symbols:
+                return False
+        return True
+
+
+def _normalize(values: Optional[Iterable[str]], case) -> Set[str]:
+    """Acepta listas y valores separados por coma (?priority=high,critical)"""
+    result = set()
+    for value in values or []:
+        result.update(case(part.strip()) for part in value.split(",") if part.strip())
+    return result
+
+
+class Subscription:
+    """Conexión al feed con su cola acotada"""
+    
+    def __init__(self, broadcaster: "AlertBroadcaster", alert_filter: AlertFilter, buffer: int):
+        self.broadcaster = broadcaster
+        self.filter = alert_filter
+        self.overflowed = False
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=buffer + 1)  # +1 para la marca de cierre
+        self._buffer = buffer
+    
+    def offer(self, event: AlertEvent):
+        if self.overflowed or not self.filter.matches(event.alert):
+            return
+        if self._queue.qsize() >= self._buffer:
+            # Consumidor lento: se descarta lo pendiente y se cierra la conexión
+            self.overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(_CLOSED)
+            self.broadcaster.unsubscribe(self)
+            ALERT_STREAM_DROPPED.inc()
+            return
+        self._queue.put_nowait(event)
+    
+    async def get(self, timeout: Optional[float] = None) -> Optional[AlertEvent]:
+        """
+        Próximo evento, o None si pasó `timeout` sin eventos (para enviar un
+        heartbeat) o si la suscripción se cerró (ver `closed`).
+        """
+        try:
+            item = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if item is _CLOSED:
+            self.closed = True
+            return None
+        return item
+    
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class AlertBroadcaster:
+    """Reparte los eventos de alertas entre las suscripciones de este proceso"""
+    
+    def __init__(self, buffer: Optional[int] = None, max_subscribers: Optional[int] = None):
+        self.buffer = buffer or settings.alert_stream_buffer
+        self.max_subscribers = max_subscribers or settings.alert_stream_max_subscribers
+        self._subscriptions: Set[Subscription] = set()
+    
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+    
+    def subscribe(self, alert_filter: AlertFilter) -> Optional[Subscription]:
+        """Nueva suscripción, o None si se alcanzó el máximo de conexiones"""
+        if len(self._subscriptions) >= self.max_subscribers:
+            return None
+        subscription = Subscription(self, alert_filter, self.buffer)
+        self._subscriptions.add(subscription)
+        ALERT_STREAM_SUBSCRIBERS.set(len(self._subscriptions))
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+        ALERT_STREAM_SUBSCRIBERS.set(len(self._subscriptions))
+    
+    def publish(self, events: List[AlertEvent]):
+        """Entrega los eventos a cada suscripción (desde el event loop, sin bloquear)"""
+        for event in events:
+            ALERT_STREAM_EVENTS.labels(event=event.name).inc()
+            for subscription in list(self._subscriptions):
+                subscription.offer(event)
+    
+    def publish_saved(self, changes: List[Tuple[str, dict]]):
+        """
+        Alertas guardadas en este proceso, como (evento, documento). Solo con
+        origen "local", y sin serializar nada si no hay suscriptores.
+        """
+        if stream_source() == "local" and self._subscriptions:
+            self.publish([AlertEvent(name, doc) for name, doc in changes])
+
+
+class AlertChangeFeed:
+    """Publica en el broadcaster los cambios de la colección `alerts` (un change stream por proceso)"""
+    
+    def __init__(self, broadcaster: AlertBroadcaster):
+        self.broadcaster = broadcaster
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+            print("✓ Feed de alertas por change stream iniciado")
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    @staticmethod
+    def to_event(change: dict) -> Optional[AlertEvent]:
+        doc = change.get("fullDocument")
+        if doc is None:
+            return None
+        operation = change["operationType"]
+        if operation == "insert":
+            return AlertEvent("created", doc)
+        updated = (change.get("updateDescription") or {}).get("updatedFields") or {}
+        if operation == "replace" or "description" in updated:
+            return AlertEvent("updated", doc)
+        return AlertEvent("triggered", doc)
+    
+    async def _watch(self):
+        db = await get_database()
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        resume_token = None
+        
+        while True:
+            try:
+                # El feed es en vivo: el resume token solo se conserva en memoria
+                async with db["alerts"].watch(pipeline, full_document="updateLookup",
+                                              resume_after=resume_token) as stream:
+                    async for change in stream:
+                        resume_token = change["_id"]
+                        event = self.to_event(change)
+                        if event is not None:
+                            self.broadcaster.publish([event])
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Token fuera del oplog u otro error del servidor: se sigue desde ahora
+                print(f"✗ Error en el change stream de alertas: {e}")
+                resume_token = None
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+            except PyMongoError as e:
+                print(f"✗ Error en el change stream de alertas: {e}")
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+
+
+async def resolve_stream_source() -> str:
+    """Define el origen de los eventos del proceso según ALERT_STREAM_SOURCE y el servidor"""
+    global _source
+    source = settings.alert_stream_source
+    if source == "auto":
+        try:
+            db = await get_database()
+            hello = await db.client.admin.command("hello")
+            replicated = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except PyMongoError as e:
+            print(f"✗ No se pudo consultar el tipo de servidor de MongoDB: {e}")
+            replicated = False
+        source = "change_stream" if replicated else "local"
+        if not replicated:
+            print("✗ Feed de alertas: MongoDB sin replica set, solo se publican las alertas guardadas por este proceso")
+    _source = source
+    return source
+
+
+def stream_source() -> str:
+    """Origen efectivo de los eventos ("local" hasta que se resuelva "auto")"""
+    if _source is not None:
+        return _source
+    return "local" if settings.alert_stream_source == "auto" else settings.alert_stream_source
+
+
+_broadcaster: Optional[AlertBroadcaster] = None
+
+
+def get_broadcaster() -> AlertBroadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = AlertBroadcaster()
+    return _broadcaster
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +8,68 @@ class Settings(BaseSettings):
     database_name: str = Field(..., alias="DATABASE_NAME")
     db_port: int = Field(default=27017, alias="DB_PORT")
     
+    # Perfil del cliente de MongoDB (tiene prioridad sobre las opciones de MONGODB_URI)
+    mongo_max_pool_size: int = Field(default=100, alias="MONGO_MAX_POOL_SIZE")
+    mongo_min_pool_size: int = Field(default=0, alias="MONGO_MIN_POOL_SIZE")
+    mongo_max_idle_time_ms: int = Field(default=60000, alias="MONGO_MAX_IDLE_TIME_MS")
+    mongo_wait_queue_timeout_ms: Optional[int] = Field(default=None, alias="MONGO_WAIT_QUEUE_TIMEOUT_MS")
+    mongo_server_selection_timeout_ms: int = Field(default=5000, alias="MONGO_SERVER_SELECTION_TIMEOUT_MS")
+    mongo_connect_timeout_ms: int = Field(default=5000, alias="MONGO_CONNECT_TIMEOUT_MS")
+    mongo_socket_timeout_ms: int = Field(default=60000, alias="MONGO_SOCKET_TIMEOUT_MS")
+    mongo_compressors: str = Field(default="zstd,zlib", alias="MONGO_COMPRESSORS")
+    # Escritura de alertas: "majority", "1", ... y espera máxima de la confirmación
+    mongo_alert_write_concern: str = Field(default="majority", alias="MONGO_ALERT_WRITE_CONCERN")
+    mongo_alert_wtimeout_ms: int = Field(default=10000, alias="MONGO_ALERT_WTIMEOUT_MS")
+    # Preferencia de lectura de los listados (GET /alerts, /news, /tweets)
+    mongo_list_read_preference: str = Field(default="secondaryPreferred", alias="MONGO_LIST_READ_PREFERENCE")
+    
+    # Generador de alertas por change streams dentro del proceso de la API
+    stream_worker_enabled: bool = Field(default=False, alias="STREAM_WORKER_ENABLED")
+    # Solo consume el proceso con este lease en `locks` (se renueva cada tercio)
+    stream_worker_lease_seconds: float = Field(default=30, alias="STREAM_WORKER_LEASE_SECONDS")
+    
+    # Procesos para el análisis (0: un thread dentro del proceso de la API)
+    analysis_workers: int = Field(default=0, alias="ANALYSIS_WORKERS")
+    
+    # Cantidad de alertas serializadas que se mantienen en memoria por proceso
+    encoded_alert_cache_size: int = Field(default=20000, alias="ENCODED_ALERT_CACHE_SIZE")
+    
+    # Respuestas de GET /alerts guardadas por versión de la colección (ETag), con
+    # tope por cuerpo y por total de bytes en memoria de cada proceso
+    response_cache_entries: int = Field(default=64, alias="RESPONSE_CACHE_ENTRIES")
+    response_cache_max_bytes: int = Field(default=2000000, alias="RESPONSE_CACHE_MAX_BYTES")
+    response_cache_total_bytes: int = Field(default=16000000, alias="RESPONSE_CACHE_TOTAL_BYTES")
+    
+    # Feed de alertas en vivo (GET /alerts/stream, /alerts/ws). Con "change_stream" cada
+    # proceso observa la colección `alerts` y ve también lo guardado por otros procesos;
+    # "auto" lo usa si MongoDB es un replica set y si no cae a "local"
+    alert_stream_source: str = Field(default="auto", alias="ALERT_STREAM_SOURCE")
+    alert_stream_buffer: int = Field(default=256, alias="ALERT_STREAM_BUFFER")
+    alert_stream_max_subscribers: int = Field(default=5000, alias="ALERT_STREAM_MAX_SUBSCRIBERS")
+    alert_stream_heartbeat_seconds: float = Field(default=15, alias="ALERT_STREAM_HEARTBEAT_SECONDS")
+    
+    # Cada cuántos segundos se consulta si hay una nueva versión de reglas activa
+    rules_poll_seconds: float = Field(default=30, alias="RULES_POLL_SECONDS")
+    # Cada cuántos segundos se consulta si otro proceso recargó el universo de tickers
+    tickers_poll_seconds: float = Field(default=30, alias="TICKERS_POLL_SECONDS")
+    
+    # Caché de análisis: documentos ya analizados con el mismo contenido y reglas
+    analysis_cache_enabled: bool = Field(default=True, alias="ANALYSIS_CACHE_ENABLED")
+    analysis_cache_size: int = Field(default=100000, alias="ANALYSIS_CACHE_SIZE")
+    analysis_cache_ttl_days: int = Field(default=30, alias="ANALYSIS_CACHE_TTL_DAYS")
+    
+    # Historias casi duplicadas (mismo texto en varios medios o retuits): se analizan una vez
+    dedup_enabled: bool = Field(default=True, alias="DEDUP_ENABLED")
+    dedup_threshold: float = Field(default=0.5, alias="DEDUP_THRESHOLD")
+    dedup_window_hours: float = Field(default=24, alias="DEDUP_WINDOW_HOURS")
+    dedup_max_clusters: int = Field(default=50000, alias="DEDUP_MAX_CLUSTERS")
+    
+    # Generación periódica dentro de la API (un solo worker por vez, con lease en `locks`)
+    scheduler_enabled: bool = Field(default=False, alias="SCHEDULER_ENABLED")
+    scheduler_interval_seconds: float = Field(default=60, alias="SCHEDULER_INTERVAL_SECONDS")
+    scheduler_jitter_seconds: float = Field(default=10, alias="SCHEDULER_JITTER_SECONDS")
+    scheduler_lease_seconds: float = Field(default=90, alias="SCHEDULER_LEASE_SECONDS")
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,5 +1,8 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+from pymongo.write_concern import WriteConcern
 from config import settings
+from metrics import MongoCommandMetrics, MongoPoolMetrics
 
 
 class MongoDB:
@@ -7,6 +10,40 @@ class MongoDB:
     
     
 mongodb = MongoDB()
+pool_metrics = MongoPoolMetrics()
+
+
+def client_options() -> dict:
+    """
+    Opciones del cliente según la configuración. Se pasan como argumentos, así
+    que tienen prioridad sobre las mismas opciones escritas en MONGODB_URI.
+    """
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+    }
+    if settings.mongo_wait_queue_timeout_ms:
+        options["waitQueueTimeoutMS"] = settings.mongo_wait_queue_timeout_ms
+    compressors = [c.strip() for c in settings.mongo_compressors.split(",") if c.strip()]
+    if compressors:
+        # pymongo descarta (con un warning) los compresores cuyo módulo no está instalado
+        options["compressors"] = compressors
+    return options
+
+
+def alert_write_concern() -> WriteConcern:
+    """Write concern de las escrituras de alertas"""
+    w = settings.mongo_alert_write_concern
+    return WriteConcern(w=int(w) if w.isdigit() else w, wtimeout=settings.mongo_alert_wtimeout_ms)
+
+
+def list_read_preference():
+    """Preferencia de lectura de los listados ("primary", "secondaryPreferred", "nearest", ...)"""
+    return make_read_preference(read_pref_mode_from_name(settings.mongo_list_read_preference), None)
 
 
 async def get_database():
@@ -14,10 +51,23 @@ async def get_database():
     return mongodb.client[settings.database_name]
 
 
+async def get_list_database():
+    """
+    Base de datos para los listados de la API, con su preferencia de lectura.
+    Con secondaryPreferred un listado puede quedar atrasado respecto de la
+    última escritura tanto como el lag de replicación.
+    """
+    return mongodb.client.get_database(settings.database_name, read_preference=list_read_preference())
+
+
 async def connect_to_mongo():
     """Conecta a MongoDB"""
     print("Conectando a MongoDB...")
-    mongodb.client = AsyncIOMotorClient(settings.mongodb_uri)
+    mongodb.client = AsyncIOMotorClient(
+        settings.mongodb_uri,
+        event_listeners=[MongoCommandMetrics(), pool_metrics],
+        **client_options()
+    )
     # Verificar la conexión
     try:
         await mongodb.client.admin.command('ping')
@@ -25,6 +75,14 @@ async def connect_to_mongo():
     except Exception as e:
         print(f"✗ Error al conectar a MongoDB: {e}")
         raise
+    
+    await create_indexes()
+
+
+async def create_indexes():
+    """Crea los índices declarados en indexes.py (idempotente)"""
+    from indexes import ensure_indexes
+    await ensure_indexes()
 
 
 async def close_mongo_connection():
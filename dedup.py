@@ -0,0 +1,265 @@
+"""
+Detección de historias casi duplicadas (MinHash + LSH).
+
+La misma noticia publicada por cinco medios, o un tweet retuiteado muchas
+veces, se analiza una sola vez: el primer documento de la historia es el
+representante del grupo y se analiza normalmente; los siguientes que se le
+parecen se suman al grupo sin analizarse y generan un nuevo disparo de las
+mismas alertas, que se guardan como una sola alerta con la lista `sources`
+y el contador `sourceCount` (ver AlertService.save_alert_documents).
+
+Cada texto se reduce a una firma MinHash de NUM_PERM valores sobre sus
+trigramas de palabras; la firma se divide en BANDS bandas y cada banda es
+una clave de un dict, así que buscar candidatos cuesta lo mismo sin importar
+cuántas historias haya en el índice. El candidato se confirma si la
+similitud estimada (valores coincidentes de la firma) supera el umbral.
+
+El índice vive en memoria y está acotado: los grupos sin documentos nuevos
+en la ventana de DEDUP_WINDOW_HOURS (según la fecha de los documentos) se
+descartan, y nunca hay más de DEDUP_MAX_CLUSTERS grupos.
+"""
+import hashlib
+import random
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from config import settings
+
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Textos más cortos no alcanzan para distinguir historias: se analizan siempre
+MIN_TOKENS = 6
+# Largo máximo del texto de una noticia que entra en la firma
+TEXT_LIMIT = 2000
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_URL_RE = re.compile(r"https?://\S+")
+_MENTION_RE = re.compile(r"(?:^|\s)(?:rt\s+)?@\w+:?")
+_WORD_RE = re.compile(r"\w+")
+
+# Firma MinHash de un documento (None si el texto es demasiado corto)
+Signature = Optional[Tuple[int, ...]]
+
+
+def _field(document: Any, name: str) -> Any:
+    if isinstance(document, dict):
+        return document.get(name)
+    return getattr(document, name, None)
+
+
+def _source_id(document: Any) -> str:
+    return str(document.get("_id") if isinstance(document, dict) else getattr(document, "id", None))
+
+
+def document_text(source: str, document: Any) -> str:
+    """Texto que identifica la historia de un documento"""
+    if source == "news":
+        text = f"{_field(document, 'title') or ''} {_field(document, 'content') or ''}"
+        return text[:TEXT_LIMIT]
+    return _field(document, "text") or ""
+
+
+def document_time(source: str, document: Any) -> Optional[datetime]:
+    value = _field(document, "published_date" if source == "news" else "created_at")
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None) if value.tzinfo else value
+    return None
+
+
+def source_label(source: str, document: Any) -> str:
+    """Quién publicó el documento: el medio de la noticia o el @usuario del tweet"""
+    if source == "news":
+        outlet = _field(document, "source")
+        if outlet:
+            return outlet
+        url = _field(document, "url") or ""
+        match = re.match(r"https?://(?:www\.)?([^/]+)", url)
+        return match.group(1) if match else "news"
+    username = _field(document, "username")
+    return f"@{username}" if username else "twitter"
+
+
+def shingles(text: str) -> Optional[FrozenSet[str]]:
+    """Trigramas de palabras del texto normalizado (sin URLs, menciones ni "RT")"""
+    text = _MENTION_RE.sub(" ", _URL_RE.sub(" ", text.lower()))
+    tokens = _WORD_RE.findall(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    return frozenset(" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2))
+
+
+class MinHasher:
+    """Firmas MinHash con NUM_PERM permutaciones universales (a·x + b mod 2^61-1)"""
+    
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)
+        ]
+    
+    def signature(self, text: str) -> Signature:
+        grams = shingles(text)
+        if grams is None:
+            return None
+        hashes = [
+            int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little")
+            for gram in grams
+        ]
+        return tuple(
+            min(((a * h + b) % _MERSENNE) & _MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        )
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Similitud de Jaccard estimada entre dos firmas"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class StoryCluster:
+    """Grupo de documentos de una misma historia"""
+    
+    __slots__ = ("key", "signature", "bands", "rules_version", "alerts", "size", "last_seen")
+    
+    def __init__(self, key: str, signature: Tuple[int, ...], rules_version: Any, last_seen: datetime):
+        self.key = key
+        self.signature = signature
+        self.bands = [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+        self.rules_version = rules_version
+        # Alertas del representante (documentos serializados), sin `sources`
+        self.alerts: List[dict] = []
+        self.size = 1
+        self.last_seen = last_seen
+
+
+class StoryIndex:
+    """Índice LSH de historias recientes (ver docstring del módulo)"""
+    
+    def __init__(self, threshold: Optional[float] = None, window_hours: Optional[float] = None,
+                 max_clusters: Optional[int] = None):
+        self.threshold = threshold if threshold is not None else settings.dedup_threshold
+        self.window = timedelta(hours=window_hours if window_hours is not None else settings.dedup_window_hours)
+        self.max_clusters = max_clusters or settings.dedup_max_clusters
+        self.hasher = MinHasher()
+        self.clusters: "OrderedDict[str, StoryCluster]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[int, ...], str]] = [{} for _ in range(BANDS)]
+        self._newest: Optional[datetime] = None
+    
+    def signatures(self, source: str, documents: List[Any]) -> List[Signature]:
+        """Firmas de un lote (CPU puro, sin tocar el índice: puede correr en un thread)"""
+        return [self.hasher.signature(document_text(source, document)) for document in documents]
+    
+    def _find(self, signature: Tuple[int, ...], seen_at: datetime) -> Optional[StoryCluster]:
+        best, best_score = None, self.threshold
+        candidates = {
+            self._buckets[band].get(values) for band, values in
+            ((band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS))
+        }
+        for key in candidates:
+            cluster = self.clusters.get(key) if key else None
+            if cluster is None or abs(seen_at - cluster.last_seen) > self.window:
+                continue
+            score = similarity(signature, cluster.signature)
+            if score >= best_score:
+                best, best_score = cluster, score
+        return best
+    
+    def _add(self, cluster: StoryCluster):
+        self.clusters[cluster.key] = cluster
+        for band, values in cluster.bands:
+            self._buckets[band][values] = cluster.key
+    
+    def _remove(self, cluster: StoryCluster):
+        self.clusters.pop(cluster.key, None)
+        for band, values in cluster.bands:
+            if self._buckets[band].get(values) == cluster.key:
+                del self._buckets[band][values]
+    
+    def _evict(self):
+        horizon = self._newest - self.window
+        while self.clusters:
+            oldest = next(iter(self.clusters.values()))
+            if oldest.last_seen >= horizon and len(self.clusters) <= self.max_clusters:
+                break
+            self._remove(oldest)
+    
+    def split(self, source: str, documents: List[Any], signatures: List[Signature],
+              rules_version: Any = None) -> Tuple[List[Any], List[Tuple[StoryCluster, str]]]:
+        """
+        Asigna cada documento a una historia.
+        Retorna (documentos a analizar, [(grupo, fuente) de los documentos que se suman a un grupo existente]).
+        """
+        to_analyze = []
+        members = []
+        now = datetime.utcnow()
+        
+        for document, signature in zip(documents, signatures):
+            key = f"{source}:{_source_id(document)}"
+            if signature is None:
+                to_analyze.append(document)
+                continue
+            
+            seen_at = document_time(source, document) or now
+            if self._newest is None or seen_at > self._newest:
+                self._newest = seen_at
+            
+            cluster = self._find(signature, seen_at)
+            if cluster is not None and cluster.rules_version == rules_version and cluster.key != key:
+                cluster.size += 1
+                cluster.last_seen = max(cluster.last_seen, seen_at)
+                self.clusters.move_to_end(cluster.key)
+                members.append((cluster, source_label(source, document)))
+                continue
+            
+            if cluster is not None:
+                # Grupo analizado con otra versión de reglas (o el mismo documento
+                # re-escaneado): este documento lo reemplaza
+                self._remove(cluster)
+            self._add(StoryCluster(key, signature, rules_version, seen_at))
+            to_analyze.append(document)
+        
+        if self._newest is not None:
+            self._evict()
+        return to_analyze, members
+    
+    def resolve(self, source: str, documents: List[Any], alerts: List[dict],
+                members: List[Tuple[StoryCluster, str]]) -> List[dict]:
+        """
+        Registra las alertas de los representantes en sus grupos y agrega un
+        disparo de esas alertas por cada documento que se sumó a un grupo.
+        Debe llamarse en el mismo orden en que se llamó a `split`.
+        """
+        labels = {_source_id(document): source_label(source, document) for document in documents}
+        
+        resolved = []
+        for alert in alerts:
+            source_id = alert.get("sourceId")
+            cluster = self.clusters.get(f"{source}:{source_id}")
+            if cluster is not None:
+                cluster.alerts.append({k: v for k, v in alert.items() if k not in ("sources", "sourceCount")})
+            if source_id in labels:
+                alert["sources"] = [labels[source_id]]
+            resolved.append(alert)
+        
+        for cluster, label in members:
+            for alert in cluster.alerts:
+                resolved.append({**alert, "sources": [label], "triggerCount": 1})
+        return resolved
+
+
+_index: Optional[StoryIndex] = None
+
+
+def get_story_index() -> Optional[StoryIndex]:
+    """Índice compartido del proceso (None si está deshabilitado)"""
+    global _index
+    if _index is None and settings.dedup_enabled:
+        _index = StoryIndex()
+    return _index
@@ -0,0 +1,114 @@
+"""
+GET condicional (ETag / If-None-Match) y caché de respuestas por versión.
+
+El ETag de un listado combina la versión de la colección (CounterService,
+que se incrementa con cada escritura) y los parámetros de la consulta. Si el
+cliente ya tiene esa versión se responde 304 sin leer la colección; si no,
+el cuerpo se sirve desde la caché en memoria del proceso o se genera y se
+guarda. Una escritura cambia la versión, así que las entradas viejas nunca
+se vuelven a servir y salen de la caché por LRU.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi.responses import Response, StreamingResponse
+
+from config import settings
+
+
+# Headers de la respuesta original que se conservan en la caché
+CACHED_HEADERS = ("x-next-cursor",)
+
+
+def make_etag(version: str, *params) -> str:
+    """ETag fuerte para una versión de la colección y unos parámetros de consulta"""
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=6).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evalúa un header If-None-Match (lista de ETags, débiles incluidos, o *)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+class ResponseCache:
+    """Cuerpos de respuesta por ETag (LRU, con tamaño máximo por cuerpo y en total)"""
+    
+    def __init__(self, max_entries: Optional[int] = None, max_body_bytes: Optional[int] = None,
+                 max_total_bytes: Optional[int] = None):
+        self.max_entries = max_entries or settings.response_cache_entries
+        self.max_total_bytes = max_total_bytes or settings.response_cache_total_bytes
+        self.max_body_bytes = min(max_body_bytes or settings.response_cache_max_bytes, self.max_total_bytes)
+        self._entries: "OrderedDict[str, Tuple[bytes, str, Dict[str, str]]]" = OrderedDict()
+        # Bytes de los cuerpos guardados
+        self.size = 0
+    
+    def get(self, etag: str) -> Optional[Response]:
+        entry = self._entries.get(etag)
+        if entry is None:
+            return None
+        self._entries.move_to_end(etag)
+        body, media_type, headers = entry
+        return Response(
+            content=body, media_type=media_type,
+            headers={**headers, "ETag": etag, "Cache-Control": "no-cache"}
+        )
+    
+    def _put(self, etag: str, body: bytes, media_type: str, headers: Dict[str, str]):
+        if len(body) > self.max_body_bytes:
+            return
+        previous = self._entries.pop(etag, None)
+        if previous is not None:
+            self.size -= len(previous[0])
+        self._entries[etag] = (body, media_type, headers)
+        self.size += len(body)
+        # Se descartan las menos usadas hasta entrar en ambos topes
+        while len(self._entries) > self.max_entries or self.size > self.max_total_bytes:
+            _, (evicted, _, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+    
+    def store(self, etag: str, response: Response) -> Response:
+        """
+        Agrega el ETag a la respuesta y guarda su cuerpo. Las respuestas en
+        streaming se guardan al terminar de enviarse (si no superan el máximo).
+        """
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = self._capture(etag, response.body_iterator, response.media_type, headers)
+        else:
+            self._put(etag, response.body, response.media_type, headers)
+        return response
+    
+    async def _capture(self, etag: str, chunks: AsyncIterator[bytes], media_type: str,
+                       headers: Dict[str, str]) -> AsyncIterator[bytes]:
+        parts = []
+        size = 0
+        async for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size > self.max_body_bytes:
+                    # Demasiado grande para la caché: se sigue enviando sin guardar
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+        if parts is not None:
+            self._put(etag, b"".join(parts), media_type, headers)
+    
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
@@ -0,0 +1,145 @@
+"""
+Índices declarados por el servicio y reporte de planes de consulta.
+
+Cada colección declara los índices que necesitan sus consultas frecuentes;
+`ensure_indexes` los crea al iniciar (create_indexes es idempotente) y
+`explain_hot_queries` ejecuta `explain` sobre esas consultas para detectar
+COLLSCAN antes de que aparezcan como picos de latencia.
+"""
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from config import settings
+from database import get_database
+from jobs import JOB_RETENTION_DAYS
+from services import ALERTS_SORT, CheckpointService, recent_query
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "news": [
+        # Ventana reciente (get_recent_news): rango/null sobre la fecha, desempate por _id
+        IndexModel([("published_date", ASCENDING), ("_id", ASCENDING)], name="published_date_id"),
+    ],
+    "tweets": [
+        # Ventana reciente (get_recent_tweets)
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_id"),
+    ],
+    "alerts": [
+        # save_alerts hace upserts por título: debe ser único
+        IndexModel([("title", ASCENDING)], unique=True, name="title_unique"),
+        # Listado y paginación de alertas (ALERTS_SORT)
+        IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)], name="createdAt_id"),
+    ],
+    "jobs": [
+        # Un solo trabajo activo por alcance: los pedidos concurrentes se suman a él
+        IndexModel([("activeScope", ASCENDING)], name="activeScope_unique", unique=True, sparse=True),
+        IndexModel([("finishedAt", ASCENDING)], name="finishedAt_ttl", expireAfterSeconds=JOB_RETENTION_DAYS * 86400),
+    ],
+    "analysis_cache": [
+        # Las claves vencen solas; también ordena la carga inicial de la LRU
+        IndexModel(
+            [("createdAt", ASCENDING)], name="createdAt_ttl",
+            expireAfterSeconds=settings.analysis_cache_ttl_days * 86400
+        ),
+    ],
+}
+
+
+async def ensure_indexes():
+    """Crea los índices declarados (idempotente). Un error no impide iniciar el servicio"""
+    db = await get_database()
+    for collection_name, indexes in INDEXES.items():
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await db[collection_name].create_indexes([index])
+            except Exception as e:
+                print(f"✗ No se pudo crear el índice {collection_name}.{name}: {e}")
+                if name == "title_unique":
+                    print("  Ejecutar POST /alerts/clean-duplicates y reiniciar el servicio")
+    print("✓ Índices verificados")
+
+
+async def _hot_queries() -> List[dict]:
+    """Consultas frecuentes del servicio, con los mismos filtros/orden/límite que usan"""
+    queries = []
+    for collection_name, date_field, hours, limit in (
+        ("news", "published_date", 168, 100),
+        ("tweets", "created_at", 72, 200),
+    ):
+        last_id = await CheckpointService.get_last_id(collection_name) or ObjectId("0" * 24)
+        incremental = recent_query(date_field, hours)
+        incremental["_id"] = {"$gt": last_id}
+        queries += [
+            {"name": f"{collection_name}.recent", "collection": collection_name,
+             "filter": recent_query(date_field, hours), "sort": {"_id": -1}, "limit": limit},
+            {"name": f"{collection_name}.incremental", "collection": collection_name,
+             "filter": incremental, "sort": {"_id": 1}, "limit": limit},
+            {"name": f"{collection_name}.page", "collection": collection_name,
+             "filter": {}, "sort": {"_id": 1}, "limit": 100},
+        ]
+    
+    queries += [
+        {"name": "alerts.page", "collection": "alerts",
+         "filter": {}, "sort": dict(ALERTS_SORT), "limit": 100},
+        {"name": "alerts.by_title", "collection": "alerts",
+         "filter": {"title": {"$in": [""]}}, "projection": {"title": 1, "description": 1}},
+    ]
+    return queries
+
+
+def _plan_stages(plan: Optional[dict], stages: List[str], indexes: List[str]):
+    """Recorre el árbol del plan juntando las etapas y los índices usados"""
+    if not plan:
+        return
+    if "queryPlan" in plan:  # Motor SBE (MongoDB 7+)
+        _plan_stages(plan["queryPlan"], stages, indexes)
+        return
+    stage = plan.get("stage")
+    if stage:
+        stages.append(stage)
+    if plan.get("indexName"):
+        indexes.append(plan["indexName"])
+    _plan_stages(plan.get("inputStage"), stages, indexes)
+    for child in plan.get("inputStages", []):
+        _plan_stages(child, stages, indexes)
+
+
+def summarize_explain(name: str, explain: dict) -> Dict[str, Any]:
+    """Resume la salida de explain (executionStats) en un reporte por consulta"""
+    stages, indexes = [], []
+    _plan_stages(explain.get("queryPlanner", {}).get("winningPlan"), stages, indexes)
+    stats = explain.get("executionStats", {})
+    
+    returned = stats.get("nReturned", 0)
+    docs_examined = stats.get("totalDocsExamined", 0)
+    return {
+        "query": name,
+        "uses_index": "IXSCAN" in stages or "IDHACK" in stages or "EXPRESS_IXSCAN" in stages,
+        "collscan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "indexes": sorted(set(indexes)),
+        "stages": stages,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "docs_examined": docs_examined,
+        "returned": returned,
+        "examined_per_returned": round(docs_examined / returned, 2) if returned else None,
+        "execution_ms": stats.get("executionTimeMillis", 0),
+    }
+
+
+async def explain_hot_queries() -> List[Dict[str, Any]]:
+    """Ejecuta explain (executionStats) sobre cada consulta frecuente"""
+    db = await get_database()
+    reports = []
+    for query in await _hot_queries():
+        find = {"find": query["collection"], "filter": query["filter"]}
+        for key in ("sort", "projection", "limit"):
+            if key in query:
+                find[key] = query[key]
+        try:
+            explain = await db.command({"explain": find, "verbosity": "executionStats"})
+            reports.append(summarize_explain(query["name"], explain))
+        except Exception as e:
+            reports.append({"query": query["name"], "error": str(e)})
+    return reports
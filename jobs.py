@@ -0,0 +1,178 @@
+"""
+Trabajos asíncronos de generación de alertas.
+
+Con `?async=true`, los endpoints de generación encolan un trabajo y responden
+enseguida con su id; el pipeline corre en segundo plano dentro del worker que
+recibió el pedido y `GET /alerts/jobs/{id}` informa el progreso y el resumen.
+
+Los trabajos se guardan en la colección `jobs`. Mientras uno está activo
+tiene el campo `activeScope` (fuentes + full + since), con un índice único
+sparse: un pedido concurrente para el mismo alcance, desde cualquier worker
+o contenedor, choca con ese índice y se suma al trabajo en curso en lugar de
+iniciar otro. Un trabajo activo que deja de reportar progreso (su worker
+murió) se marca como abandonado y libera el alcance.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import get_database
+from pipeline import AlertPipeline
+
+
+# Cada cuánto se guarda el progreso de un trabajo en curso
+JOB_PROGRESS_SECONDS = 1.0
+# Sin progreso durante este tiempo, un trabajo activo se considera abandonado
+JOB_STALE_SECONDS = 60
+# Los trabajos terminados se borran solos (índice TTL sobre finishedAt)
+JOB_RETENTION_DAYS = 7
+
+# Trabajos corriendo en este proceso (referencias fuertes a sus tasks)
+_running: Dict[str, asyncio.Task] = {}
+
+
+def job_scope(sources: List[str], full: bool = False, since: Optional[datetime] = None,
+              no_cache: bool = False) -> str:
+    """Alcance de una generación: dos pedidos con el mismo alcance hacen el mismo trabajo"""
+    scope = f"{'+'.join(sorted(sources))}|full={full}|since={since.isoformat() if since else None}"
+    return scope + "|no_cache" if no_cache else scope
+
+
+def _summary(result: dict) -> dict:
+    return {
+        "news_processed": result.get("news_processed", 0),
+        "tweets_processed": result.get("tweets_processed", 0),
+        "alerts_created": result.get("alerts_created", 0),
+    }
+
+
+class JobService:
+    """Servicio para los trabajos de generación"""
+    
+    @staticmethod
+    async def submit(sources: List[str], full: bool = False, since: Optional[datetime] = None,
+                     no_cache: bool = False) -> Tuple[dict, bool]:
+        """
+        Inicia un trabajo, o se suma al que ya está en curso para el mismo alcance.
+        Retorna (trabajo, True si se sumó a uno existente).
+        """
+        db = await get_database()
+        scope = job_scope(sources, full, since, no_cache)
+        
+        for _ in range(3):
+            now = datetime.utcnow()
+            job = {
+                "_id": uuid.uuid4().hex,
+                "scope": scope,
+                "activeScope": scope,
+                "sources": sources,
+                "full": full,
+                "since": since,
+                "no_cache": no_cache,
+                "status": "queued",
+                "requests": 1,
+                "progress": _summary({}),
+                "createdAt": now,
+                "updatedAt": now,
+            }
+            try:
+                await db["jobs"].insert_one(job)
+            except DuplicateKeyError:
+                existing = await db["jobs"].find_one_and_update(
+                    {"activeScope": scope, "updatedAt": {"$gte": now - timedelta(seconds=JOB_STALE_SECONDS)}},
+                    {"$inc": {"requests": 1}},
+                    return_document=ReturnDocument.AFTER
+                )
+                if existing is not None:
+                    return existing, True
+                # Terminó recién o quedó abandonado: liberar el alcance y reintentar
+                await db["jobs"].update_one(
+                    {"activeScope": scope, "updatedAt": {"$lt": now - timedelta(seconds=JOB_STALE_SECONDS)}},
+                    {
+                        "$set": {"status": "failed", "error": "Trabajo abandonado (el worker dejó de reportar)",
+                                 "finishedAt": now},
+                        "$unset": {"activeScope": ""}
+                    }
+                )
+                continue
+            
+            _running[job["_id"]] = asyncio.create_task(JobService._run(job))
+            return job, False
+        
+        raise RuntimeError(f"No se pudo iniciar el trabajo para {scope}")
+    
+    @staticmethod
+    async def get(job_id: str) -> Optional[dict]:
+        """Estado de un trabajo (None si no existe)"""
+        db = await get_database()
+        job = await db["jobs"].find_one({"_id": job_id}, {"activeScope": 0})
+        if job is not None:
+            job["id"] = job.pop("_id")
+        return job
+    
+    @staticmethod
+    async def shutdown():
+        """Interrumpe los trabajos de este proceso (se marcan como fallidos)"""
+        job_ids = list(_running)
+        tasks = list(_running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if job_ids:
+            # Los que se cancelaron antes de empezar no llegaron a registrar su fin
+            db = await get_database()
+            await db["jobs"].update_many(
+                {"_id": {"$in": job_ids}, "activeScope": {"$exists": True}},
+                {
+                    "$set": {"status": "failed", "error": "Trabajo interrumpido (el servicio se detuvo)",
+                             "finishedAt": datetime.utcnow()},
+                    "$unset": {"activeScope": ""}
+                }
+            )
+    
+    @staticmethod
+    async def _update(job_id: str, update: dict):
+        db = await get_database()
+        update.setdefault("$set", {})["updatedAt"] = datetime.utcnow()
+        await db["jobs"].update_one({"_id": job_id}, update)
+    
+    @staticmethod
+    async def _run(job: dict):
+        """Corre el pipeline y guarda el progreso hasta terminar"""
+        job_id = job["_id"]
+        pipeline = AlertPipeline()
+        outcome = {"status": "failed"}
+        try:
+            await JobService._update(job_id, {"$set": {"status": "running", "startedAt": datetime.utcnow()}})
+            run = asyncio.create_task(pipeline.run(
+                job["sources"], full=job["full"], since=job["since"], no_cache=job.get("no_cache", False)
+            ))
+            try:
+                while not run.done():
+                    await asyncio.wait({run}, timeout=JOB_PROGRESS_SECONDS)
+                    if not run.done():
+                        await JobService._update(job_id, {"$set": {"progress": _summary(pipeline.progress())}})
+            finally:
+                if not run.done():
+                    run.cancel()
+            
+            summary = _summary(run.result())
+            outcome = {"status": "succeeded", "progress": summary, "result": summary}
+        except asyncio.CancelledError:
+            outcome["error"] = "Trabajo interrumpido (el servicio se detuvo)"
+            raise
+        except Exception as e:
+            outcome["error"] = str(e)
+            print(f"✗ Error en el trabajo de generación {job_id}: {e}")
+        finally:
+            _running.pop(job_id, None)
+            outcome["finishedAt"] = datetime.utcnow()
+            try:
+                await JobService._update(job_id, {"$set": outcome, "$unset": {"activeScope": ""}})
+            except Exception as e:
+                print(f"✗ No se pudo guardar el estado del trabajo {job_id}: {e}")
@@ -1,11 +1,34 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Query, Request, WebSocket
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
+from analysis_cache import get_analysis_cache
+from analysis_engine import get_engine, start_engine, stop_engine
+from broadcast import AlertChangeFeed, AlertFilter, get_broadcaster, resolve_stream_source, stream_source
+from config import settings
 from database import connect_to_mongo, close_mongo_connection
+from http_cache import ResponseCache, etag_matches, make_etag, not_modified
+from indexes import ensure_indexes, explain_hot_queries
+from jobs import JobService
+from metrics import RequestMetricsMiddleware, mark_process_dead, metrics_response
 from models import News, Tweet, Alert, AlertResponse
-from services import NewsService, TweetService, AlertService
+from rules import RulesWatcher, get_active_rules, list_rules, load_active_rules, publish_rules, set_rules_active
+from serialization import ORJSONResponse, dumps
+from pagination import InvalidCursorError, json_array_response, json_page_response, ndjson_response
+from scheduler import AlertScheduler
+from services import CounterService, NewsService, TweetService, AlertService
+from stream_worker import AlertStreamWorker
+from ticker_index import TickerWatcher, publish_ticker_reload, reload_ticker_index
+
+
+def _restart_engine():
+    """Los procesos del motor de análisis tienen su propia copia del índice de tickers"""
+    engine = get_engine()
+    if engine:
+        engine.restart()
 
 
 @asynccontextmanager
@@ -13,16 +36,50 @@ async def lifespan(app: FastAPI):
     """Maneja el ciclo de vida de la aplicación"""
     # Startup
     await connect_to_mongo()
+    await reload_ticker_index()
+    await load_active_rules()
+    analysis_cache = get_analysis_cache()
+    if analysis_cache:
+        await analysis_cache.warm_up()
+    rules_watcher = RulesWatcher()
+    rules_watcher.start()
+    ticker_watcher = TickerWatcher(on_reload=_restart_engine)
+    ticker_watcher.start()
+    if settings.analysis_workers > 0:
+        start_engine(settings.analysis_workers)
+    stream_worker = None
+    if settings.stream_worker_enabled:
+        stream_worker = AlertStreamWorker()
+        stream_worker.start()
+    if settings.scheduler_enabled:
+        app.state.scheduler = AlertScheduler()
+        app.state.scheduler.start()
+    alert_feed = None
+    if await resolve_stream_source() == "change_stream":
+        alert_feed = AlertChangeFeed(get_broadcaster())
+        alert_feed.start()
     yield
     # Shutdown
+    if alert_feed:
+        await alert_feed.stop()
+    await JobService.shutdown()
+    if settings.scheduler_enabled:
+        await app.state.scheduler.stop()
+    if stream_worker:
+        await stream_worker.stop()
+    await ticker_watcher.stop()
+    await rules_watcher.stop()
+    stop_engine()
     await close_mongo_connection()
+    mark_process_dead()
 
 
 app = FastAPI(
     title="Alertas de Noticias API",
     description="API para generar alertas basadas en noticias de MongoDB",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configurar CORS
@@ -33,6 +90,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+
+
+# Tamaño máximo de página en los endpoints de listado
+MAX_PAGE_SIZE = 1000
+
+# Últimas respuestas de GET /alerts, por ETag (versión de la colección + parámetros)
+ALERTS_RESPONSE_CACHE = ResponseCache()
+
+
+def _stream_list(items, format: str):
+    """
+    Respuesta en streaming: arreglo JSON completo o NDJSON.
+    Los documentos llegan ya serializados (lectura confiable, sin pasar por response_model).
+    """
+    if format == "ndjson":
+        return ndjson_response(items)
+    return json_array_response(items)
 
 
 @app.get("/")
@@ -42,17 +117,25 @@ async def root():
         "message": "API de Alertas de Noticias y Tweets",
         "version": "2.0.0",
         "endpoints": {
-            "GET /news": "Obtener todas las noticias",
+            "GET /news": "Obtener todas las noticias (paginable con limit/after, format=ndjson)",
             "GET /news/recent": "Obtener noticias recientes",
-            "GET /tweets": "Obtener todos los tweets",
+            "GET /tweets": "Obtener todos los tweets (paginable con limit/after, format=ndjson)",
             "GET /tweets/recent": "Obtener tweets recientes",
-            "GET /alerts": "Obtener todas las alertas",
+            "GET /alerts": "Obtener todas las alertas (paginable con limit/after, format=ndjson)",
             "POST /alerts/generate": "Generar alertas desde noticias y tweets (COMBINADO)",
             "POST /alerts/generate/news": "Generar alertas solo desde noticias",
             "POST /alerts/generate/tweets": "Generar alertas solo desde tweets",
+            "GET /alerts/jobs/{id}": "Progreso de una generación asíncrona (?async=true)",
+            "GET /alerts/stream": "Alertas en vivo por Server-Sent Events (filtros priority, symbol, alert_type)",
+            "WS /alerts/ws": "Alertas en vivo por WebSocket (mismos filtros)",
             "POST /alerts/clean-duplicates": "Limpiar alertas duplicadas",
             "DELETE /alerts": "Eliminar todas las alertas",
-            "GET /health": "Estado de salud de la API"
+            "GET /health": "Estado de salud de la API",
+            "GET /admin/query-plans": "Plan de ejecución de las consultas frecuentes",
+            "GET /metrics": "Métricas en formato Prometheus",
+            "POST /admin/tickers/reload": "Recargar el universo de tickers y alias",
+            "GET /admin/rules": "Versiones de reglas de scoring",
+            "POST /admin/rules": "Publicar una nueva versión de reglas"
         }
     }
 
@@ -61,23 +144,122 @@ async def root():
 async def health_check():
     """Verifica el estado de la API y la conexión a MongoDB"""
     try:
-        from database import mongodb
+        from database import mongodb, pool_metrics
         await mongodb.client.admin.command('ping')
-        return {
+        health = {
             "status": "healthy",
             "database": "connected",
-            "message": "API funcionando correctamente"
+            "message": "API funcionando correctamente",
+            "mongodb_pools": pool_metrics.snapshot()
+        }
+        scheduler = getattr(app.state, "scheduler", None)
+        if scheduler:
+            health["scheduler"] = scheduler.status()
+        health["alert_stream"] = {
+            "source": stream_source(),
+            "subscribers": get_broadcaster().subscribers
         }
+        return health
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Error de conexión: {str(e)}")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas del servicio en formato Prometheus"""
+    return metrics_response()
+
+
+@app.get("/admin/query-plans")
+async def query_plans():
+    """
+    Ejecuta explain (executionStats) sobre las consultas frecuentes del servicio
+    y reporta si usaron índice o COLLSCAN, y documentos examinados vs retornados
+    """
+    try:
+        reports = await explain_hot_queries()
+        return {
+            "collscans": [report["query"] for report in reports if report.get("collscan")],
+            "queries": reports
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener los planes: {str(e)}")
+
+
+@app.post("/admin/tickers/reload")
+async def reload_tickers():
+    """
+    Recarga el universo de tickers y alias (colección tickers o tickers.json) sin
+    reiniciar. Los demás procesos recargan en los próximos TICKERS_POLL_SECONDS.
+    """
+    try:
+        index = await publish_ticker_reload()
+        _restart_engine()
+        return {"success": True, "symbols": len(index), "version": index.version}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al recargar tickers: {str(e)}")
+
+
+@app.get("/admin/rules")
+async def get_rules():
+    """Versión de reglas activa en este proceso y versiones guardadas"""
+    try:
+        return {"active_version": get_active_rules().version, "versions": await list_rules()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener reglas: {str(e)}")
+
+
+@app.post("/admin/rules")
+async def create_rules(spec: dict = Body(...), activate: bool = True):
+    """
+    Publica una nueva versión de reglas (keyword_patterns, magnitude_words,
+    thresholds, market_hours_factor). Los demás procesos la toman en el
+    próximo polling (RULES_POLL_SECONDS).
+    """
+    try:
+        version = await publish_rules(spec, activate=activate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al publicar reglas: {str(e)}")
+    
+    rules = await load_active_rules()
+    return {"success": True, "version": version, "active_version": rules.version}
+
+
+@app.post("/admin/rules/{version}/activate")
+async def activate_rules(version: int, active: bool = True):
+    """Activa (o con active=false desactiva) una versión de reglas guardada"""
+    try:
+        if not await set_rules_active(version, active):
+            raise HTTPException(status_code=404, detail=f"No existe la versión {version}")
+        rules = await load_active_rules()
+        return {"success": True, "active_version": rules.version}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al activar reglas: {str(e)}")
+
+
 @app.get("/news", response_model=List[News])
-async def get_news():
-    """Obtiene todas las noticias de la base de datos"""
+async def get_news(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """
+    Obtiene las noticias de la base de datos (orden de _id).
+    - limit: tamaño de página; el cursor de la siguiente va en el header X-Next-Cursor
+    - after: cursor devuelto por la página anterior
+    - format=ndjson: una noticia por línea, en streaming
+    """
     try:
-        news = await NewsService.get_all_news()
-        return news
+        if limit is not None and format == "json":
+            news, next_cursor = await NewsService.get_news_page_json(limit, after)
+            return json_page_response(news, next_cursor)
+        return _stream_list(NewsService.iter_news_json(after, limit), format)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener noticias: {str(e)}")
 
@@ -93,11 +275,24 @@ async def get_recent_news(limit: int = 50):
 
 
 @app.get("/tweets", response_model=List[Tweet])
-async def get_tweets():
-    """Obtiene todos los tweets de la base de datos"""
+async def get_tweets(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """
+    Obtiene los tweets de la base de datos (orden de _id).
+    - limit: tamaño de página; el cursor de la siguiente va en el header X-Next-Cursor
+    - after: cursor devuelto por la página anterior
+    - format=ndjson: un tweet por línea, en streaming
+    """
     try:
-        tweets = await TweetService.get_all_tweets()
-        return tweets
+        if limit is not None and format == "json":
+            tweets, next_cursor = await TweetService.get_tweets_page_json(limit, after)
+            return json_page_response(tweets, next_cursor)
+        return _stream_list(TweetService.iter_tweets_json(after, limit), format)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener tweets: {str(e)}")
 
@@ -113,23 +308,145 @@ async def get_recent_tweets(limit: int = 100):
 
 
 @app.get("/alerts", response_model=List[Alert])
-async def get_alerts():
-    """Obtiene todas las alertas generadas"""
+async def get_alerts(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """
+    Obtiene las alertas generadas (más nuevas primero).
+    - limit: tamaño de página; el cursor de la siguiente va en el header X-Next-Cursor
+    - after: cursor devuelto por la página anterior
+    - format=ndjson: una alerta por línea, en streaming
+    
+    Responde con ETag: con If-None-Match y sin cambios en las alertas
+    responde 304 sin leer la colección.
+    """
     try:
-        alerts = await AlertService.get_all_alerts()
-        return alerts
+        etag = make_etag(await CounterService.get_version("alerts", for_list=True), limit, after, format)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        cached = ALERTS_RESPONSE_CACHE.get(etag)
+        if cached is not None:
+            return cached
+        
+        if limit is not None and format == "json":
+            alerts, next_cursor = await AlertService.get_alerts_page_json(limit, after)
+            return ALERTS_RESPONSE_CACHE.store(etag, json_page_response(alerts, next_cursor))
+        return ALERTS_RESPONSE_CACHE.store(etag, _stream_list(AlertService.iter_alerts_json(after, limit), format))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener alertas: {str(e)}")
 
 
+OVERFLOW_MESSAGE = {"event": "overflow", "message": "Conexión demasiado lenta: consultar GET /alerts y reconectar"}
+
+
+@app.get("/alerts/stream")
+async def stream_alerts(
+    priority: Optional[List[str]] = Query(None),
+    symbol: Optional[List[str]] = Query(None),
+    alert_type: Optional[List[str]] = Query(None)
+):
+    """
+    Alertas creadas o actualizadas, en vivo (Server-Sent Events).
+    - priority, symbol, alert_type: filtros (repetibles o separados por coma)
+    
+    Eventos `created`, `updated` y `triggered` con {"event", "alert"}. Un
+    cliente que no consume a tiempo recibe `overflow` y se desconecta.
+    """
+    subscription = get_broadcaster().subscribe(AlertFilter(priority, symbol, alert_type))
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Demasiadas conexiones al feed de alertas")
+    
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                event = await subscription.get(settings.alert_stream_heartbeat_seconds)
+                if subscription.closed:
+                    if subscription.overflowed:
+                        yield b"event: overflow\ndata: " + dumps(OVERFLOW_MESSAGE) + b"\n\n"
+                    return
+                yield event.sse() if event is not None else b": keepalive\n\n"
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/alerts/ws")
+async def alerts_websocket(
+    websocket: WebSocket,
+    priority: Optional[List[str]] = Query(None),
+    symbol: Optional[List[str]] = Query(None),
+    alert_type: Optional[List[str]] = Query(None)
+):
+    """Alertas en vivo por WebSocket: mismos filtros y eventos que GET /alerts/stream"""
+    await websocket.accept()
+    subscription = get_broadcaster().subscribe(AlertFilter(priority, symbol, alert_type))
+    if subscription is None:
+        await websocket.close(code=1013, reason="Demasiadas conexiones al feed de alertas")
+        return
+    
+    try:
+        while True:
+            event = await subscription.get(settings.alert_stream_heartbeat_seconds)
+            if subscription.closed:
+                if subscription.overflowed:
+                    await websocket.send_text(dumps(OVERFLOW_MESSAGE).decode())
+                await websocket.close(code=1013)
+                return
+            # Sin eventos: un heartbeat detecta clientes que se fueron sin cerrar
+            await websocket.send_text(event.data.decode() if event is not None else '{"event":"heartbeat"}')
+    except Exception:
+        # Cliente desconectado
+        pass
+    finally:
+        subscription.close()
+
+
+async def _enqueue_generation(sources: List[str], full: bool, since: Optional[datetime],
+                              no_cache: bool = False) -> ORJSONResponse:
+    """Encola (o se suma a) un trabajo de generación y responde 202 con su id"""
+    try:
+        job, coalesced = await JobService.submit(sources, full=full, since=since, no_cache=no_cache)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al encolar la generación: {str(e)}")
+    
+    return ORJSONResponse(status_code=202, content={
+        "success": True,
+        "job_id": job["_id"],
+        "status": job["status"],
+        "coalesced": coalesced,
+        "status_url": f"/alerts/jobs/{job['_id']}",
+        "message": "Ya había una generación en curso para este alcance" if coalesced else "Generación encolada"
+    })
+
+
 @app.post("/alerts/generate", response_model=AlertResponse)
-async def generate_alerts():
+async def generate_alerts(full: bool = False, since: Optional[datetime] = None, no_cache: bool = False,
+                         run_async: bool = Query(False, alias="async")):
     """
     Procesa NOTICIAS Y TWEETS y genera alertas automáticamente (COMBINADO).
     Las alertas se guardan en la colección 'alerts' de MongoDB.
+    
+    Solo se analizan documentos posteriores al último procesado.
+    - full=true: re-escanea la ventana reciente completa
+    - since=<fecha ISO>: re-escanea los documentos insertados desde esa fecha
+    - no_cache=true: re-analiza también los documentos ya analizados con el mismo
+      contenido y reglas (sin esto, full y since solo analizan lo nuevo o modificado)
+    - async=true: encola un trabajo y responde 202 con su id (ver /alerts/jobs/{id})
     """
+    if run_async:
+        return await _enqueue_generation(["news", "tweets"], full, since, no_cache)
     try:
-        result = await AlertService.process_all_and_create_alerts()
+        result = await AlertService.process_all_and_create_alerts(full=full, since=since, no_cache=no_cache)
         
         return AlertResponse(
             success=result["success"],
@@ -144,13 +461,16 @@ async def generate_alerts():
 
 
 @app.post("/alerts/generate/news", response_model=AlertResponse)
-async def generate_alerts_from_news():
+async def generate_alerts_from_news(full: bool = False, since: Optional[datetime] = None, no_cache: bool = False,
+                                   run_async: bool = Query(False, alias="async")):
     """
     Procesa solo las NOTICIAS y genera alertas.
     Las alertas se guardan en la colección 'alerts' de MongoDB.
     """
+    if run_async:
+        return await _enqueue_generation(["news"], full, since, no_cache)
     try:
-        result = await AlertService.process_news_and_create_alerts()
+        result = await AlertService.process_news_and_create_alerts(full=full, since=since, no_cache=no_cache)
         
         return AlertResponse(
             success=result["success"],
@@ -165,13 +485,16 @@ async def generate_alerts_from_news():
 
 
 @app.post("/alerts/generate/tweets", response_model=AlertResponse)
-async def generate_alerts_from_tweets():
+async def generate_alerts_from_tweets(full: bool = False, since: Optional[datetime] = None, no_cache: bool = False,
+                                     run_async: bool = Query(False, alias="async")):
     """
     Procesa solo los TWEETS y genera alertas.
     Las alertas se guardan en la colección 'alerts' de MongoDB.
     """
+    if run_async:
+        return await _enqueue_generation(["tweets"], full, since, no_cache)
     try:
-        result = await AlertService.process_tweets_and_create_alerts()
+        result = await AlertService.process_tweets_and_create_alerts(full=full, since=since, no_cache=no_cache)
         
         return AlertResponse(
             success=result["success"],
@@ -185,95 +508,48 @@ async def generate_alerts_from_tweets():
         raise HTTPException(status_code=500, detail=f"Error al generar alertas desde tweets: {str(e)}")
 
 
+@app.get("/alerts/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """Progreso y resumen de un trabajo de generación (POST /alerts/generate?async=true)"""
+    job = await JobService.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No existe el trabajo {job_id}")
+    return job
+
+
 @app.delete("/alerts")
 async def delete_all_alerts():
     """Elimina todas las alertas (útil para testing)"""
     try:
-        from database import get_database
-        db = await get_database()
-        result = await db["alerts"].delete_many({})
+        deleted_count = await AlertService.delete_all_alerts()
         return {
             "success": True,
-            "deleted_count": result.deleted_count,
-            "message": f"Se eliminaron {result.deleted_count} alertas"
+            "deleted_count": deleted_count,
+            "message": f"Se eliminaron {deleted_count} alertas"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar alertas: {str(e)}")
 
 
 @app.post("/alerts/clean-duplicates")
-async def clean_duplicate_alerts():
-    """Limpia alertas duplicadas manteniendo solo la más reciente de cada grupo"""
+async def clean_duplicate_alerts(dry_run: bool = False):
+    """
+    Limpia alertas duplicadas manteniendo solo la más reciente de cada grupo.
+    Con dry_run=true solo informa cuántos duplicados hay, sin borrar nada.
+    """
     try:
-        from database import get_database
-        from datetime import datetime
+        result = await AlertService.clean_duplicate_alerts(dry_run=dry_run)
         
-        db = await get_database()
-        alerts = db['alerts']
+        if dry_run:
+            message = (f"Se encontraron {result['groups_processed']} grupos de duplicados "
+                       f"({result['duplicates_found']} alertas a eliminar). No se eliminó nada.")
+        else:
+            # Sin duplicados ya se puede crear el índice único por título
+            await ensure_indexes()
+            message = (f"Se procesaron {result['groups_processed']} grupos de duplicados. "
+                       f"Se eliminaron {result['duplicates_deleted']} alertas duplicadas.")
         
-        # Buscar alertas duplicadas por título
-        pipeline = [
-            {
-                '$group': {
-                    '_id': '$title',
-                    'count': {'$sum': 1},
-                    'docs': {'$push': '$$ROOT'}
-                }
-            },
-            {
-                '$match': {'count': {'$gt': 1}}
-            }
-        ]
-        
-        duplicates = await alerts.aggregate(pipeline).to_list(None)
-        
-        total_deleted = 0
-        groups_processed = 0
-        
-        for dup_group in duplicates:
-            docs = dup_group['docs']
-            
-            # Ordenar por lastTriggered (más reciente primero)
-            docs_sorted = sorted(
-                docs,
-                key=lambda x: x.get('lastTriggered', x.get('createdAt', datetime.min)),
-                reverse=True
-            )
-            
-            # Mantener el primero (más reciente), eliminar el resto
-            keep_doc = docs_sorted[0]
-            to_delete = docs_sorted[1:]
-            
-            # Actualizar el documento que mantenemos con la suma de triggers
-            total_triggers = sum(d.get('triggerCount', 1) for d in docs_sorted)
-            
-            await alerts.update_one(
-                {'_id': keep_doc['_id']},
-                {
-                    '$set': {
-                        'triggerCount': total_triggers,
-                        'lastTriggered': datetime.utcnow()
-                    }
-                }
-            )
-            
-            # Eliminar los duplicados
-            for doc in to_delete:
-                await alerts.delete_one({'_id': doc['_id']})
-                total_deleted += 1
-            
-            groups_processed += 1
-        
-        # Estadísticas finales
-        total_after = await alerts.count_documents({})
-        
-        return {
-            "success": True,
-            "groups_processed": groups_processed,
-            "duplicates_deleted": total_deleted,
-            "total_alerts_remaining": total_after,
-            "message": f"Se procesaron {groups_processed} grupos de duplicados. Se eliminaron {total_deleted} alertas duplicadas."
-        }
+        return {"success": True, **result, "message": message}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al limpiar duplicados: {str(e)}")
 
@@ -0,0 +1,158 @@
+"""
+Calendario de ruedas de BYMA (Bolsas y Mercados Argentinos).
+
+Los feriados se calculan para cualquier año con las reglas de la Ley 27.399:
+feriados fijos, Carnaval y Semana Santa (a partir de la fecha de Pascua) y
+los trasladables, que se mueven a un lunes. Los días no laborables "puente"
+los fija un decreto cada año y no se pueden calcular: van en BRIDGE_DAYS y
+deben cargarse cuando se publica el decreto. Para un año sin puentes
+cargados se avisa una vez por log y se usan solo los feriados calculados.
+
+La tabla de sesiones de cada año se arma la primera vez que se consulta:
+para cada día hábil guarda la apertura y el cierre en UTC, y
+`is_in_session` responde con una búsqueda en un dict, sin zonas horarias ni
+lectura del reloj por documento.
+
+Argentina no tiene horario de verano desde 2009, así que la rueda de
+11:00 a 17:00 ART es siempre 14:00 a 20:00 UTC.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+
+ART = timezone(timedelta(hours=-3))
+
+SESSION_OPEN = time(11, 0)
+SESSION_CLOSE = time(17, 0)
+
+# Feriados inamovibles (mes, día)
+FIXED_HOLIDAYS = (
+    (1, 1),    # Año Nuevo
+    (3, 24),   # Día de la Memoria
+    (4, 2),    # Malvinas
+    (5, 1),    # Día del Trabajador
+    (5, 25),   # Revolución de Mayo
+    (6, 20),   # Paso a la Inmortalidad de Belgrano
+    (7, 9),    # Independencia
+    (12, 8),   # Inmaculada Concepción
+    (12, 25),  # Navidad
+)
+
+# Feriados trasladables (mes, día): martes y miércoles pasan al lunes anterior,
+# jueves y viernes al lunes siguiente
+MOVABLE_HOLIDAYS = (
+    (6, 17),   # Paso a la Inmortalidad de Güemes
+    (8, 17),   # Paso a la Inmortalidad de San Martín
+    (10, 12),  # Día del Respeto a la Diversidad Cultural
+    (11, 20),  # Día de la Soberanía Nacional
+)
+
+# Días no laborables con fines turísticos (decreto anual), con la bolsa cerrada
+BRIDGE_DAYS: Dict[int, Set[date]] = {
+    2024: {date(2024, 4, 1), date(2024, 6, 21), date(2024, 10, 11)},
+    2025: {date(2025, 5, 2), date(2025, 8, 15), date(2025, 11, 21)},
+    2026: {date(2026, 3, 23), date(2026, 7, 10), date(2026, 12, 7)},
+}
+
+
+def easter_sunday(year: int) -> date:
+    """Domingo de Pascua (algoritmo gregoriano anónimo de Meeus/Jones/Butcher)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _moved_to_monday(day: date) -> date:
+    weekday = day.weekday()
+    if weekday in (1, 2):
+        return day - timedelta(days=weekday)
+    if weekday in (3, 4):
+        return day + timedelta(days=7 - weekday)
+    return day
+
+
+_warned_years: Set[int] = set()
+
+
+def holidays(year: int) -> FrozenSet[date]:
+    """Días sin rueda por feriado o día no laborable en `year`"""
+    easter = easter_sunday(year)
+    days = {date(year, month, day) for month, day in FIXED_HOLIDAYS}
+    days.update(_moved_to_monday(date(year, month, day)) for month, day in MOVABLE_HOLIDAYS)
+    days.update((
+        easter - timedelta(days=48),  # Carnaval (lunes)
+        easter - timedelta(days=47),  # Carnaval (martes)
+        easter - timedelta(days=3),   # Jueves Santo
+        easter - timedelta(days=2),   # Viernes Santo
+    ))
+    
+    bridges = BRIDGE_DAYS.get(year)
+    if bridges is None:
+        if year not in _warned_years:
+            _warned_years.add(year)
+            print(f"✗ Calendario de BYMA: sin días puente cargados para {year} (revisar BRIDGE_DAYS)")
+    else:
+        days.update(bridges)
+    return frozenset(days)
+
+
+def _session_utc(day: date) -> Tuple[datetime, datetime]:
+    """Apertura y cierre de la rueda de `day` en UTC (naive, como los guarda Mongo)"""
+    open_at = datetime.combine(day, SESSION_OPEN, ART).astimezone(timezone.utc).replace(tzinfo=None)
+    close_at = datetime.combine(day, SESSION_CLOSE, ART).astimezone(timezone.utc).replace(tzinfo=None)
+    return open_at, close_at
+
+
+def _build_sessions(year: int) -> Dict[date, Tuple[datetime, datetime]]:
+    closed = holidays(year)
+    sessions = {}
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day.weekday() < 5 and day not in closed:
+            sessions[day] = _session_utc(day)
+        day += timedelta(days=1)
+    return sessions
+
+
+# Año → (día hábil (fecha local) → (apertura, cierre) en UTC)
+_SESSIONS: Dict[int, Dict[date, Tuple[datetime, datetime]]] = {}
+
+
+def sessions(year: int) -> Dict[date, Tuple[datetime, datetime]]:
+    """Ruedas de `year` (se calculan una vez por año)"""
+    table = _SESSIONS.get(year)
+    if table is None:
+        table = _SESSIONS[year] = _build_sessions(year)
+    return table
+
+
+def _to_utc(ts: datetime) -> datetime:
+    """Normaliza a UTC naive; los datetimes naive se asumen en UTC"""
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def is_in_session(ts: Optional[datetime] = None) -> bool:
+    """
+    Indica si el instante `ts` cae dentro de una rueda de BYMA.
+    Sin `ts` se evalúa el momento actual.
+    """
+    ts = _to_utc(ts) if ts is not None else datetime.utcnow()
+    # La fecha local (ART) decide el día de la rueda
+    local_day = (ts + ART.utcoffset(None)).date()
+    
+    session = sessions(local_day.year).get(local_day)
+    if session is None:
+        return False
+    
+    open_at, close_at = session
+    return open_at <= ts < close_at
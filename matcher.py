@@ -0,0 +1,101 @@
+"""
+Búsqueda de múltiples patrones literales en una sola pasada sobre el texto
+"""
+import re
+from typing import Iterable, List, Set, Tuple
+
+
+class MultiPatternMatcher:
+    """
+    Matcher compilado para un conjunto fijo de patrones (estilo Aho-Corasick).
+
+    Los patrones se organizan en un trie que se compila a una única expresión
+    regular dentro de un lookahead: el motor de `re` recorre el texto una sola
+    vez, en cada posición avanza carácter a carácter por el trie y reporta
+    también coincidencias solapadas. Los patrones que son prefijo de otro más
+    largo se resuelven con una tabla precalculada, ya que en una misma
+    posición el lookahead solo devuelve la coincidencia más larga.
+    """
+
+    def __init__(self, patterns: Iterable[str], whole_words: bool = False):
+        self.whole_words = whole_words
+        # Orden estable: más largos primero
+        self.patterns = sorted({p for p in patterns if p}, key=lambda p: (-len(p), p))
+
+        # Para cada patrón, los patrones más cortos que también coinciden
+        # en la misma posición (prefijos)
+        self._implied = {}
+        for pattern in self.patterns:
+            self._implied[pattern] = tuple(
+                other for other in self.patterns
+                if len(other) < len(pattern)
+                and pattern.startswith(other)
+                and (not whole_words or not _is_word_char(pattern[len(other)]))
+            )
+
+        if self.patterns:
+            alternation = _trie_regex(self.patterns)
+            if whole_words:
+                regex = rf'(?<!\w)(?=({alternation})(?!\w))'
+            else:
+                regex = rf'(?=({alternation}))'
+            self._regex = re.compile(regex)
+        else:
+            self._regex = None
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """Retorna todas las coincidencias (posición, patrón) en orden de aparición"""
+        if self._regex is None or not text:
+            return []
+
+        matches = []
+        implied = self._implied
+        for match in self._regex.finditer(text):
+            start = match.start()
+            pattern = match.group(1)
+            matches.append((start, pattern))
+            for other in implied[pattern]:
+                matches.append((start, other))
+
+        return matches
+
+    def found(self, text: str) -> Set[str]:
+        """Retorna el conjunto de patrones presentes en el texto"""
+        if self._regex is None or not text:
+            return set()
+
+        found = set()
+        implied = self._implied
+        for pattern in self._regex.findall(text):
+            if pattern not in found:
+                found.add(pattern)
+                found.update(implied[pattern])
+
+        return found
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _trie_regex(patterns: Iterable[str]) -> str:
+    """Convierte los patrones en una expresión regular con forma de trie"""
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+
+        regex = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Un patrón termina en este nodo: el resto es opcional (greedy)
+        if '' in node:
+            regex = '(?:' + regex + ')?'
+        return regex
+
+    return build(trie)
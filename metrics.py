@@ -0,0 +1,356 @@
+"""
+Métricas en formato Prometheus (expuestas en GET /metrics).
+
+- Duración de cada etapa de la generación de alertas (fetch, analyze, save) por corrida
+- Documentos procesados, omitidos por caché o deduplicados, y alertas emitidas por fuente y prioridad
+- Latencia de los comandos de MongoDB (command monitoring de pymongo)
+- Estado del pool de conexiones de MongoDB y espera para obtener una conexión
+- Suscriptores y eventos del feed de alertas en vivo
+- Latencia de cada endpoint HTTP
+
+Con `uvicorn --workers N` cada worker tiene sus propios contadores. Si está
+definida PROMETHEUS_MULTIPROC_DIR (antes de iniciar los procesos), cada uno
+escribe sus valores en ese directorio y GET /metrics los suma entre todos,
+así que cualquier worker que atienda el scrape devuelve el total. Los gauges
+suman solo los procesos vivos; al apagarse, cada worker descarta los suyos.
+El directorio tiene que vaciarse antes de arrancar el servicio.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from pymongo import monitoring
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Modo multi-proceso de prometheus_client (ver docstring del módulo)
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+STAGE_DURATION = Histogram(
+    "alert_pipeline_stage_seconds",
+    "Tiempo acumulado en cada etapa de una corrida de generación de alertas",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+DOCUMENTS_PROCESSED = Counter(
+    "alert_documents_processed_total",
+    "Documentos analizados",
+    ["source"]
+)
+
+ANALYSIS_CACHE_HITS = Counter(
+    "alert_documents_cached_total",
+    "Documentos omitidos por la caché de análisis (mismo contenido y reglas)",
+    ["source"]
+)
+
+DOCUMENTS_DEDUPLICATED = Counter(
+    "alert_documents_deduplicated_total",
+    "Documentos sumados a una historia ya analizada (casi duplicados)",
+    ["source"]
+)
+
+ALERTS_EMITTED = Counter(
+    "alerts_emitted_total",
+    "Alertas emitidas por el análisis (antes de deduplicar por título)",
+    ["source", "priority"]
+)
+
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_seconds",
+    "Latencia de los comandos enviados a MongoDB",
+    ["command", "status"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Espera para obtener una conexión del pool de MongoDB",
+    ["address"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10)
+)
+
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Conexiones del pool de MongoDB (abiertas, en uso y pedidos esperando)",
+    ["address", "state"],
+    multiprocess_mode="livesum"
+)
+
+ALERT_STREAM_SUBSCRIBERS = Gauge(
+    "alert_stream_subscribers",
+    "Conexiones abiertas al feed de alertas (SSE y WebSocket)",
+    multiprocess_mode="livesum"
+)
+
+ALERT_STREAM_EVENTS = Counter(
+    "alert_stream_events_total",
+    "Eventos de alertas publicados al feed",
+    ["event"]
+)
+
+ALERT_STREAM_DROPPED = Counter(
+    "alert_stream_dropped_total",
+    "Suscriptores desconectados por no consumir el feed a tiempo"
+)
+
+REQUEST_DURATION = Histogram(
+    "http_request_seconds",
+    "Latencia de las requests HTTP por endpoint",
+    ["method", "endpoint", "status"]
+)
+
+
+class StageTimer:
+    """Acumula el tiempo de cada etapa durante una corrida y lo observa al final"""
+    
+    STAGES = ("fetch", "analyze", "save")
+    
+    def __init__(self):
+        self.totals = {stage: 0.0 for stage in self.STAGES}
+    
+    def add(self, stage: str, seconds: float):
+        self.totals[stage] += seconds
+    
+    def observe(self):
+        for stage, seconds in self.totals.items():
+            STAGE_DURATION.labels(stage=stage).observe(seconds)
+
+
+def record_documents(source: str, count: int):
+    DOCUMENTS_PROCESSED.labels(source=source).inc(count)
+
+
+def record_cache_hits(source: str, count: int):
+    if count:
+        ANALYSIS_CACHE_HITS.labels(source=source).inc(count)
+
+
+def record_duplicates(source: str, count: int):
+    if count:
+        DOCUMENTS_DEDUPLICATED.labels(source=source).inc(count)
+
+
+def record_alerts(source: str, alerts: Iterable[Any]):
+    """Cuenta alertas por prioridad (modelos Alert o documentos ya serializados)"""
+    counts = {}
+    for alert in alerts:
+        priority = alert.get("priority") if isinstance(alert, dict) else alert.priority
+        counts[priority] = counts.get(priority, 0) + 1
+    for priority, count in counts.items():
+        ALERTS_EMITTED.labels(source=source, priority=priority).inc(count)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Listener de pymongo que registra la latencia de cada comando"""
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.labels(command=event.command_name, status="ok").observe(
+            event.duration_micros / 1e6
+        )
+    
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.labels(command=event.command_name, status="error").observe(
+            event.duration_micros / 1e6
+        )
+
+
+class _PoolStats:
+    __slots__ = ("open", "in_use", "waiting", "checkouts", "checkout_failures",
+                 "wait_total", "wait_max", "cleared")
+    
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.cleared = 0
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Listener de pymongo con el estado de cada pool de conexiones (por servidor):
+    conexiones abiertas y en uso, pedidos esperando conexión, checkouts
+    fallidos y tiempo de espera. Los eventos llegan desde los threads del
+    driver, así que los contadores se actualizan con un lock.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, _PoolStats] = {}
+    
+    def _stats(self, address) -> _PoolStats:
+        key = f"{address[0]}:{address[1]}"
+        stats = self._pools.get(key)
+        if stats is None:
+            stats = self._pools[key] = _PoolStats()
+        return stats
+    
+    def _publish(self, address, stats: _PoolStats):
+        key = f"{address[0]}:{address[1]}"
+        MONGO_POOL_CONNECTIONS.labels(address=key, state="open").set(stats.open)
+        MONGO_POOL_CONNECTIONS.labels(address=key, state="in_use").set(stats.in_use)
+        MONGO_POOL_CONNECTIONS.labels(address=key, state="waiting").set(stats.waiting)
+    
+    def pool_created(self, event):
+        with self._lock:
+            self._stats(event.address)
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self._stats(event.address).cleared += 1
+    
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+    
+    def connection_created(self, event):
+        with self._lock:
+            stats = self._stats(event.address)
+            stats.open += 1
+            self._publish(event.address, stats)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self._lock:
+            stats = self._stats(event.address)
+            stats.open = max(0, stats.open - 1)
+            self._publish(event.address, stats)
+    
+    def connection_check_out_started(self, event):
+        with self._lock:
+            stats = self._stats(event.address)
+            stats.waiting += 1
+            self._publish(event.address, stats)
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            stats = self._stats(event.address)
+            stats.waiting = max(0, stats.waiting - 1)
+            stats.checkout_failures += 1
+            self._publish(event.address, stats)
+    
+    def connection_checked_out(self, event):
+        wait = getattr(event, "duration", None) or 0.0
+        with self._lock:
+            stats = self._stats(event.address)
+            stats.waiting = max(0, stats.waiting - 1)
+            stats.in_use += 1
+            stats.checkouts += 1
+            stats.wait_total += wait
+            stats.wait_max = max(stats.wait_max, wait)
+            self._publish(event.address, stats)
+        MONGO_POOL_CHECKOUT_WAIT.labels(address=f"{event.address[0]}:{event.address[1]}").observe(wait)
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            stats = self._stats(event.address)
+            stats.in_use = max(0, stats.in_use - 1)
+            self._publish(event.address, stats)
+    
+    def snapshot(self) -> Dict[str, dict]:
+        """Estado actual de cada pool (para /health)"""
+        with self._lock:
+            return {
+                address: {
+                    "open": stats.open,
+                    "in_use": stats.in_use,
+                    "waiting": stats.waiting,
+                    "checkouts": stats.checkouts,
+                    "checkout_failures": stats.checkout_failures,
+                    "wait_avg_ms": round(stats.wait_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+                    "wait_max_ms": round(stats.wait_max * 1000, 3),
+                    "cleared": stats.cleared,
+                }
+                for address, stats in self._pools.items()
+            }
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide la latencia de cada request, etiquetada con la ruta (no con la URL,
+    para acotar la cardinalidad). Es middleware ASGI puro: el tiempo corre
+    hasta el último fragmento del cuerpo, así que las respuestas en streaming
+    (NDJSON, SSE) cuentan toda su duración y no solo hasta los headers. Las
+    conexiones WebSocket se miden de la apertura al cierre, con el código de
+    cierre como status.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        websocket = scope["type"] == "websocket"
+        status = "1006" if websocket else "500"  # Si termina sin respuesta ni cierre
+        observed = False
+        
+        def observe():
+            nonlocal observed
+            if observed:
+                return
+            observed = True
+            route = scope.get("route")
+            endpoint = route.path if route is not None else "desconocido"
+            REQUEST_DURATION.labels(
+                method="WEBSOCKET" if websocket else scope["method"], endpoint=endpoint, status=status
+            ).observe(time.perf_counter() - start)
+        
+        async def receive_wrapper() -> Message:
+            nonlocal status
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                status = str(message.get("code", 1000))
+            return message
+        
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "websocket.close":
+                status = str(message.get("code", 1000))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+        
+        try:
+            await self.app(scope, receive_wrapper if websocket else receive, send_wrapper)
+        finally:
+            # Errores, clientes que cortan un streaming y cierres de WebSocket
+            observe()
+
+
+def metrics_response() -> Response:
+    """Respuesta con todas las métricas en el formato de exposición de Prometheus"""
+    if MULTIPROC_DIR:
+        # Suma de los valores de todos los procesos
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead():
+    """Descarta los gauges de este proceso en modo multi-proceso (al apagarse)"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -62,6 +62,10 @@ class Alert(BaseModel):
     keywords: Optional[List[str]] = Field(default_factory=list)
     metadata: Optional[dict] = Field(default_factory=dict)
     
+    # Medios / usuarios que publicaron la misma historia (ver dedup.py)
+    sources: Optional[List[str]] = None
+    source_count: Optional[int] = Field(None, alias="sourceCount")
+    
     class Config:
         populate_by_name = True
         json_encoders = {
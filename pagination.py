@@ -0,0 +1,63 @@
+"""
+Paginación por cursor (keyset) y respuestas en streaming para los endpoints de listado
+"""
+import base64
+import binascii
+import json
+from typing import AsyncIterator, List, Optional
+
+from fastapi.responses import Response, StreamingResponse
+
+
+class InvalidCursorError(ValueError):
+    """El token `after` no es un cursor válido"""
+
+
+def encode_cursor(values: dict) -> str:
+    """Codifica la posición de la última fila como token opaco"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """Decodifica un token generado por encode_cursor"""
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error) as e:
+        raise InvalidCursorError(f"Cursor inválido: {token}") from e
+    if not isinstance(values, dict):
+        raise InvalidCursorError(f"Cursor inválido: {token}")
+    return values
+
+
+async def _json_array_chunks(items: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield b"["
+    first = True
+    async for item in items:
+        if not first:
+            yield b","
+        yield item
+        first = False
+    yield b"]"
+
+
+async def _ndjson_chunks(items: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async for item in items:
+        yield item + b"\n"
+
+
+def json_array_response(items: AsyncIterator[bytes]) -> StreamingResponse:
+    """Arreglo JSON escrito a medida que el cursor de Motor entrega documentos ya serializados"""
+    return StreamingResponse(_json_array_chunks(items), media_type="application/json")
+
+
+def ndjson_response(items: AsyncIterator[bytes]) -> StreamingResponse:
+    """Un documento JSON por línea, escrito a medida que el cursor los entrega"""
+    return StreamingResponse(_ndjson_chunks(items), media_type="application/x-ndjson")
+
+
+def json_page_response(items: List[bytes], next_cursor: Optional[str]) -> Response:
+    """Página como arreglo JSON; el cursor de la siguiente va en el header X-Next-Cursor"""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=b"[" + b",".join(items) + b"]", media_type="application/json", headers=headers)
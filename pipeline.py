@@ -0,0 +1,236 @@
+"""
+Pipeline asíncrono fetch → analyze → write para la generación de alertas.
+
+Las etapas corren en paralelo y se comunican con colas acotadas:
+- fetch: un productor por colección (news y tweets se leen en simultáneo)
+  que arma lotes a medida que el cursor entrega documentos
+- analyze: cada lote se analiza en un thread (o en el motor multi-proceso,
+  si está iniciado), fuera del event loop, para que /health y el resto de
+  los endpoints sigan respondiendo
+- write: las alertas se guardan por tandas a medida que llegan
+
+Antes de encolar un lote se descartan los documentos ya analizados
+(analysis_cache.py) y los casi duplicados de una historia ya vista
+(dedup.py), que solo suman un disparo a las alertas de su historia.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from analysis_cache import AnalysisCache, get_analysis_cache
+from analysis_engine import AnalysisEngine, analyze_documents, get_engine
+from dedup import StoryIndex, get_story_index
+from metrics import StageTimer, record_alerts, record_cache_hits, record_documents, record_duplicates
+from rules import get_active_rules
+from services import AlertService, CheckpointService
+
+
+# Marca de fin de cola
+_DONE = object()
+
+# Fuentes soportadas: iterador de documentos pendientes de cada una
+SOURCES = {
+    "news": AlertService.iter_news_to_process,
+    "tweets": AlertService.iter_tweets_to_process,
+}
+
+
+class AlertPipeline:
+    """Genera alertas solapando lectura, análisis y escritura"""
+    
+    def __init__(self, batch_size: int = 50, queue_size: int = 4, flush_size: int = 500,
+                 engine: Optional[AnalysisEngine] = None, cache: Optional[AnalysisCache] = None,
+                 stories: Optional[StoryIndex] = None):
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.flush_size = flush_size
+        # Con motor multi-proceso se analizan tantos lotes en paralelo como procesos tenga
+        self.engine = engine if engine is not None else get_engine()
+        self.concurrency = self.engine.workers if self.engine else 1
+        # Documentos ya analizados con el mismo contenido y reglas se omiten
+        self.cache = cache if cache is not None else get_analysis_cache()
+        # Casi duplicados de una historia ya analizada se suman a sus alertas
+        self.stories = stories if stories is not None else get_story_index()
+        self._processed: Dict[str, int] = {}
+        self._saved = 0
+        self._no_cache = False
+    
+    async def run(self, sources: List[str], full: bool = False, since: Optional[datetime] = None,
+                  no_cache: bool = False) -> dict:
+        """
+        Procesa las fuentes indicadas y retorna el mismo resumen que process_*_and_create_alerts.
+        Con `no_cache` se re-analizan también los documentos ya analizados (sus
+        claves se vuelven a registrar al guardar).
+        """
+        self._no_cache = no_cache
+        analyze_queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue = asyncio.Queue(maxsize=self.queue_size)
+        
+        self._next_seq = 0
+        self._processed = {source: 0 for source in sources}
+        self._last_ids: Dict[str, Any] = {}
+        self._alerts = {source: [] for source in sources}
+        self._saved = 0
+        self._timer = StageTimer()
+        
+        tasks = [
+            asyncio.create_task(self._fetch_all(sources, full, since, analyze_queue)),
+            asyncio.create_task(self._write(write_queue)),
+        ]
+        tasks += [
+            asyncio.create_task(self._analyze(analyze_queue, write_queue))
+            for _ in range(self.concurrency)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        # Avanzar las marcas de agua recién con todo guardado
+        for source, last_id in self._last_ids.items():
+            await CheckpointService.advance(source, last_id)
+        self._timer.observe()
+        
+        all_alerts = []
+        for source in sources:
+            all_alerts.extend(self._alerts[source])
+        
+        return {
+            "success": True,
+            "news_processed": self._processed.get("news", 0),
+            "tweets_processed": self._processed.get("tweets", 0),
+            "alerts_created": self._saved,
+            "alerts": all_alerts
+        }
+    
+    def progress(self) -> dict:
+        """Avance de la corrida en curso (documentos procesados y alertas guardadas hasta ahora)"""
+        return {
+            "news_processed": self._processed.get("news", 0),
+            "tweets_processed": self._processed.get("tweets", 0),
+            "alerts_created": self._saved
+        }
+    
+    async def _fetch_all(self, sources: List[str], full: bool, since: Optional[datetime], queue: asyncio.Queue):
+        """Lee todas las fuentes en simultáneo y cierra la cola al terminar"""
+        await asyncio.gather(*(self._fetch(source, full, since, queue) for source in sources))
+        for _ in range(self.concurrency):
+            await queue.put(_DONE)
+    
+    async def _fetch(self, source: str, full: bool, since: Optional[datetime], queue: asyncio.Queue):
+        """Arma lotes de documentos a medida que llegan del cursor"""
+        iter_documents = SOURCES[source]
+        
+        batch = []
+        # Tiempo esperando al cursor (sin contar la espera por la cola llena)
+        started = time.perf_counter()
+        async for document in iter_documents(full, since):
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                self._timer.add("fetch", time.perf_counter() - started)
+                await self._put_batch(queue, source, batch)
+                batch = []
+                started = time.perf_counter()
+        self._timer.add("fetch", time.perf_counter() - started)
+        
+        if batch:
+            await self._put_batch(queue, source, batch)
+    
+    async def _put_batch(self, queue: asyncio.Queue, source: str, batch: List[Any]):
+        # Una sola versión de reglas por lote
+        rules = get_active_rules()
+        
+        documents, keys = batch, []
+        if self.cache and self._no_cache:
+            keys = [self.cache.key(source, document, rules) for document in batch]
+        elif self.cache:
+            documents, keys, hits = await self.cache.split(source, batch, rules)
+            record_cache_hits(source, hits)
+        
+        signatures = []
+        if self.stories and documents:
+            signatures = await asyncio.to_thread(self.stories.signatures, source, documents)
+        
+        # Sin awaits desde acá hasta asignar el número de secuencia: los lotes
+        # se agrupan en historias en el mismo orden en que se escriben
+        members = []
+        if self.stories and documents:
+            documents, members = self.stories.split(source, documents, signatures, rules.version)
+            record_duplicates(source, len(members))
+        
+        # Número de secuencia para escribir los resultados en el orden de lectura
+        seq = self._next_seq
+        self._next_seq += 1
+        await queue.put((seq, source, batch, documents, keys, members, rules))
+    
+    async def _analyze(self, analyze_queue: asyncio.Queue, write_queue: asyncio.Queue):
+        """Analiza cada lote fuera del event loop (thread o proceso worker)"""
+        while True:
+            item = await analyze_queue.get()
+            if item is _DONE:
+                await write_queue.put(_DONE)
+                return
+            
+            seq, source, documents, pending, keys, members, rules = item
+            
+            started = time.perf_counter()
+            if not pending:
+                alerts = []
+            elif self.engine:
+                alerts = await self.engine.analyze(source, pending, rules)
+            else:
+                alerts = await asyncio.to_thread(analyze_documents, source, pending, rules.spec)
+            self._timer.add("analyze", time.perf_counter() - started)
+            record_documents(source, len(pending))
+            record_alerts(source, alerts)
+            
+            self._processed[source] += len(documents)
+            last_id = CheckpointService.max_source_id(documents)
+            if last_id is not None:
+                current = self._last_ids.get(source)
+                self._last_ids[source] = last_id if current is None else max(current, last_id)
+            
+            await write_queue.put((seq, source, pending, alerts, keys, members))
+    
+    async def _write(self, queue: asyncio.Queue):
+        """Guarda las alertas por tandas de flush_size, en el orden en que se leyeron los lotes"""
+        pending = []
+        pending_keys = []
+        ready = {}
+        next_seq = 0
+        finished = 0
+        
+        while finished < self.concurrency:
+            item = await queue.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            
+            seq, source, documents, alerts, keys, members = item
+            ready[seq] = (source, documents, alerts, keys, members)
+            while next_seq in ready:
+                source, documents, alerts, keys, members = ready.pop(next_seq)
+                next_seq += 1
+                self._alerts[source].extend(alerts)
+                if self.stories:
+                    alerts = self.stories.resolve(source, documents, alerts, members)
+                pending.extend(alerts)
+                pending_keys.extend(keys)
+            
+            if len(pending) >= self.flush_size:
+                await self._flush(pending, pending_keys)
+                pending, pending_keys = [], []
+        
+        await self._flush(pending, pending_keys)
+    
+    async def _flush(self, alerts: List[dict], keys: List[Optional[str]]):
+        if alerts:
+            started = time.perf_counter()
+            self._saved += await AlertService.save_alert_documents(alerts)
+            self._timer.add("save", time.perf_counter() - started)
+        
+        # Recién con las alertas guardadas los documentos cuentan como analizados
+        if self.cache and keys:
+            await self.cache.add(keys)
@@ -0,0 +1,198 @@
+"""
+Reglas de scoring versionadas y recargables en caliente.
+
+Cada versión es un documento de la colección `rules`:
+
+    {"_id": 3, "version": 3, "active": true,
+     "keyword_patterns": {...}, "magnitude_words": {...},
+     "thresholds": {...}, "market_hours_factor": 0.8, "createdAt": ...}
+
+La versión activa es la de mayor número con `active: true`; sin ninguna se
+usan las reglas del código (versión 0). Cada proceso compila la versión
+activa en su propio matcher una sola vez y la reemplaza de forma atómica
+cuando RulesWatcher detecta una versión nueva: los análisis en curso
+terminan con el RuleSet que tomaron al empezar.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from alert_utils import (
+    ALERT_THRESHOLDS, KEYWORD_PATTERNS, MAGNITUDE_WORDS, MARKET_HOURS_THRESHOLD_FACTOR,
+    DocumentFeatures, KeywordMatcher, should_create_alert
+)
+from config import settings
+
+
+class RuleSet:
+    """Una versión de las reglas, compilada"""
+    
+    def __init__(self, version: int, keyword_patterns: Dict, magnitude_words: Dict[str, float],
+                 thresholds: Optional[Dict[str, float]] = None,
+                 market_hours_factor: float = MARKET_HOURS_THRESHOLD_FACTOR):
+        self.version = version
+        self.thresholds = dict(thresholds if thresholds is not None else ALERT_THRESHOLDS)
+        self.market_hours_factor = market_hours_factor
+        self.matcher = KeywordMatcher(keyword_patterns, magnitude_words)
+        # Especificación serializable (para los procesos del motor de análisis)
+        self.spec = {
+            "version": version,
+            "keyword_patterns": keyword_patterns,
+            "magnitude_words": magnitude_words,
+            "thresholds": self.thresholds,
+            "market_hours_factor": market_hours_factor,
+        }
+    
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> 'RuleSet':
+        """Compila un documento de la colección `rules` (ValueError si es inválido)"""
+        try:
+            # Se guardan los valores normalizados, no los del pedido: un "0.9"
+            # como string pasaría la validación y fallaría en cada análisis
+            keyword_patterns = {}
+            for priority, keywords in spec["keyword_patterns"].items():
+                if not isinstance(keywords, dict):
+                    raise ValueError(f"palabras clave inválidas en {priority}")
+                keyword_patterns[priority] = {}
+                for keyword, info in keywords.items():
+                    context = info.get("context", [])
+                    if not isinstance(context, list) or not all(isinstance(term, str) for term in context):
+                        raise ValueError(f"contexto inválido en {priority}.{keyword} (debe ser una lista de textos)")
+                    keyword_patterns[priority][keyword] = {
+                        **info, "weight": float(info.get("weight", 0.5)), "context": context
+                    }
+            magnitude_words = {word: float(value) for word, value in spec.get("magnitude_words", {}).items()}
+            thresholds = {priority: float(value) for priority, value in spec.get("thresholds", ALERT_THRESHOLDS).items()}
+            return cls(
+                int(spec["version"]), keyword_patterns, magnitude_words, thresholds,
+                float(spec.get("market_hours_factor", MARKET_HOURS_THRESHOLD_FACTOR))
+            )
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            raise ValueError(f"Reglas inválidas: {e}") from e
+    
+    def find_best_keywords(self, features: DocumentFeatures) -> Dict[str, Tuple[str, float]]:
+        return self.matcher.best_keywords(features)
+    
+    def should_create_alert(self, score: float, priority: str, during_market_hours: bool = False) -> bool:
+        return should_create_alert(
+            score, priority, during_market_hours, self.thresholds, self.market_hours_factor
+        )
+
+
+# Reglas del código: versión 0
+DEFAULT_RULES = RuleSet(0, KEYWORD_PATTERNS, MAGNITUDE_WORDS)
+
+_active: RuleSet = DEFAULT_RULES
+
+
+def get_active_rules() -> RuleSet:
+    """RuleSet activo del proceso (tomarlo una vez por lote/documento)"""
+    return _active
+
+
+def set_active_rules(rules: RuleSet):
+    """Reemplaza el RuleSet activo"""
+    global _active
+    _active = rules
+
+
+async def _active_version() -> int:
+    from database import get_database
+    
+    db = await get_database()
+    doc = await db["rules"].find_one({"active": True}, {"version": 1}, sort=[("version", -1)])
+    return doc["version"] if doc else 0
+
+
+async def load_active_rules() -> RuleSet:
+    """Compila y activa la versión activa de la colección `rules` si cambió"""
+    from database import get_database
+    
+    version = await _active_version()
+    current = get_active_rules()
+    if version == current.version:
+        return current
+    
+    if version == 0:
+        rules = DEFAULT_RULES
+    else:
+        db = await get_database()
+        spec = await db["rules"].find_one({"_id": version})
+        # La compilación es CPU: fuera del event loop
+        rules = await asyncio.to_thread(RuleSet.from_spec, spec)
+    
+    set_active_rules(rules)
+    print(f"✓ Reglas activas: versión {rules.version}")
+    return rules
+
+
+async def publish_rules(spec: Dict[str, Any], activate: bool = True) -> int:
+    """Guarda una nueva versión de reglas (validada) y retorna su número"""
+    from database import get_database
+    
+    db = await get_database()
+    while True:
+        last = await db["rules"].find_one({}, {"version": 1}, sort=[("version", -1)])
+        version = (last["version"] if last else 0) + 1
+        # Valida antes de guardar
+        rules = RuleSet.from_spec({**spec, "version": version})
+        document = {**rules.spec, "_id": version, "active": activate, "createdAt": datetime.utcnow()}
+        try:
+            await db["rules"].insert_one(document)
+            return version
+        except DuplicateKeyError:
+            # Otra publicación tomó el mismo número
+            continue
+
+
+async def set_rules_active(version: int, active: bool) -> bool:
+    """Activa o desactiva una versión (desactivar la vigente vuelve a la anterior)"""
+    from database import get_database
+    
+    db = await get_database()
+    result = await db["rules"].update_one({"_id": version}, {"$set": {"active": active}})
+    return result.matched_count > 0
+
+
+async def list_rules() -> List[dict]:
+    """Versiones guardadas (sin el contenido de las reglas)"""
+    from database import get_database
+    
+    db = await get_database()
+    cursor = db["rules"].find({}, {"version": 1, "active": 1, "createdAt": 1}).sort("version", -1)
+    return [{"version": doc["version"], "active": doc.get("active", False), "createdAt": doc.get("createdAt")}
+            async for doc in cursor]
+
+
+class RulesWatcher:
+    """Consulta periódicamente la versión activa y recompila cuando cambia"""
+    
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else settings.rules_poll_seconds
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await load_active_rules()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Reglas inválidas o Mongo caído: se mantienen las actuales
+                print(f"✗ No se pudieron recargar las reglas: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,169 @@
+"""
+Generación periódica de alertas con elección de líder.
+
+Reemplaza al cron externo que llama a POST /alerts/generate: cada worker de
+uvicorn, en todos los contenedores, corre un AlertScheduler, pero solo el que
+tiene el lease de la colección `locks` ejecuta la generación. El lease es un
+documento con dueño y vencimiento; el líder lo renueva en cada tick y
+mientras dura la corrida. Si el líder muere, el lease vence y el primer
+worker que lo encuentre vencido toma el lugar.
+
+El lease debe durar más que el intervalo más el jitter (si no, el liderazgo
+rota entre workers, aunque cada tick lo sigue corriendo uno solo). Los
+relojes de los contenedores deben estar sincronizados con una tolerancia
+bastante menor que la duración del lease.
+
+El mismo mecanismo (Lease) elige el único proceso que consume los change
+streams de stream_worker.py.
+"""
+import asyncio
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import settings
+from database import get_database
+from services import AlertService
+
+
+LOCK_NAME = "alert-scheduler"
+
+
+class Lease:
+    """
+    Lease de la colección `locks`: un documento con dueño y vencimiento que
+    solo un proceso puede tener a la vez (lo usan el scheduler y el stream
+    worker). El dueño lo renueva antes de que venza.
+    """
+    
+    def __init__(self, name: str, duration: float, label: str):
+        self.name = name
+        self.duration = duration
+        self.label = label
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.held = False
+    
+    async def acquire(self) -> bool:
+        """Toma o renueva el lease; False si lo tiene otro proceso"""
+        db = await get_database()
+        now = datetime.utcnow()
+        try:
+            await db["locks"].find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expiresAt": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expiresAt": now + timedelta(seconds=self.duration)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # El documento existe con otro dueño y sin vencer: el upsert choca con su _id
+            if self.held:
+                print(f"✗ {self.label}: {self.owner} perdió el liderazgo")
+            self.held = False
+            return False
+        
+        if not self.held:
+            print(f"✓ {self.label}: {self.owner} es el líder")
+        self.held = True
+        return True
+    
+    async def release(self):
+        """Libera el lease para que otro proceso lo tome sin esperar el vencimiento"""
+        try:
+            db = await get_database()
+            await db["locks"].update_one(
+                {"_id": self.name, "owner": self.owner},
+                {"$set": {"expiresAt": datetime.utcnow()}}
+            )
+        except Exception as e:
+            print(f"✗ {self.label}: no se pudo liberar el lease: {e}")
+        self.held = False
+
+
+class AlertScheduler:
+    """Corre la generación de alertas cada `interval` (+ jitter) en un solo worker"""
+    
+    def __init__(self, interval: Optional[float] = None, jitter: Optional[float] = None,
+                 lease: Optional[float] = None, name: str = LOCK_NAME):
+        self.interval = interval if interval is not None else settings.scheduler_interval_seconds
+        self.jitter = jitter if jitter is not None else settings.scheduler_jitter_seconds
+        self.lease = lease if lease is not None else settings.scheduler_lease_seconds
+        self.name = name
+        self._lease = Lease(name, self.lease, "Scheduler")
+        self.owner = self._lease.owner
+        self.last_run: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def is_leader(self) -> bool:
+        return self._lease.held
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"✓ Scheduler de alertas iniciado ({self.owner}, cada {self.interval:g}s)")
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._release()
+    
+    def status(self) -> dict:
+        return {"owner": self.owner, "leader": self.is_leader, "last_run": self.last_run}
+    
+    async def _acquire(self) -> bool:
+        """Toma o renueva el lease; False si lo tiene otro worker"""
+        return await self._lease.acquire()
+    
+    async def _release(self):
+        await self._lease.release()
+    
+    async def _run(self):
+        while True:
+            try:
+                if await self._acquire():
+                    await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"✗ Error en el scheduler de alertas: {e}")
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+    
+    async def _tick(self):
+        """Una corrida de generación, renovando el lease mientras dura"""
+        started = datetime.utcnow()
+        run = asyncio.create_task(AlertService.process_all_and_create_alerts())
+        try:
+            while not run.done():
+                await asyncio.wait({run}, timeout=self.lease / 3)
+                if not run.done() and not await self._acquire():
+                    # Otro worker tomó el lease: no puede haber dos corridas a la vez
+                    run.cancel()
+                    return
+            result = run.result()
+        finally:
+            if not run.done():
+                run.cancel()
+        
+        self.last_run = {
+            "started_at": started,
+            "finished_at": datetime.utcnow(),
+            "news_processed": result["news_processed"],
+            "tweets_processed": result["tweets_processed"],
+            "alerts_created": result["alerts_created"],
+        }
+        print(
+            f"✓ Generación programada: {result['news_processed']} noticias, "
+            f"{result['tweets_processed']} tweets, {result['alerts_created']} alertas"
+        )
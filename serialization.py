@@ -0,0 +1,114 @@
+"""
+Serialización de documentos de lectura confiables.
+
+Los documentos de `news`, `tweets` y `alerts` los escribe este servicio (o
+sus colectores), así que en los endpoints de lectura se proyectan solo los
+campos del modelo y se convierten directo de BSON a JSON (con orjson), sin
+validarlos con Pydantic. Las escrituras siguen pasando por los modelos.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, List, Tuple
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa a JSON compacto con orjson (ObjectId y datetime incluidos)"""
+    return orjson.dumps(value, default=_json_default)
+
+
+class ORJSONResponse(JSONResponse):
+    """Respuesta JSON serializada con orjson (clase por defecto de la API)"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class DocumentShape:
+    """
+    Forma JSON de un modelo: claves (por alias), en el orden del modelo,
+    con sus valores por defecto para los campos ausentes en el documento
+    """
+    
+    def __init__(self, model: type[BaseModel]):
+        self.fields: List[Tuple[str, Callable[[], Any]]] = []
+        for name, field in model.model_fields.items():
+            key = field.alias or name
+            if field.default_factory is not None:
+                default = field.default_factory
+            elif field.default is PydanticUndefined:
+                default = _none
+            else:
+                default = _constant(field.default)
+            self.fields.append((key, default))
+        
+        # Proyección para traer de Mongo solo los campos del modelo
+        self.projection = {key: 1 for key, _ in self.fields}
+    
+    def to_dict(self, doc: dict) -> dict:
+        """Documento de Mongo con la misma forma que el modelo serializado por alias"""
+        return {key: doc[key] if key in doc else default() for key, default in self.fields}
+    
+    def encode(self, doc: dict) -> bytes:
+        """Documento de Mongo serializado a JSON"""
+        return dumps(self.to_dict(doc))
+
+
+def _none() -> None:
+    return None
+
+
+def _constant(value: Any) -> Callable[[], Any]:
+    return lambda: value
+
+
+class CachedDocumentEncoder:
+    """
+    Cache LRU de documentos ya serializados.
+    
+    Cada entrada se guarda por _id junto con el valor de `version_field`
+    (p. ej. lastTriggered); mientras el documento no cambie se reutilizan
+    los bytes en lugar de volver a serializarlo.
+    """
+    
+    def __init__(self, shape: DocumentShape, version_field: str, max_entries: int = 20000):
+        self.shape = shape
+        self.projection = shape.projection
+        self.version_field = version_field
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, Tuple[Any, bytes]]" = OrderedDict()
+    
+    def encode(self, doc: dict) -> bytes:
+        """Documento serializado, desde la cache si su versión no cambió"""
+        if self.max_entries <= 0:
+            return self.shape.encode(doc)
+        
+        key = doc.get("_id")
+        version = doc.get(self.version_field)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            return entry[1]
+        
+        encoded = self.shape.encode(doc)
+        self._entries[key] = (version, encoded)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return encoded
+    
+    def clear(self):
+        self._entries.clear()
@@ -1,13 +1,17 @@
-from typing import List
-from datetime import datetime, timedelta
+import math
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from models import News, Tweet, Alert
-from database import get_database
-import re
-from alert_utils import (
-    extract_tickers, extract_percentages, calculate_relevance_score,
-    find_best_keyword, should_create_alert, is_market_hours,
-    KEYWORD_PATTERNS, extract_money_amounts
-)
+from database import alert_write_concern, get_database, get_list_database
+from pagination import InvalidCursorError, decode_cursor, encode_cursor
+from serialization import CachedDocumentEncoder, DocumentShape
+from config import settings
+from alert_utils import DocumentFeatures
+from broadcast import get_broadcaster
+from rules import RuleSet, get_active_rules
 
 
 class NewsService:
@@ -16,41 +20,41 @@ class NewsService:
     @staticmethod
     async def get_all_news() -> List[News]:
         """Obtiene todas las noticias de la colección news"""
-        db = await get_database()
-        news_collection = db["news"]
-        
-        news_list = []
-        async for news_doc in news_collection.find():
-            if "_id" in news_doc:
-                news_doc["_id"] = str(news_doc["_id"])
-            news_list.append(News(**news_doc))
-        
-        return news_list
+        return [news async for news in NewsService.iter_news()]
     
     @staticmethod
-    async def get_recent_news(limit: int = 50, hours: int = 168) -> List[News]:
-        """Obtiene las noticias más recientes (por _id si no hay fecha)"""
-        db = await get_database()
-        news_collection = db["news"]
-        
-        cutoff_date = datetime.utcnow() - timedelta(hours=hours)
-        
-        news_list = []
+    def iter_news(after: Optional[str] = None, limit: Optional[int] = None) -> AsyncIterator[News]:
+        """Recorre las noticias en orden de _id, a partir del cursor `after`"""
+        return _iter_models("news", _id_keyset_query(after), [("_id", 1)], limit, News)
+    
+    @staticmethod
+    def iter_news_json(after: Optional[str] = None, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Noticias serializadas a JSON directo desde BSON (lectura confiable, sin validación)"""
+        return _iter_json("news", _id_keyset_query(after), [("_id", 1)], limit, NEWS_SHAPE)
+    
+    @staticmethod
+    async def get_news_page_json(limit: int, after: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]:
+        """Página de noticias en JSON y cursor de la siguiente (None si es la última)"""
+        return await _json_page("news", _id_keyset_query(after), [("_id", 1)], limit, NEWS_SHAPE, _id_position)
+    
+    @staticmethod
+    async def get_recent_news(limit: int = 50, hours: int = 168, after_id: Any = None) -> List[News]:
+        """
+        Obtiene las noticias más recientes (por _id si no hay fecha).
+        Con after_id retorna solo las posteriores a ese _id, de la más antigua a la más nueva.
+        """
+        return [item async for item in NewsService.iter_recent_news(limit, hours, after_id)]
+    
+    @staticmethod
+    def iter_recent_news(limit: int = 50, hours: int = 168, after_id: Any = None) -> AsyncIterator[News]:
+        """Noticias recientes a medida que las entrega el cursor (ver get_recent_news)"""
         # Buscar noticias con fecha válida O sin fecha (null)
-        cursor = news_collection.find({
-            "$or": [
-                {"published_date": {"$gte": cutoff_date}},
-                {"published_date": None},
-                {"published_date": {"$exists": False}}
-            ]
-        }).sort("_id", -1).limit(limit)
-        
-        async for news_doc in cursor:
-            if "_id" in news_doc:
-                news_doc["_id"] = str(news_doc["_id"])
-            news_list.append(News(**news_doc))
+        query = recent_query("published_date", hours)
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+            return _iter_models("news", query, [("_id", 1)], limit, News)
         
-        return news_list
+        return _iter_models("news", query, [("_id", -1)], limit, News)
 
 
 class TweetService:
@@ -59,62 +63,313 @@ class TweetService:
     @staticmethod
     async def get_all_tweets() -> List[Tweet]:
         """Obtiene todos los tweets de la colección tweets"""
-        db = await get_database()
-        tweets_collection = db["tweets"]
-        
-        tweets_list = []
-        async for tweet_doc in tweets_collection.find():
-            if "_id" in tweet_doc:
-                tweet_doc["_id"] = str(tweet_doc["_id"])
-            tweets_list.append(Tweet(**tweet_doc))
-        
-        return tweets_list
+        return [tweet async for tweet in TweetService.iter_tweets()]
     
     @staticmethod
-    async def get_recent_tweets(limit: int = 100, hours: int = 72) -> List[Tweet]:
-        """Obtiene los tweets más recientes (por _id si no hay fecha)"""
-        db = await get_database()
-        tweets_collection = db["tweets"]
-        
-        cutoff_date = datetime.utcnow() - timedelta(hours=hours)
-        
-        tweets_list = []
+    def iter_tweets(after: Optional[str] = None, limit: Optional[int] = None) -> AsyncIterator[Tweet]:
+        """Recorre los tweets en orden de _id, a partir del cursor `after`"""
+        return _iter_models("tweets", _id_keyset_query(after), [("_id", 1)], limit, Tweet)
+    
+    @staticmethod
+    def iter_tweets_json(after: Optional[str] = None, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Tweets serializados a JSON directo desde BSON (lectura confiable, sin validación)"""
+        return _iter_json("tweets", _id_keyset_query(after), [("_id", 1)], limit, TWEET_SHAPE)
+    
+    @staticmethod
+    async def get_tweets_page_json(limit: int, after: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]:
+        """Página de tweets en JSON y cursor de la siguiente (None si es la última)"""
+        return await _json_page("tweets", _id_keyset_query(after), [("_id", 1)], limit, TWEET_SHAPE, _id_position)
+    
+    @staticmethod
+    async def get_recent_tweets(limit: int = 100, hours: int = 72, after_id: Any = None) -> List[Tweet]:
+        """
+        Obtiene los tweets más recientes (por _id si no hay fecha).
+        Con after_id retorna solo los posteriores a ese _id, del más antiguo al más nuevo.
+        """
+        return [item async for item in TweetService.iter_recent_tweets(limit, hours, after_id)]
+    
+    @staticmethod
+    def iter_recent_tweets(limit: int = 100, hours: int = 72, after_id: Any = None) -> AsyncIterator[Tweet]:
+        """Tweets recientes a medida que los entrega el cursor (ver get_recent_tweets)"""
         # Buscar tweets con fecha válida O sin fecha (null)
-        cursor = tweets_collection.find({
-            "$or": [
-                {"created_at": {"$gte": cutoff_date}},
-                {"created_at": None},
-                {"created_at": {"$exists": False}}
-            ]
-        }).sort("_id", -1).limit(limit)
+        query = recent_query("created_at", hours)
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+            return _iter_models("tweets", query, [("_id", 1)], limit, Tweet)
         
-        async for tweet_doc in cursor:
-            if "_id" in tweet_doc:
-                tweet_doc["_id"] = str(tweet_doc["_id"])
-            tweets_list.append(Tweet(**tweet_doc))
+        return _iter_models("tweets", query, [("_id", -1)], limit, Tweet)
+
+
+class CounterService:
+    """Contadores de versión por colección (colección `counters`)"""
+    
+    @staticmethod
+    async def get_version(name: str, for_list: bool = False) -> str:
+        """
+        Versión actual de la colección `name`, como "<época>.<contador>".
+        La época se genera al crear el contador, así que borrarlo nunca
+        repite una versión ya entregada. Con `for_list` se lee con la misma
+        preferencia de lectura que los listados, para que la versión no
+        quede adelantada respecto de los datos que se van a servir.
+        """
+        db = await (get_list_database() if for_list else get_database())
+        counter = await db["counters"].find_one({"_id": name})
+        if counter is None:
+            db = await get_database()
+            counter = await db["counters"].find_one_and_update(
+                {"_id": name},
+                {"$setOnInsert": {"version": 0, "epoch": str(ObjectId())}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        return f"{counter['epoch']}.{counter['version']}"
+    
+    @staticmethod
+    async def bump(name: str):
+        """Incrementa la versión de la colección `name` (después de modificarla)"""
+        db = await get_database()
+        await db["counters"].update_one(
+            {"_id": name},
+            {
+                "$inc": {"version": 1},
+                "$set": {"updatedAt": datetime.utcnow()},
+                "$setOnInsert": {"epoch": str(ObjectId())}
+            },
+            upsert=True
+        )
+
+
+class CheckpointService:
+    """Marcas de agua (último _id procesado) por colección de origen"""
+    
+    @staticmethod
+    async def get_last_id(name: str) -> Any:
+        """Retorna el último _id procesado para la colección, o None si nunca se procesó"""
+        db = await get_database()
+        checkpoint = await db["checkpoints"].find_one({"_id": name})
+        return checkpoint.get("last_id") if checkpoint else None
+    
+    @staticmethod
+    async def advance(name: str, last_id: Any):
+        """Avanza la marca de agua (nunca retrocede)"""
+        if last_id is None:
+            return
         
-        return tweets_list
+        db = await get_database()
+        await db["checkpoints"].update_one(
+            {"_id": name},
+            {
+                "$max": {"last_id": last_id},
+                "$set": {"updatedAt": datetime.utcnow()}
+            },
+            upsert=True
+        )
+    
+    @staticmethod
+    async def resolve_after_id(name: str, full: bool = False, since: Optional[datetime] = None) -> Any:
+        """
+        Determina desde qué _id procesar:
+        - full=True: sin límite inferior (re-escanea la ventana reciente completa)
+        - since: documentos insertados desde esa fecha
+        - por defecto: posteriores a la marca de agua guardada
+        """
+        if full:
+            return None
+        if since is not None:
+            return ObjectId.from_datetime(since)
+        return await CheckpointService.get_last_id(name)
+    
+    @staticmethod
+    async def reset(name: str):
+        """Borra la marca de agua (el próximo recorrido empieza desde el principio)"""
+        db = await get_database()
+        await db["checkpoints"].delete_one({"_id": name})
+    
+    @staticmethod
+    async def get_resume_token(name: str) -> Optional[dict]:
+        """Retorna el resume token guardado del change stream de la colección"""
+        db = await get_database()
+        checkpoint = await db["checkpoints"].find_one({"_id": f"stream:{name}"})
+        return checkpoint.get("resume_token") if checkpoint else None
+    
+    @staticmethod
+    async def save_resume_token(name: str, resume_token: Optional[dict]):
+        """Guarda (o borra, con None) el resume token del change stream de la colección"""
+        db = await get_database()
+        await db["checkpoints"].update_one(
+            {"_id": f"stream:{name}"},
+            {"$set": {"resume_token": resume_token, "updatedAt": datetime.utcnow()}},
+            upsert=True
+        )
+    
+    @staticmethod
+    def max_source_id(documents: List[Any]) -> Any:
+        """Mayor _id (como ObjectId si es posible) entre los documentos procesados"""
+        ids = [to_object_id(doc.id) for doc in documents if doc.id]
+        return max(ids) if ids else None
+
+
+def recent_query(date_field: str, hours: int) -> dict:
+    """
+    Filtro de la ventana reciente: fecha dentro de las últimas `hours` horas o
+    sin fecha. La igualdad con None también coincide con el campo ausente, así
+    que alcanzan dos ramas (ambas servidas por el índice (date_field, _id)).
+    """
+    cutoff_date = datetime.utcnow() - timedelta(hours=hours)
+    return {
+        "$or": [
+            {date_field: {"$gte": cutoff_date}},
+            {date_field: None}
+        ]
+    }
+
+
+def to_object_id(value: Any) -> Any:
+    """Convierte un _id serializado como str de vuelta a ObjectId cuando es válido"""
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+# Formas JSON de los modelos para las lecturas confiables
+NEWS_SHAPE = DocumentShape(News)
+TWEET_SHAPE = DocumentShape(Tweet)
+ALERT_SHAPE = DocumentShape(Alert)
+
+# Las alertas casi no cambian después de creadas: se cachean ya serializadas
+# (clave _id + lastTriggered, que save_alerts actualiza en cada cambio)
+ALERT_ENCODER = CachedDocumentEncoder(ALERT_SHAPE, "lastTriggered", settings.encoded_alert_cache_size)
+
+DocumentEncoder = Union[DocumentShape, CachedDocumentEncoder]
+
+# Orden de las alertas: más nuevas primero (con _id para desempatar)
+ALERTS_SORT = [("createdAt", -1), ("_id", -1)]
+
+# Medios / usuarios que se guardan por alerta (sourceCount sigue contando los demás)
+MAX_ALERT_SOURCES = 50
+
+
+async def _iter_documents(collection_name: str, query: dict, sort: List[Tuple[str, int]],
+                          limit: Optional[int], projection: Optional[dict] = None,
+                          for_list: bool = False) -> AsyncIterator[dict]:
+    """
+    Recorre los documentos de un cursor a medida que llegan. Con `for_list`
+    se lee con la preferencia de lectura de los listados de la API.
+    """
+    db = await (get_list_database() if for_list else get_database())
+    cursor = db[collection_name].find(query, projection).sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    
+    async for doc in cursor:
+        yield doc
+
+
+async def _iter_models(collection_name: str, query: dict, sort: List[Tuple[str, int]],
+                       limit: Optional[int], model: Callable[..., Any]) -> AsyncIterator[Any]:
+    """Convierte los documentos de un cursor en modelos a medida que llegan"""
+    async for doc in _iter_documents(collection_name, query, sort, limit):
+        if "_id" in doc:
+            doc["_id"] = str(doc["_id"])
+        yield model(**doc)
+
+
+async def _iter_json(collection_name: str, query: dict, sort: List[Tuple[str, int]],
+                     limit: Optional[int], shape: DocumentEncoder) -> AsyncIterator[bytes]:
+    """Serializa los documentos de un cursor a JSON a medida que llegan"""
+    async for doc in _iter_documents(collection_name, query, sort, limit, shape.projection, for_list=True):
+        yield shape.encode(doc)
+
+
+async def _json_page(collection_name: str, query: dict, sort: List[Tuple[str, int]], limit: int,
+                     shape: DocumentEncoder, position: Callable[[dict], dict]) -> Tuple[List[bytes], Optional[str]]:
+    """
+    Página de documentos en JSON. Se pide uno de más para saber si hay
+    página siguiente; el cursor apunta al último documento devuelto.
+    """
+    docs = [
+        doc async for doc in _iter_documents(collection_name, query, sort, limit + 1, shape.projection, for_list=True)
+    ]
+    
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(position(docs[-1]))
+    
+    return [shape.encode(doc) for doc in docs], next_cursor
+
+
+def _id_position(doc: dict) -> dict:
+    return {"id": str(doc["_id"])}
+
+
+def _alert_position(doc: dict) -> dict:
+    return {"createdAt": doc["createdAt"].isoformat(), "id": str(doc["_id"])}
+
+
+def _id_keyset_query(after: Optional[str]) -> dict:
+    """Filtro para continuar un recorrido ordenado por _id desde el cursor `after`"""
+    if not after:
+        return {}
+    position = decode_cursor(after)
+    if "id" not in position:
+        raise InvalidCursorError(f"Cursor inválido: {after}")
+    return {"_id": {"$gt": to_object_id(position["id"])}}
+
+
+def _alert_keyset_query(after: Optional[str]) -> dict:
+    """Filtro para continuar el recorrido de alertas (createdAt, _id descendente) desde `after`"""
+    if not after:
+        return {}
+    position = decode_cursor(after)
+    created_at = _parse_cursor_datetime(position.get("createdAt"))
+    last_id = to_object_id(position.get("id"))
+    return {
+        "$or": [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "_id": {"$lt": last_id}}
+        ]
+    }
+
+
+def _parse_cursor_datetime(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Cursor inválido: fecha {value!r}") from e
+
+
+def _window_hours(hours: int, since: Optional[datetime]) -> int:
+    """Amplía la ventana temporal para cubrir un re-escaneo desde `since`"""
+    if since is None:
+        return hours
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    elapsed = datetime.utcnow() - since
+    return max(hours, math.ceil(elapsed.total_seconds() / 3600))
 
 
 class AlertService:
     """Servicio mejorado para generar y guardar alertas"""
     
     @staticmethod
-    def analyze_news_for_alerts(news: News) -> List[Alert]:
+    def analyze_news_for_alerts(news: News, features: Optional[DocumentFeatures] = None,
+                                rules: Optional[RuleSet] = None) -> List[Alert]:
         """
         Análisis mejorado de noticias con sistema de scoring
         Genera SOLO UNA alerta por noticia (la más relevante)
         """
         alerts = []
+        if rules is None:
+            rules = get_active_rules()
         
-        text_full = f"{news.title or ''} {news.content or ''}".lower()
-        text_title = (news.title or '').lower()
-        
-        # Extraer información relevante
-        tickers = extract_tickers(news.title or '')
-        percentages = extract_percentages(text_full)
-        money_amounts = extract_money_amounts(text_full)
-        during_market = is_market_hours()
+        # Extraer información relevante (una sola vez por documento)
+        if features is None:
+            features = DocumentFeatures.from_news(news, matcher=rules.matcher)
+        tickers = features.tickers
+        percentages = features.percentages
+        money_amounts = features.money_amounts
+        during_market = features.during_market_hours
         
         # Buscar LA MEJOR keyword (solo una)
         priorities = ['critical', 'high', 'medium', 'positive']
@@ -122,13 +377,14 @@ class AlertService:
         best_priority = None
         best_score = 0.0
         
+        best_by_priority = rules.find_best_keywords(features)
+        
         for priority in priorities:
-            keywords = KEYWORD_PATTERNS.get(priority, {})
-            result = find_best_keyword(text_full, keywords, priority)
+            result = best_by_priority.get(priority)
             
             if result:
                 keyword, score = result
-                if score > best_score and should_create_alert(score, priority, during_market):
+                if score > best_score and rules.should_create_alert(score, priority, during_market):
                     best_match = keyword
                     best_priority = priority
                     best_score = score
@@ -168,6 +424,7 @@ class AlertService:
                         "url": news.url,
                         "category": news.category,
                         "content_type": "news",
+                        "rule_version": rules.version,
                         "relevance_score": best_score,
                         "during_market_hours": during_market
                     }
@@ -208,6 +465,7 @@ class AlertService:
                         "url": news.url,
                         "category": news.category,
                         "content_type": "news",
+                        "rule_version": rules.version,
                         "relevance_score": best_score,
                         "during_market_hours": during_market
                     }
@@ -241,6 +499,7 @@ class AlertService:
                         "url": news.url,
                         "category": news.category,
                         "content_type": "news",
+                        "rule_version": rules.version,
                         "relevance_score": best_score
                     }
                 ))
@@ -276,6 +535,7 @@ class AlertService:
                         "url": news.url,
                         "category": news.category,
                         "content_type": "news",
+                        "rule_version": rules.version,
                         "relevance_score": best_score,
                         "during_market_hours": during_market
                     }
@@ -284,21 +544,21 @@ class AlertService:
         return alerts
     
     @staticmethod
-    def analyze_tweet_for_alerts(tweet: Tweet) -> List[Alert]:
+    def analyze_tweet_for_alerts(tweet: Tweet, features: Optional[DocumentFeatures] = None,
+                                 rules: Optional[RuleSet] = None) -> List[Alert]:
         """
         Análisis mejorado de tweets con sistema de scoring
         Genera SOLO UNA alerta por tweet (la más relevante)
         """
         alerts = []
+        if rules is None:
+            rules = get_active_rules()
         
-        text = (tweet.text or '').lower()
-        
-        # Detectar tickers con formato $TICKER
-        ticker_pattern = r'\$[A-Z]{2,5}'
-        tickers = re.findall(ticker_pattern, tweet.text or '')
-        
-        # Calcular métricas de engagement
-        engagement = (tweet.retweet_count or 0) + (tweet.like_count or 0) + (tweet.reply_count or 0)
+        # Tickers y engagement (una sola vez por documento)
+        if features is None:
+            features = DocumentFeatures.from_tweet(tweet, matcher=rules.matcher)
+        tickers = features.tickers
+        engagement = features.engagement
         
         # Umbrales de viralidad ajustados
         is_highly_viral = engagement > 500
@@ -306,8 +566,7 @@ class AlertService:
         is_significant = engagement > 50
         
         # Extraer información
-        percentages = extract_percentages(text)
-        during_market = is_market_hours()
+        during_market = features.during_market_hours
         
         # Buscar LA MEJOR keyword (solo una)
         priorities = ['critical', 'high', 'medium', 'positive']
@@ -315,9 +574,10 @@ class AlertService:
         best_priority = None
         best_score = 0.0
         
+        best_by_priority = rules.find_best_keywords(features)
+        
         for priority in priorities:
-            keywords = KEYWORD_PATTERNS.get(priority, {})
-            result = find_best_keyword(text, keywords, priority)
+            result = best_by_priority.get(priority)
             
             if result:
                 keyword, score = result
@@ -389,6 +649,7 @@ class AlertService:
                         "hashtags": tweet.hashtags,
                         "tickers": tickers,
                         "content_type": "tweet",
+                        "rule_version": rules.version,
                         "url": tweet.url,
                         "relevance_score": best_score,
                         "is_viral": is_viral,
@@ -405,143 +666,281 @@ class AlertService:
         if not alerts:
             return 0
         
-        db = await get_database()
-        alerts_collection = db["alerts"]
-        
-        modified_count = 0
+        documents = [AlertService.alert_to_document(alert) for alert in alerts]
+        return await AlertService.save_alert_documents(documents)
+    
+    @staticmethod
+    def alert_to_document(alert: Alert) -> dict:
+        """Convierte una alerta al documento que se guarda en Mongo (sin _id)"""
+        alert_data = alert.model_dump(by_alias=True, exclude_none=True)
+        if "_id" in alert_data:
+            del alert_data["_id"]
+        return alert_data
+    
+    @staticmethod
+    def coalesce_alert_documents(documents: List[dict]) -> List[dict]:
+        """
+        Agrupa las alertas del lote por título: suma los triggerCount y
+        conserva la última versión (descripción incluida) de cada título
+        """
+        merged = {}
+        for alert_data in documents:
+            title = alert_data.get("title")
+            trigger_count = alert_data.get("triggerCount", 1)
+            sources = alert_data.get("sources")
+            if title in merged:
+                trigger_count += merged[title]["triggerCount"]
+                previous = merged[title].get("sources")
+                if previous:
+                    sources = previous + [source for source in sources or [] if source not in previous]
+            merged[title] = {**alert_data, "triggerCount": trigger_count}
+            if sources is not None:
+                merged[title]["sources"] = sources
+        
+        return list(merged.values())
+    
+    @staticmethod
+    async def save_alert_documents(documents: List[dict]) -> int:
+        """
+        Guarda alertas ya serializadas con un único bulk_write de upserts por título.
+        Retorna la cantidad de alertas creadas o con contenido modificado. Si
+        alguna no se pudo guardar lanza la excepción (BulkWriteError con las
+        que fallaron), después de aplicar y publicar el resto del lote.
+        """
+        if not documents:
+            return 0
         
-        for alert in alerts:
-            # Convertir alerta a diccionario
-            alert_data = alert.model_dump(by_alias=True, exclude_none=True)
-            if "_id" in alert_data:
-                del alert_data["_id"]
+        db = await get_database()
+        alerts_collection = db.get_collection("alerts", write_concern=alert_write_concern())
+        
+        merged = AlertService.coalesce_alert_documents(documents)
+        
+        # Una sola consulta para conocer la descripción y las fuentes actuales de cada título
+        existing = {}
+        cursor = alerts_collection.find(
+            {"title": {"$in": [alert_data.get("title") for alert_data in merged]}},
+            {"title": 1, "description": 1, "sources": 1, "sourceCount": 1, "triggerCount": 1}
+        )
+        async for doc in cursor:
+            existing[doc["title"]] = doc
+        
+        now = datetime.utcnow()
+        operations = []
+        counted = set()  # Índices de operaciones que cuentan como creación/modificación
+        changes = []  # (evento, alerta guardada) para el feed en vivo, por operación
+        
+        for alert_data in merged:
+            title = alert_data.get("title")
+            increment = alert_data.pop("triggerCount")
+            sources = alert_data.pop("sources", None)
+            alert_data.pop("sourceCount", None)
+            current = existing.get(title, {})
+            
+            if title in existing and current.get("description") == alert_data.get("description"):
+                # Mismo título Y descripción = contenido duplicado
+                # Solo actualizar timestamp y contador
+                update = {
+                    "$set": {"lastTriggered": now},
+                    "$inc": {"triggerCount": increment}
+                }
+                event = "triggered"
+            else:
+                # Alerta nueva o misma alerta con descripción diferente
+                alert_data["lastTriggered"] = now
+                update = {
+                    "$set": alert_data,
+                    "$inc": {"triggerCount": increment}
+                }
+                counted.add(len(operations))
+                event = "updated" if title in existing else "created"
+            
+            if sources:
+                # Medios que publicaron la historia: se acumulan entre disparos
+                stored = current.get("sources") or []
+                new_sources = [source for source in dict.fromkeys(sources) if source not in stored]
+                update["$set"]["sources"] = (stored + new_sources)[:MAX_ALERT_SOURCES]
+                update["$set"]["sourceCount"] = current.get("sourceCount", len(stored)) + len(new_sources)
             
+            operations.append(UpdateOne({"title": title}, update, upsert=True))
+            changes.append((event, {
+                **alert_data, **update["$set"],
+                "_id": current.get("_id"),
+                "triggerCount": current.get("triggerCount", 0) + increment
+            }))
+        
+        # Un error que no sea de escritura (red, timeout, write concern) se propaga:
+        # quien llama no debe dar los documentos por analizados ni avanzar su checkpoint
+        upserted = {}
+        failed = []
+        pending = list(range(len(operations)))
+        for attempt in range(2):
+            errors = []
             try:
-                # ESTRATEGIA MEJORADA: Buscar duplicados por título Y descripción
-                # Primero, buscar si existe una alerta con el mismo título
-                existing_by_title = await alerts_collection.find_one({
-                    "title": alert_data.get("title")
-                })
-                
-                if existing_by_title:
-                    # Ya existe una alerta con este título
-                    # Verificar si la descripción también coincide
-                    if existing_by_title.get("description") == alert_data.get("description"):
-                        # Mismo título Y descripción = contenido duplicado
-                        # Solo actualizar timestamp y contador
-                        await alerts_collection.update_one(
-                            {"_id": existing_by_title["_id"]},
-                            {
-                                "$set": {
-                                    "lastTriggered": datetime.utcnow()
-                                },
-                                "$inc": {"triggerCount": 1}
-                            }
-                        )
-                        # No contar como modificación significativa
-                        continue
-                    else:
-                        # Mismo título pero descripción diferente
-                        # Es una actualización real del contenido
-                        alert_data["triggerCount"] = existing_by_title.get("triggerCount", 0) + 1
-                        alert_data["lastTriggered"] = datetime.utcnow()
-                        
-                        await alerts_collection.update_one(
-                            {"_id": existing_by_title["_id"]},
-                            {"$set": alert_data}
-                        )
-                        modified_count += 1
-                else:
-                    # No existe alerta con este título, insertar nueva
-                    await alerts_collection.insert_one(alert_data)
-                    modified_count += 1
-                    
-            except Exception as e:
-                print(f"Error guardando alerta: {e}")
-                continue
-        
-        return modified_count
+                result = await alerts_collection.bulk_write([operations[i] for i in pending], ordered=False)
+                upserted.update({pending[i]: alert_id for i, alert_id in (result.upserted_ids or {}).items()})
+            except BulkWriteError as e:
+                # Con ordered=False el resto del lote se aplica igual
+                upserted.update({pending[item["index"]]: item["_id"] for item in e.details.get("upserted", [])})
+                errors = [(pending[error["index"]], error) for error in e.details.get("writeErrors", [])]
+            # Un upsert concurrente del mismo título choca con el índice único: al
+            # reintentarlo encuentra el documento y lo actualiza
+            retry = [(index, error) for index, error in errors if error.get("code") == 11000 and not attempt]
+            failed += [(index, error) for index, error in errors if (index, error) not in retry]
+            pending = [index for index, _ in retry]
+            if not pending:
+                break
+        
+        await CounterService.bump("alerts")
+        
+        failed_indexes = {index for index, _ in failed}
+        counted -= failed_indexes
+        for index, alert_id in upserted.items():
+            changes[index][1]["_id"] = alert_id
+        get_broadcaster().publish_saved([change for index, change in enumerate(changes) if index not in failed_indexes])
+        
+        if failed:
+            for _, error in failed:
+                print(f"Error guardando alerta: {error.get('errmsg')}")
+            raise BulkWriteError({"writeErrors": [error for _, error in failed], "nInserted": 0, "upserted": []})
+        return len(counted)
     
     @staticmethod
     async def get_all_alerts() -> List[Alert]:
         """Obtiene todas las alertas ordenadas por fecha"""
+        return [alert async for alert in AlertService.iter_alerts()]
+    
+    @staticmethod
+    def iter_alerts(after: Optional[str] = None, limit: Optional[int] = None) -> AsyncIterator[Alert]:
+        """Recorre las alertas de la más nueva a la más antigua, a partir del cursor `after`"""
+        return _iter_models("alerts", _alert_keyset_query(after), ALERTS_SORT, limit, Alert)
+    
+    @staticmethod
+    def iter_alerts_json(after: Optional[str] = None, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Alertas serializadas a JSON directo desde BSON (lectura confiable, sin validación)"""
+        return _iter_json("alerts", _alert_keyset_query(after), ALERTS_SORT, limit, ALERT_ENCODER)
+    
+    @staticmethod
+    async def get_alerts_page_json(limit: int, after: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]:
+        """Página de alertas en JSON y cursor de la siguiente (None si es la última)"""
+        return await _json_page(
+            "alerts", _alert_keyset_query(after), ALERTS_SORT, limit, ALERT_ENCODER, _alert_position
+        )
+    
+    @staticmethod
+    async def delete_all_alerts() -> int:
+        """Elimina todas las alertas. Retorna la cantidad eliminada"""
         db = await get_database()
-        alerts_collection = db["alerts"]
-        
-        alerts_list = []
-        async for alert_doc in alerts_collection.find().sort("createdAt", -1):
-            if "_id" in alert_doc:
-                alert_doc["_id"] = str(alert_doc["_id"])
-            alerts_list.append(Alert(**alert_doc))
-        
-        return alerts_list
+        result = await db.get_collection("alerts", write_concern=alert_write_concern()).delete_many({})
+        await CounterService.bump("alerts")
+        return result.deleted_count
     
     @staticmethod
-    async def process_news_and_create_alerts() -> dict:
-        """Procesa noticias recientes y crea alertas"""
-        news_list = await NewsService.get_recent_news(limit=100, hours=168)  # 7 días
-        
-        all_alerts = []
-        for news in news_list:
-            alerts = AlertService.analyze_news_for_alerts(news)
-            all_alerts.extend(alerts)
-        
-        count = await AlertService.save_alerts(all_alerts)
+    async def clean_duplicate_alerts(dry_run: bool = False, batch_size: int = 1000) -> dict:
+        """
+        Elimina alertas con título repetido conservando la más reciente de cada
+        grupo (por lastTriggered, o createdAt si no tiene), que acumula la suma
+        de triggerCount. El agrupamiento se hace en el servidor y solo lleva
+        _id y contadores; los borrados van de a `batch_size` grupos.
+        """
+        db = await get_database()
+        alerts_collection = db.get_collection("alerts", write_concern=alert_write_concern())
+        
+        pipeline = [
+            {"$project": {
+                "title": 1,
+                "triggerCount": {"$ifNull": ["$triggerCount", 1]},
+                "sortKey": {"$ifNull": ["$lastTriggered", "$createdAt"]}
+            }},
+            {"$sort": {"sortKey": -1, "_id": -1}},
+            {"$group": {
+                "_id": "$title",
+                "count": {"$sum": 1},
+                "keep": {"$first": "$_id"},
+                "ids": {"$push": "$_id"},
+                "triggerCount": {"$sum": "$triggerCount"}
+            }},
+            {"$match": {"count": {"$gt": 1}}}
+        ]
+        
+        groups_processed = 0
+        duplicates = 0
+        to_delete = []
+        keepers = []
+        
+        async def flush():
+            if not keepers:
+                return
+            # Primero la suma en la alerta que queda: si el borrado falla, los
+            # disparos de las duplicadas no se pierden
+            await alerts_collection.bulk_write(keepers, ordered=False)
+            await alerts_collection.delete_many({"_id": {"$in": to_delete}})
+            to_delete.clear()
+            keepers.clear()
+        
+        now = datetime.utcnow()
+        async for group in alerts_collection.aggregate(pipeline, allowDiskUse=True):
+            groups_processed += 1
+            duplicates += group["count"] - 1
+            if dry_run:
+                # Solo se cuentan: no se arman borrados ni actualizaciones
+                continue
+            
+            to_delete.extend(_id for _id in group["ids"] if _id != group["keep"])
+            keepers.append(UpdateOne(
+                {"_id": group["keep"]},
+                {"$set": {"triggerCount": group["triggerCount"], "lastTriggered": now}}
+            ))
+            if len(keepers) >= batch_size:
+                await flush()
+        await flush()
+        if groups_processed and not dry_run:
+            await CounterService.bump("alerts")
         
         return {
-            "success": True,
-            "news_processed": len(news_list),
-            "tweets_processed": 0,
-            "alerts_created": count,
-            "alerts": all_alerts
+            "dry_run": dry_run,
+            "groups_processed": groups_processed,
+            "duplicates_deleted": 0 if dry_run else duplicates,
+            "duplicates_found": duplicates,
+            "total_alerts_remaining": await alerts_collection.count_documents({})
         }
     
     @staticmethod
-    async def process_tweets_and_create_alerts() -> dict:
-        """Procesa tweets recientes y crea alertas"""
-        tweets_list = await TweetService.get_recent_tweets(limit=200, hours=72)  # 3 días
-        
-        all_alerts = []
-        for tweet in tweets_list:
-            alerts = AlertService.analyze_tweet_for_alerts(tweet)
-            all_alerts.extend(alerts)
-        
-        count = await AlertService.save_alerts(all_alerts)
-        
-        return {
-            "success": True,
-            "news_processed": 0,
-            "tweets_processed": len(tweets_list),
-            "alerts_created": count,
-            "alerts": all_alerts
-        }
+    async def iter_news_to_process(full: bool = False, since: Optional[datetime] = None) -> AsyncIterator[News]:
+        """Noticias pendientes de análisis (posteriores a la marca de agua)"""
+        after_id = await CheckpointService.resolve_after_id("news", full, since)
+        news_iter = NewsService.iter_recent_news(
+            limit=100, hours=_window_hours(168, since), after_id=after_id  # 7 días
+        )
+        async for news in news_iter:
+            yield news
+    
+    @staticmethod
+    async def iter_tweets_to_process(full: bool = False, since: Optional[datetime] = None) -> AsyncIterator[Tweet]:
+        """Tweets pendientes de análisis (posteriores a la marca de agua)"""
+        after_id = await CheckpointService.resolve_after_id("tweets", full, since)
+        tweets_iter = TweetService.iter_recent_tweets(
+            limit=200, hours=_window_hours(72, since), after_id=after_id  # 3 días
+        )
+        async for tweet in tweets_iter:
+            yield tweet
+    
+    @staticmethod
+    async def process_news_and_create_alerts(full: bool = False, since: Optional[datetime] = None,
+                                             no_cache: bool = False) -> dict:
+        """Procesa noticias nuevas y crea alertas"""
+        from pipeline import AlertPipeline
+        return await AlertPipeline().run(["news"], full=full, since=since, no_cache=no_cache)
+    
+    @staticmethod
+    async def process_tweets_and_create_alerts(full: bool = False, since: Optional[datetime] = None,
+                                               no_cache: bool = False) -> dict:
+        """Procesa tweets nuevos y crea alertas"""
+        from pipeline import AlertPipeline
+        return await AlertPipeline().run(["tweets"], full=full, since=since, no_cache=no_cache)
     
     @staticmethod
-    async def process_all_and_create_alerts() -> dict:
+    async def process_all_and_create_alerts(full: bool = False, since: Optional[datetime] = None,
+                                            no_cache: bool = False) -> dict:
         """Procesa noticias Y tweets, y crea alertas combinadas"""
-        # Obtener contenido reciente (7 días noticias, 3 días tweets)
-        news_list = await NewsService.get_recent_news(limit=100, hours=168)  # 7 días
-        tweets_list = await TweetService.get_recent_tweets(limit=200, hours=72)  # 3 días
-        
-        all_alerts = []
-        
-        # Procesar noticias
-        for news in news_list:
-            alerts = AlertService.analyze_news_for_alerts(news)
-            all_alerts.extend(alerts)
-        
-        # Procesar tweets
-        for tweet in tweets_list:
-            alerts = AlertService.analyze_tweet_for_alerts(tweet)
-            all_alerts.extend(alerts)
-        
-        # Guardar alertas
-        count = await AlertService.save_alerts(all_alerts)
-        
-        return {
-            "success": True,
-            "news_processed": len(news_list),
-            "tweets_processed": len(tweets_list),
-            "alerts_created": count,
-            "alerts": all_alerts
-        }
+        from pipeline import AlertPipeline
+        return await AlertPipeline().run(["news", "tweets"], full=full, since=since, no_cache=no_cache)
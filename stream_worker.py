@@ -0,0 +1,253 @@
+"""
+Generador de alertas en streaming a partir de change streams de MongoDB.
+
+Observa las inserciones en las colecciones `news` y `tweets`, las analiza con
+AlertService y guarda las alertas en segundos. El resume token de cada
+colección se persiste en `checkpoints`, de modo que un reinicio continúa
+donde quedó. El token avanza recién con las alertas del evento guardadas.
+La marca de agua de /alerts/generate no se mueve desde acá (el stream no
+sabe si quedan documentos anteriores sin procesar): cada documento
+procesado se registra en la caché de análisis, y el polling lo saltea.
+
+Un error de MongoDB (caída, failover) reabre el stream desde el último token
+guardado y el evento se vuelve a procesar. Un error del propio evento
+(documento inválido, alerta rechazada por el servidor) se reintenta hasta
+MAX_EVENT_ATTEMPTS veces; si sigue fallando, el evento se guarda en
+`stream_dead_letters` y el stream sigue con el próximo.
+Requiere un replica set (alcanza con uno de un solo nodo).
+
+Uso:
+    python stream_worker.py
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+
+from analysis_cache import get_analysis_cache
+from config import settings
+from database import get_database, connect_to_mongo, close_mongo_connection
+from dedup import get_story_index
+from metrics import record_alerts, record_documents, record_duplicates
+from models import News, Tweet
+from rules import RulesWatcher, get_active_rules, load_active_rules
+from scheduler import Lease
+from services import AlertService, CheckpointService
+from ticker_index import TickerWatcher, reload_ticker_index
+
+
+# Códigos de error de un resume token que ya no está en el oplog
+RESUME_TOKEN_LOST_CODES = {260, 280, 286}
+
+LOCK_NAME = "alert-stream-worker"
+
+RETRY_DELAY_SECONDS = 5
+
+# Intentos de procesar un evento antes de descartarlo a `stream_dead_letters`
+MAX_EVENT_ATTEMPTS = 3
+
+
+class AlertStreamWorker:
+    """
+    Consume inserciones de news/tweets y genera alertas a medida que llegan.
+    Entre todos los procesos (workers de uvicorn, contenedores, este script)
+    solo consume el que tiene el lease `alert-stream-worker` de `locks`: si
+    no, cada inserción se analizaría y contaría una vez por proceso.
+    """
+    
+    def __init__(self, collections: List[str] = None, lease: Optional[float] = None):
+        self.collections = collections or ["news", "tweets"]
+        self.lease = Lease(LOCK_NAME, lease or settings.stream_worker_lease_seconds, "Stream worker")
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._leader_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Inicia el loop que toma el lease y, con él, un consumidor por colección"""
+        if self._leader_task is None:
+            self._leader_task = asyncio.create_task(self._lead())
+            print(f"✓ Stream worker iniciado ({', '.join(self.collections)}, {self.lease.owner})")
+    
+    async def stop(self):
+        """Detiene los consumidores y libera el lease"""
+        if self._leader_task:
+            self._leader_task.cancel()
+            await asyncio.gather(self._leader_task, return_exceptions=True)
+            self._leader_task = None
+        await self._stop_consumers()
+        if self.lease.held:
+            await self.lease.release()
+        print("✓ Stream worker detenido")
+    
+    async def wait(self):
+        """Espera al loop del lease (corre hasta ser cancelado)"""
+        await self._leader_task
+    
+    async def _lead(self):
+        """Renueva el lease cada tercio de su duración; sin él, no consume"""
+        while True:
+            try:
+                if await self.lease.acquire():
+                    self._start_consumers()
+                else:
+                    await self._stop_consumers()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Sin poder renovarlo, otro proceso puede tomarlo al vencer
+                print(f"✗ Stream worker: error renovando el lease: {e}")
+                await self._stop_consumers()
+            await asyncio.sleep(self.lease.duration / 3)
+    
+    def _start_consumers(self):
+        for name in self.collections:
+            if name not in self._tasks or self._tasks[name].done():
+                self._tasks[name] = asyncio.create_task(self._watch(name))
+    
+    async def _stop_consumers(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks = {}
+    
+    async def _watch(self, name: str):
+        """Loop de un change stream con reintentos y reanudación por resume token"""
+        db = await get_database()
+        collection = db[name]
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        
+        while True:
+            resume_token = await CheckpointService.get_resume_token(name)
+            try:
+                async with collection.watch(pipeline, resume_after=resume_token) as stream:
+                    async for change in stream:
+                        await self._handle(name, change)
+                        await CheckpointService.save_resume_token(name, change["_id"])
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in RESUME_TOKEN_LOST_CODES and resume_token is not None:
+                    # El token ya no está en el oplog: empezar desde ahora
+                    print(f"✗ Resume token de {name} inválido, reiniciando el stream: {e}")
+                    await CheckpointService.save_resume_token(name, None)
+                    continue
+                print(f"✗ Error en change stream de {name}: {e}")
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+            except PyMongoError as e:
+                print(f"✗ Error en change stream de {name}: {e}")
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+    
+    async def _handle(self, name: str, change: dict):
+        """
+        Procesa un evento. Los errores transitorios de MongoDB se propagan
+        (el stream se reabre sin avanzar el token); los del evento se
+        reintentan hasta MAX_EVENT_ATTEMPTS veces y después se descarta.
+        """
+        for attempt in range(1, MAX_EVENT_ATTEMPTS + 1):
+            try:
+                await self._process(name, dict(change["fullDocument"]))
+                return
+            except ValidationError as e:
+                # Documento inválido: fallaría igual en cada intento
+                error = e
+                break
+            except BulkWriteError as e:
+                # save_alert_documents ya reintentó los duplicados: el resto es definitivo
+                error = e
+                break
+            except PyMongoError:
+                raise
+            except Exception as e:
+                error = e
+                print(f"✗ Error procesando un evento de {name} (intento {attempt}/{MAX_EVENT_ATTEMPTS}): {e}")
+                if attempt < MAX_EVENT_ATTEMPTS:
+                    await asyncio.sleep(RETRY_DELAY_SECONDS)
+        
+        await self._dead_letter(name, change, error)
+    
+    @staticmethod
+    async def _dead_letter(name: str, change: dict, error: Exception):
+        """Guarda un evento que no se pudo procesar para revisarlo a mano"""
+        source_id = change["fullDocument"].get("_id")
+        print(f"✗ Evento de {name} {source_id} descartado a stream_dead_letters: {error}")
+        db = await get_database()
+        await db["stream_dead_letters"].update_one(
+            {"_id": f"{name}:{source_id}"},
+            {
+                "$set": {
+                    "source": name,
+                    "source_id": source_id,
+                    "error": f"{type(error).__name__}: {error}",
+                    "failedAt": datetime.utcnow(),
+                },
+                "$inc": {"failures": 1}
+            },
+            upsert=True
+        )
+    
+    @staticmethod
+    async def _process(name: str, document: dict):
+        """
+        Analiza un documento insertado y guarda sus alertas. Los errores se
+        propagan para que el evento no se marque como procesado (ver _handle).
+        """
+        document["_id"] = str(document.get("_id"))
+        
+        model = News(**document) if name == "news" else Tweet(**document)
+        rules = get_active_rules()
+        
+        # Un casi duplicado de una historia ya vista no se analiza: suma un disparo
+        stories = get_story_index()
+        pending, members = [model], []
+        if stories:
+            pending, members = stories.split(name, pending, stories.signatures(name, pending), rules.version)
+            record_duplicates(name, len(members))
+        
+        alerts = []
+        if pending:
+            if name == "news":
+                alerts = AlertService.analyze_news_for_alerts(model, rules=rules)
+            else:
+                alerts = AlertService.analyze_tweet_for_alerts(model, rules=rules)
+            record_documents(name, 1)
+            record_alerts(name, alerts)
+        
+        documents = [AlertService.alert_to_document(alert) for alert in alerts]
+        if stories:
+            documents = stories.resolve(name, pending, documents, members)
+        if documents:
+            await AlertService.save_alert_documents(documents)
+        
+        # La marca de agua de /alerts/generate no se toca: el stream no sabe si
+        # quedan documentos anteriores sin procesar. El polling lo saltea como
+        # ya analizado por la caché de análisis.
+        cache = get_analysis_cache()
+        if cache:
+            await cache.add([cache.key(name, model, rules)])
+
+
+async def main():
+    await connect_to_mongo()
+    await reload_ticker_index()
+    await load_active_rules()
+    rules_watcher = RulesWatcher()
+    rules_watcher.start()
+    ticker_watcher = TickerWatcher()
+    ticker_watcher.start()
+    worker = AlertStreamWorker()
+    worker.start()
+    try:
+        await worker.wait()
+    finally:
+        await worker.stop()
+        await ticker_watcher.stop()
+        await rules_watcher.stop()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,37 @@
+"""
+Configuración común de los tests: los módulos del servicio se importan desde
+la raíz del repositorio y Settings exige la conexión a MongoDB aunque los
+tests no la usen. Los tests de acceso a datos usan el fixture `mongo`.
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "alertas_test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Base de datos en memoria (mongomock-motor) en lugar del servidor"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    
+    from mongomock.collection import BulkOperationBuilder
+    
+    import database
+    from config import settings
+    
+    # pymongo 4.9+ pasa `sort` a las operaciones de bulk_write y mongomock no lo acepta
+    for method in ("add_update", "add_replace"):
+        original = getattr(BulkOperationBuilder, method)
+        monkeypatch.setattr(
+            BulkOperationBuilder, method,
+            lambda self, *args, _original=original, sort=None, **kwargs: _original(self, *args, **kwargs)
+        )
+    
+    client = mongomock_motor.AsyncMongoMockClient()
+    monkeypatch.setattr(database.mongodb, "client", client)
+    return client[settings.database_name]
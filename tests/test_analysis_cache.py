@@ -0,0 +1,84 @@
+"""Claves y LRU de la caché de análisis"""
+import asyncio
+
+import analysis_cache
+from analysis_cache import AnalysisCache, content_hash
+from rules import DEFAULT_RULES, RuleSet
+
+
+NEWS = {"_id": "n1", "title": "YPF se desploma", "content": "crisis", "published_date": None}
+
+
+def test_key_depends_on_content_and_rules():
+    cache = AnalysisCache(lru_size=10)
+    key = cache.key("news", NEWS, DEFAULT_RULES)
+    assert key.startswith("news:n1:")
+    assert cache.key("news", dict(NEWS), DEFAULT_RULES) == key
+    # Un campo que no influye en el análisis no cambia la clave
+    assert cache.key("news", {**NEWS, "category": "x"}, DEFAULT_RULES) == key
+    assert cache.key("news", {**NEWS, "content": "otra"}, DEFAULT_RULES) != key
+    other_rules = RuleSet.from_spec({**DEFAULT_RULES.spec, "version": 7})
+    assert cache.key("news", NEWS, other_rules) != key
+
+
+def test_documents_without_id_are_not_cached():
+    assert AnalysisCache(lru_size=10).key("news", {"title": "x"}, DEFAULT_RULES) is None
+
+
+def test_content_hash_distinguishes_fields():
+    assert content_hash("news", {"title": "ab", "content": "c"}) != content_hash("news", {"title": "a", "content": "bc"})
+
+
+def test_lru_evicts_least_recently_used():
+    cache = AnalysisCache(lru_size=2)
+    cache._remember("a")
+    cache._remember("b")
+    cache._remember("a")
+    cache._remember("c")
+    assert list(cache.lru) == ["a", "c"]
+
+
+def test_split_serves_lru_hits_without_mongo(monkeypatch):
+    async def no_database():
+        raise AssertionError("no debería consultar MongoDB")
+    
+    monkeypatch.setattr(analysis_cache, "get_database", no_database)
+    cache = AnalysisCache(lru_size=10)
+    other = {**NEWS, "_id": "n2"}
+    cache._remember(cache.key("news", NEWS, DEFAULT_RULES))
+    cache._remember(cache.key("news", other, DEFAULT_RULES))
+    
+    pending, keys, hits = asyncio.run(cache.split("news", [NEWS, other], DEFAULT_RULES))
+    assert (pending, keys, hits) == ([], [], 2)
+    assert cache.hits == 2 and cache.misses == 0
+
+
+def test_split_checks_every_lru_miss_in_mongo(mongo):
+    cache = AnalysisCache(lru_size=10)
+    other = {**NEWS, "_id": "n2"}
+    stored_key = cache.key("news", other, DEFAULT_RULES)
+    
+    async def scenario():
+        # Clave registrada por otro worker: no está en la LRU de este proceso
+        await mongo["analysis_cache"].insert_one({"_id": stored_key})
+        return await cache.split("news", [NEWS, other, {"title": "sin id"}], DEFAULT_RULES)
+    
+    pending, keys, hits = asyncio.run(scenario())
+    assert pending == [NEWS, {"title": "sin id"}]
+    assert keys == [cache.key("news", NEWS, DEFAULT_RULES), None]
+    assert hits == 1
+    # La clave confirmada en Mongo queda en la LRU
+    assert stored_key in cache.lru
+
+
+def test_add_ignores_keys_registered_by_another_worker(mongo):
+    cache = AnalysisCache(lru_size=10)
+    key = cache.key("news", NEWS, DEFAULT_RULES)
+    
+    async def scenario():
+        await mongo["analysis_cache"].insert_one({"_id": key})
+        await cache.add([key, None, cache.key("news", {**NEWS, "_id": "n2"}, DEFAULT_RULES)])
+        return await mongo["analysis_cache"].count_documents({})
+    
+    assert asyncio.run(scenario()) == 2
+    assert key in cache.lru
@@ -0,0 +1,38 @@
+"""Análisis por lotes (analysis_engine.analyze_documents), en el mismo proceso"""
+from analysis_engine import analyze_documents
+from models import News, Tweet
+from rules import get_active_rules
+from services import AlertService
+
+
+NEWS = [
+    {"_id": "n1", "title": "YPF se desploma 12% por la crisis", "content": "Fuerte caída en el Merval"},
+    {"_id": "n2", "title": "Receta de empanadas", "content": "Sin relación con el mercado"},
+]
+TWEETS = [{"_id": "t1", "text": "$GGAL sube 9% tras el anuncio del BCRA", "like_count": 500}]
+
+
+def _titles(alerts):
+    return sorted(alert["title"] for alert in alerts)
+
+
+def test_matches_the_single_document_analyzers():
+    expected = [
+        AlertService.alert_to_document(alert)
+        for document in NEWS for alert in AlertService.analyze_news_for_alerts(News(**document))
+    ]
+    alerts = analyze_documents("news", NEWS)
+    assert alerts and _titles(alerts) == _titles(expected)
+    assert all(isinstance(alert, dict) for alert in alerts)
+    
+    expected = [
+        AlertService.alert_to_document(alert)
+        for document in TWEETS for alert in AlertService.analyze_tweet_for_alerts(Tweet(**document))
+    ]
+    assert _titles(analyze_documents("tweets", TWEETS)) == _titles(expected)
+
+
+def test_accepts_models_and_rule_specs():
+    from_dicts = analyze_documents("news", NEWS, get_active_rules().spec)
+    from_models = analyze_documents("news", [News(**document) for document in NEWS])
+    assert _titles(from_dicts) == _titles(from_models)
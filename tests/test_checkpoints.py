@@ -0,0 +1,56 @@
+"""Marcas de agua del procesamiento incremental"""
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from services import AlertService, CheckpointService
+
+
+def test_advance_never_goes_back(mongo):
+    older, newer = ObjectId.from_datetime(datetime(2025, 1, 1)), ObjectId.from_datetime(datetime(2025, 1, 2))
+    
+    async def scenario():
+        await CheckpointService.advance("news", newer)
+        await CheckpointService.advance("news", older)
+        await CheckpointService.advance("news", None)
+        return await CheckpointService.get_last_id("news")
+    
+    assert asyncio.run(scenario()) == newer
+
+
+def test_resolve_after_id(mongo):
+    since = datetime(2025, 3, 1)
+    
+    async def scenario():
+        await CheckpointService.advance("tweets", ObjectId.from_datetime(datetime(2025, 1, 1)))
+        return (
+            await CheckpointService.resolve_after_id("tweets"),
+            await CheckpointService.resolve_after_id("tweets", full=True),
+            await CheckpointService.resolve_after_id("tweets", since=since),
+            await CheckpointService.resolve_after_id("news"),
+        )
+    
+    stored, full, from_since, never = asyncio.run(scenario())
+    assert stored == ObjectId.from_datetime(datetime(2025, 1, 1))
+    assert full is None
+    assert from_since == ObjectId.from_datetime(since)
+    assert never is None
+
+
+def test_only_news_after_the_checkpoint_are_processed(mongo):
+    now = datetime.utcnow()
+    ids = [ObjectId.from_datetime(now - timedelta(minutes=minutes)) for minutes in (30, 20, 10)]
+    
+    async def scenario():
+        await mongo["news"].insert_many([
+            {"_id": _id, "title": f"Noticia {i}", "published_date": now} for i, _id in enumerate(ids)
+        ])
+        await CheckpointService.advance("news", ids[0])
+        pending = [news.id async for news in AlertService.iter_news_to_process()]
+        everything = [news.id async for news in AlertService.iter_news_to_process(full=True)]
+        return pending, everything
+    
+    pending, everything = asyncio.run(scenario())
+    assert pending == [str(ids[1]), str(ids[2])]
+    assert sorted(everything) == sorted(str(_id) for _id in ids)
@@ -0,0 +1,75 @@
+"""Limpieza de alertas duplicadas por título (POST /alerts/clean-duplicates)"""
+import asyncio
+from datetime import datetime
+
+from services import AlertService, CounterService
+
+
+ALERTS = [
+    {"title": "A", "triggerCount": 2, "createdAt": datetime(2025, 1, 1)},
+    {"title": "A", "triggerCount": 3, "createdAt": datetime(2025, 1, 3)},
+    {"title": "A", "createdAt": datetime(2025, 1, 2)},
+    {"title": "B", "triggerCount": 1, "createdAt": datetime(2025, 1, 1)},
+    {"title": "C", "triggerCount": 4, "createdAt": datetime(2025, 1, 1), "lastTriggered": datetime(2025, 2, 1)},
+    {"title": "C", "triggerCount": 1, "createdAt": datetime(2025, 1, 5)},
+]
+
+
+async def _seed(mongo):
+    await mongo["alerts"].insert_many([dict(alert) for alert in ALERTS])
+
+
+def test_dry_run_only_counts(mongo):
+    async def scenario():
+        await _seed(mongo)
+        version = await CounterService.get_version("alerts")
+        result = await AlertService.clean_duplicate_alerts(dry_run=True)
+        return result, version, await CounterService.get_version("alerts")
+    
+    result, before, after = asyncio.run(scenario())
+    assert result == {
+        "dry_run": True,
+        "groups_processed": 2,
+        "duplicates_deleted": 0,
+        "duplicates_found": 3,
+        "total_alerts_remaining": len(ALERTS),
+    }
+    assert before == after
+
+
+def test_keeps_latest_alert_with_summed_triggers(mongo):
+    async def scenario():
+        await _seed(mongo)
+        result = await AlertService.clean_duplicate_alerts(batch_size=1)
+        alerts = {doc["title"]: doc async for doc in mongo["alerts"].find({})}
+        return result, alerts
+    
+    result, alerts = asyncio.run(scenario())
+    assert result["duplicates_deleted"] == 3
+    assert result["total_alerts_remaining"] == 3
+    # A: la de createdAt más reciente; C: la de lastTriggered más reciente
+    assert alerts["A"]["createdAt"] == datetime(2025, 1, 3)
+    assert alerts["A"]["triggerCount"] == 6
+    assert alerts["C"]["createdAt"] == datetime(2025, 1, 1)
+    assert alerts["C"]["triggerCount"] == 5
+    assert alerts["B"]["triggerCount"] == 1
+
+
+def test_failed_delete_keeps_summed_triggers(mongo, monkeypatch):
+    async def scenario():
+        await _seed(mongo)
+        collection = type(mongo["alerts"])
+        
+        async def failing_delete(self, *args, **kwargs):
+            raise RuntimeError("se cortó la conexión")
+        
+        monkeypatch.setattr(collection, "delete_many", failing_delete)
+        try:
+            await AlertService.clean_duplicate_alerts()
+        except RuntimeError:
+            pass
+        return [doc async for doc in mongo["alerts"].find({"title": "A"})]
+    
+    alerts = asyncio.run(scenario())
+    # El borrado falló, pero la alerta que queda ya tiene la suma
+    assert max(alert.get("triggerCount", 1) for alert in alerts) == 6
@@ -0,0 +1,59 @@
+"""Agrupado por título de las alertas de un lote antes de guardarlas"""
+import asyncio
+
+from services import AlertService
+
+
+def test_same_title_sums_triggers_and_keeps_last_version():
+    merged = AlertService.coalesce_alert_documents([
+        {"title": "YPF cae", "description": "primera", "triggerCount": 1},
+        {"title": "GGAL sube", "description": "otra", "triggerCount": 1},
+        {"title": "YPF cae", "description": "segunda", "triggerCount": 2},
+    ])
+    assert merged == [
+        {"title": "YPF cae", "description": "segunda", "triggerCount": 3},
+        {"title": "GGAL sube", "description": "otra", "triggerCount": 1},
+    ]
+
+
+def test_missing_trigger_count_counts_as_one():
+    merged = AlertService.coalesce_alert_documents([{"title": "A"}, {"title": "A"}])
+    assert merged == [{"title": "A", "triggerCount": 2}]
+
+
+def test_sources_are_merged_without_duplicates():
+    merged = AlertService.coalesce_alert_documents([
+        {"title": "A", "sources": ["Infobae"]},
+        {"title": "A", "sources": ["La Nación", "Infobae"]},
+        {"title": "A"},
+    ])
+    assert merged == [{"title": "A", "triggerCount": 3, "sources": ["Infobae", "La Nación"]}]
+
+
+def test_input_documents_are_not_modified():
+    documents = [{"title": "A", "triggerCount": 1}, {"title": "A", "triggerCount": 1}]
+    AlertService.coalesce_alert_documents(documents)
+    assert documents == [{"title": "A", "triggerCount": 1}, {"title": "A", "triggerCount": 1}]
+
+
+def test_empty_batch():
+    assert AlertService.coalesce_alert_documents([]) == []
+
+
+def test_batch_is_saved_with_one_upsert_per_title(mongo):
+    async def scenario():
+        await mongo["alerts"].insert_one({"title": "A", "description": "igual", "triggerCount": 5})
+        created = await AlertService.save_alert_documents([
+            {"title": "A", "description": "igual", "triggerCount": 1},
+            {"title": "B", "description": "nueva", "triggerCount": 1},
+            {"title": "B", "description": "nueva", "triggerCount": 1},
+        ])
+        alerts = {doc["title"]: doc async for doc in mongo["alerts"].find({})}
+        return created, alerts
+    
+    created, alerts = asyncio.run(scenario())
+    # A ya existía con la misma descripción: solo suma disparos, no cuenta como creada
+    assert created == 1
+    assert alerts["A"]["triggerCount"] == 6
+    assert alerts["B"]["triggerCount"] == 2
+    assert len(alerts) == 2
@@ -0,0 +1,64 @@
+"""GET condicional de /alerts (ETag por versión de la colección)"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import AlertService
+
+
+@pytest.fixture
+def client(mongo):
+    main.ALERTS_RESPONSE_CACHE.clear()
+    return TestClient(main.app)
+
+
+def _save(title: str):
+    asyncio.run(AlertService.save_alert_documents([{
+        "title": title, "description": "desc", "type": "news", "priority": "medium",
+        "createdAt": datetime(2025, 1, 1),
+    }]))
+
+
+def test_unchanged_alerts_answer_not_modified(client, monkeypatch):
+    _save("YPF cae")
+    response = client.get("/alerts")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert [alert["title"] for alert in response.json()] == ["YPF cae"]
+    
+    def no_read(*args, **kwargs):
+        raise AssertionError("no debería leer la colección")
+    
+    monkeypatch.setattr(AlertService, "iter_alerts_json", no_read)
+    cached = client.get("/alerts", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    # Sin If-None-Match el cuerpo sale de la caché de respuestas
+    again = client.get("/alerts")
+    assert again.status_code == 200 and again.content == response.content
+
+
+def test_write_changes_the_etag(client):
+    _save("YPF cae")
+    etag = client.get("/alerts").headers["etag"]
+    _save("GGAL sube")
+    
+    response = client.get("/alerts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == 2
+
+
+def test_etag_depends_on_query_parameters(client):
+    _save("YPF cae")
+    _save("GGAL sube")
+    full = client.get("/alerts")
+    page = client.get("/alerts?limit=1", headers={"If-None-Match": full.headers["etag"]})
+    assert page.status_code == 200
+    assert page.headers["etag"] != full.headers["etag"]
+    assert len(page.json()) == 1
+    assert "x-next-cursor" in page.headers
@@ -0,0 +1,90 @@
+"""Agrupado de historias casi duplicadas (MinHash + LSH)"""
+from datetime import datetime, timedelta
+
+from dedup import MinHasher, StoryIndex, shingles, similarity
+
+
+BASE = (
+    "YPF se desploma un 10% en la bolsa porteña tras la crisis financiera "
+    "y la caída del mercado energético local según los analistas"
+)
+REWRITE = BASE.replace("según los analistas", "según operadores del mercado")
+OTHER = "Galicia presenta balance con ganancias récord y una suba fuerte del 8% en el trimestre"
+NOW = datetime(2025, 3, 10, 15, 0)
+
+
+def _news(_id, text, published=NOW, source="Infobae"):
+    return {"_id": _id, "title": text, "content": "", "published_date": published, "source": source}
+
+
+def _split(index, documents, rules_version=1):
+    return index.split("news", documents, index.signatures("news", documents), rules_version)
+
+
+def test_signature_is_deterministic_and_ignores_urls_and_mentions():
+    hasher = MinHasher()
+    assert hasher.signature(BASE) == MinHasher().signature(BASE)
+    assert hasher.signature(BASE) == hasher.signature(f"RT @infobae: {BASE} https://t.co/abc")
+
+
+def test_short_texts_have_no_signature():
+    assert shingles("YPF sube fuerte hoy") is None
+    assert MinHasher().signature("YPF sube fuerte hoy") is None
+
+
+def test_similarity_estimates_jaccard():
+    hasher = MinHasher()
+    assert similarity(hasher.signature(BASE), hasher.signature(BASE)) == 1.0
+    assert similarity(hasher.signature(BASE), hasher.signature(REWRITE)) >= 0.5
+    assert similarity(hasher.signature(BASE), hasher.signature(OTHER)) < 0.2
+
+
+def test_near_duplicates_join_the_first_story():
+    index = StoryIndex(threshold=0.5, window_hours=24, max_clusters=100)
+    first, second, other = _news("1", BASE), _news("2", REWRITE, source="Clarín"), _news("3", OTHER)
+    to_analyze, members = _split(index, [first, second, other])
+    assert to_analyze == [first, other]
+    assert [(cluster.key, label) for cluster, label in members] == [("news:1", "Clarín")]
+    assert index.clusters["news:1"].size == 2
+
+
+def test_resolve_adds_one_trigger_per_member():
+    index = StoryIndex(threshold=0.5, window_hours=24, max_clusters=100)
+    first, second = _news("1", BASE), _news("2", REWRITE, source="Clarín")
+    to_analyze, members = _split(index, [first, second])
+    alerts = index.resolve("news", to_analyze, [{"title": "YPF cae", "sourceId": "1", "triggerCount": 1}], members)
+    assert alerts == [
+        {"title": "YPF cae", "sourceId": "1", "triggerCount": 1, "sources": ["Infobae"]},
+        {"title": "YPF cae", "sourceId": "1", "triggerCount": 1, "sources": ["Clarín"]},
+    ]
+
+
+def test_rescanned_document_is_analyzed_again():
+    index = StoryIndex(threshold=0.5, window_hours=24, max_clusters=100)
+    document = _news("1", BASE)
+    _split(index, [document])
+    to_analyze, members = _split(index, [document])
+    assert to_analyze == [document] and members == []
+
+
+def test_new_rules_version_replaces_the_story():
+    index = StoryIndex(threshold=0.5, window_hours=24, max_clusters=100)
+    _split(index, [_news("1", BASE)], rules_version=1)
+    to_analyze, members = _split(index, [_news("2", REWRITE)], rules_version=2)
+    assert [document["_id"] for document in to_analyze] == ["2"] and members == []
+    assert list(index.clusters) == ["news:2"]
+
+
+def test_stories_outside_the_window_are_evicted():
+    index = StoryIndex(threshold=0.5, window_hours=24, max_clusters=100)
+    _split(index, [_news("1", BASE, published=NOW)])
+    to_analyze, members = _split(index, [_news("2", REWRITE, published=NOW + timedelta(hours=30))])
+    assert len(to_analyze) == 1 and members == []
+    assert list(index.clusters) == ["news:2"]
+
+
+def test_cluster_count_is_bounded():
+    index = StoryIndex(threshold=0.5, window_hours=24, max_clusters=2)
+    texts = [BASE, OTHER, "Mercado Libre anuncia inversión histórica de 500 millones de dólares en Argentina"]
+    _split(index, [_news(str(i), text) for i, text in enumerate(texts)])
+    assert list(index.clusters) == ["news:1", "news:2"]
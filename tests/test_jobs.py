@@ -0,0 +1,87 @@
+"""Trabajos de generación asíncronos: pedidos concurrentes del mismo alcance se suman"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from indexes import INDEXES
+from jobs import JOB_STALE_SECONDS, JobService, job_scope
+
+
+@pytest.fixture
+def job_db(mongo, monkeypatch):
+    """Colección `jobs` con su índice único por alcance; los trabajos no corren el pipeline"""
+    started = []
+    
+    async def run(job):
+        started.append(job["_id"])
+        jobs._running.pop(job["_id"], None)
+    
+    monkeypatch.setattr(JobService, "_run", staticmethod(run))
+    asyncio.run(mongo["jobs"].create_indexes(INDEXES["jobs"]))
+    return mongo, started
+
+
+def test_same_scope_joins_the_active_job(job_db):
+    mongo, started = job_db
+    
+    async def scenario():
+        first, joined_first = await JobService.submit(["news", "tweets"])
+        second, joined_second = await JobService.submit(["tweets", "news"])
+        other, joined_other = await JobService.submit(["news"], full=True)
+        await asyncio.sleep(0)
+        return first, joined_first, second, joined_second, other, joined_other
+    
+    first, joined_first, second, joined_second, other, joined_other = asyncio.run(scenario())
+    assert not joined_first and joined_second and not joined_other
+    assert second["_id"] == first["_id"]
+    assert second["requests"] == 2
+    assert other["_id"] != first["_id"]
+    # Solo corren los trabajos nuevos, no los pedidos que se sumaron
+    assert started == [first["_id"], other["_id"]]
+
+
+def test_finished_job_releases_its_scope(job_db):
+    mongo, started = job_db
+    
+    async def scenario():
+        first, _ = await JobService.submit(["news"])
+        await mongo["jobs"].update_one(
+            {"_id": first["_id"]}, {"$set": {"status": "succeeded"}, "$unset": {"activeScope": ""}}
+        )
+        second, joined = await JobService.submit(["news"])
+        return first, second, joined
+    
+    first, second, joined = asyncio.run(scenario())
+    assert not joined
+    assert second["_id"] != first["_id"]
+
+
+def test_stale_job_is_marked_abandoned(job_db):
+    mongo, started = job_db
+    stale = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS * 2)
+    
+    async def scenario():
+        await mongo["jobs"].insert_one({
+            "_id": "viejo", "activeScope": job_scope(["news"]), "status": "running", "updatedAt": stale
+        })
+        job, joined = await JobService.submit(["news"])
+        return job, joined, await mongo["jobs"].find_one({"_id": "viejo"})
+    
+    job, joined, abandoned = asyncio.run(scenario())
+    assert not joined
+    assert job["_id"] != "viejo"
+    assert abandoned["status"] == "failed"
+    assert "activeScope" not in abandoned
+
+
+def test_scope_includes_every_option():
+    since = datetime(2025, 1, 1)
+    assert job_scope(["tweets", "news"]) == job_scope(["news", "tweets"])
+    assert len({
+        job_scope(["news"]),
+        job_scope(["news"], full=True),
+        job_scope(["news"], since=since),
+        job_scope(["news"], no_cache=True),
+    }) == 4
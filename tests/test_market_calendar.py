@@ -0,0 +1,68 @@
+"""Calendario de ruedas de BYMA"""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import market_calendar
+from market_calendar import easter_sunday, holidays, is_in_session, sessions
+
+
+@pytest.mark.parametrize("year, expected", [
+    (2024, date(2024, 3, 31)),
+    (2025, date(2025, 4, 20)),
+    (2026, date(2026, 4, 5)),
+    (2027, date(2027, 3, 28)),
+    (2038, date(2038, 4, 25)),
+])
+def test_easter(year, expected):
+    assert easter_sunday(year) == expected
+
+
+def test_2025_holidays():
+    expected = {
+        date(2025, 1, 1), date(2025, 3, 3), date(2025, 3, 4), date(2025, 3, 24), date(2025, 4, 2),
+        date(2025, 4, 17), date(2025, 4, 18), date(2025, 5, 1), date(2025, 5, 2), date(2025, 5, 25),
+        date(2025, 6, 16), date(2025, 6, 20), date(2025, 7, 9), date(2025, 8, 15), date(2025, 8, 17),
+        date(2025, 10, 12), date(2025, 11, 21), date(2025, 11, 24), date(2025, 12, 8), date(2025, 12, 25),
+    }
+    assert holidays(2025) == expected
+
+
+@pytest.mark.parametrize("holiday, moved", [
+    (date(2027, 6, 17), date(2027, 6, 21)),    # jueves → lunes siguiente
+    (date(2027, 8, 17), date(2027, 8, 16)),    # martes → lunes anterior
+    (date(2027, 10, 12), date(2027, 10, 11)),  # martes → lunes anterior
+    (date(2028, 11, 20), date(2028, 11, 20)),  # lunes: no se mueve
+])
+def test_movable_holidays(holiday, moved):
+    assert moved in holidays(holiday.year)
+
+
+def test_year_without_bridge_days_warns_once(capsys, monkeypatch):
+    monkeypatch.setattr(market_calendar, "_warned_years", set())
+    holidays(2031)
+    holidays(2031)
+    assert capsys.readouterr().out.count("2031") == 1
+
+
+def test_sessions_skip_weekends_and_holidays():
+    table = sessions(2025)
+    assert date(2025, 3, 3) not in table      # Carnaval
+    assert date(2025, 3, 8) not in table      # sábado
+    assert table[date(2025, 3, 5)] == (datetime(2025, 3, 5, 14, 0), datetime(2025, 3, 5, 20, 0))
+    assert len(table) == 261 - len({day for day in holidays(2025) if day.weekday() < 5})
+
+
+def test_is_in_session_uses_utc_bounds():
+    assert is_in_session(datetime(2025, 3, 5, 14, 0))
+    assert is_in_session(datetime(2025, 3, 5, 19, 59, 59))
+    assert not is_in_session(datetime(2025, 3, 5, 20, 0))
+    assert not is_in_session(datetime(2025, 3, 5, 13, 59))
+    # Aware: 11:30 ART
+    assert is_in_session(datetime(2025, 3, 5, 11, 30, tzinfo=timezone(timedelta(hours=-3))))
+
+
+def test_is_in_session_closed_on_holidays_of_any_year():
+    assert not is_in_session(datetime(2025, 3, 24, 15, 0))  # Día de la Memoria
+    assert not is_in_session(datetime(2030, 12, 25, 15, 0))
+    assert is_in_session(datetime(2030, 12, 26, 15, 0))
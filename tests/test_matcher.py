@@ -0,0 +1,112 @@
+"""
+El matcher de una sola pasada debe dar los mismos scores que el cálculo
+original, que buscaba cada keyword y palabra de contexto con `in`.
+"""
+import random
+
+import pytest
+
+from alert_utils import (
+    DEFAULT_MATCHER, KEYWORD_PATTERNS, MAGNITUDE_WORDS, DocumentFeatures, extract_percentages
+)
+from matcher import MultiPatternMatcher
+
+
+def _reference_score(text: str, keyword: str, priority: str) -> float:
+    """calculate_relevance_score antes del matcher compilado"""
+    text_lower = text.lower()
+    if keyword not in text_lower:
+        return 0.0
+    
+    keyword_info = KEYWORD_PATTERNS.get(priority, {}).get(keyword, {})
+    score = keyword_info.get('weight', 0.5)
+    for context in keyword_info.get('context', []):
+        if context in text_lower:
+            score += 0.2
+    for magnitude_word, multiplier in MAGNITUDE_WORDS.items():
+        if magnitude_word in text_lower:
+            score *= multiplier
+            break
+    percentages = extract_percentages(text)
+    if percentages:
+        max_pct = max(percentages)
+        if priority in ['critical', 'high'] and max_pct >= 5:
+            score += 0.3
+        elif priority == 'positive' and max_pct >= 3:
+            score += 0.2
+    return round(score, 2)
+
+
+def _corpus(size: int = 300):
+    """Textos sintéticos con keywords, contexto, magnitud y porcentajes mezclados"""
+    rng = random.Random(7)
+    terms = set(MAGNITUDE_WORDS)
+    for keywords in KEYWORD_PATTERNS.values():
+        for keyword, info in keywords.items():
+            terms.add(keyword)
+            terms.update(info.get('context', []))
+    terms = sorted(terms)
+    filler = ["el", "mercado", "de", "hoy", "YPF", "GGAL", "según", "analistas", "la", "semana"]
+    texts = []
+    for _ in range(size):
+        words = rng.sample(terms, rng.randint(0, 6)) + rng.sample(filler, rng.randint(2, 8))
+        if rng.random() < 0.5:
+            words.append(f"{rng.randint(0, 15)}.{rng.randint(0, 9)}%")
+        rng.shuffle(words)
+        text = " ".join(words)
+        texts.append(text.upper() if rng.random() < 0.1 else text)
+    return texts
+
+
+CORPUS = _corpus()
+
+
+@pytest.mark.parametrize("priority", sorted(KEYWORD_PATTERNS))
+def test_scores_match_reference(priority):
+    for text in CORPUS:
+        features = DocumentFeatures.from_text(text, tickers=[])
+        for keyword in KEYWORD_PATTERNS[priority]:
+            assert DEFAULT_MATCHER.score(features, keyword, priority) == _reference_score(text, keyword, priority), (
+                text, keyword
+            )
+
+
+def test_best_keywords_match_reference():
+    for text in CORPUS:
+        expected = {}
+        for priority, keywords in KEYWORD_PATTERNS.items():
+            best_keyword, best_score = None, 0.0
+            for keyword in keywords:
+                score = _reference_score(text, keyword, priority)
+                if score > best_score:
+                    best_keyword, best_score = keyword, score
+            if best_keyword:
+                expected[priority] = (best_keyword, best_score)
+        assert DEFAULT_MATCHER.best_keywords(DocumentFeatures.from_text(text, tickers=[])) == expected, text
+
+
+def test_unknown_keyword_falls_back_to_substring():
+    features = DocumentFeatures.from_text("la acción se desploma", tickers=[])
+    assert DEFAULT_MATCHER.score(features, "desplom", "critical") == _reference_score(
+        "la acción se desploma", "desplom", "critical"
+    )
+    assert DEFAULT_MATCHER.score(features, "inexistente", "critical") == 0.0
+
+
+def test_find_all_reports_overlapping_and_prefix_matches():
+    matcher = MultiPatternMatcher(["caída", "caída libre", "libre", "da"])
+    assert sorted(matcher.find_all("caída libre")) == [
+        (0, "caída"), (0, "caída libre"), (3, "da"), (6, "libre")
+    ]
+    assert matcher.found("una caída") == {"caída", "da"}
+
+
+def test_whole_words():
+    matcher = MultiPatternMatcher(["alza", "al"], whole_words=True)
+    assert matcher.found("en alza") == {"alza"}
+    assert matcher.found("realzar") == set()
+
+
+def test_empty_matcher():
+    assert MultiPatternMatcher([]).found("texto") == set()
+    assert MultiPatternMatcher(["a"]).find_all("") == []
@@ -0,0 +1,66 @@
+"""Latencia por endpoint (RequestMetricsMiddleware)"""
+import asyncio
+
+from fastapi import FastAPI, WebSocket
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from metrics import RequestMetricsMiddleware
+
+
+app = FastAPI()
+app.add_middleware(RequestMetricsMiddleware)
+
+
+@app.get("/prueba/lenta/{item}")
+async def slow_stream(item: str):
+    async def chunks():
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+            yield f"{item}\n".encode()
+    
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+@app.get("/prueba/error")
+async def error():
+    raise RuntimeError("falla")
+
+
+@app.websocket("/prueba/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await websocket.accept()
+    await websocket.receive_text()
+    await asyncio.sleep(0.05)
+    await websocket.close(code=4000)
+
+
+def _sample(suffix: str, method: str, endpoint: str, status: str) -> float:
+    return REGISTRY.get_sample_value(
+        f"http_request_seconds_{suffix}", {"method": method, "endpoint": endpoint, "status": status}
+    ) or 0.0
+
+
+def test_streaming_response_is_timed_until_the_last_chunk():
+    before = _sample("sum", "GET", "/prueba/lenta/{item}", "200")
+    response = TestClient(app).get("/prueba/lenta/x")
+    assert response.content == b"x\nx\nx\n"
+    # La ruta es la plantilla, no la URL; el tiempo incluye los tres fragmentos
+    assert _sample("sum", "GET", "/prueba/lenta/{item}", "200") - before >= 0.15
+
+
+def test_unhandled_error_counts_as_500():
+    before = _sample("count", "GET", "/prueba/error", "500")
+    response = TestClient(app, raise_server_exceptions=False).get("/prueba/error")
+    assert response.status_code == 500
+    assert _sample("count", "GET", "/prueba/error", "500") - before == 1
+
+
+def test_websocket_is_timed_until_it_closes():
+    before = _sample("sum", "WEBSOCKET", "/prueba/ws", "4000")
+    with TestClient(app).websocket_connect("/prueba/ws") as websocket:
+        websocket.send_text("hola")
+        websocket.receive()
+    assert _sample("count", "WEBSOCKET", "/prueba/ws", "4000") == 1
+    assert _sample("sum", "WEBSOCKET", "/prueba/ws", "4000") - before >= 0.05
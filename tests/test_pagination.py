@@ -0,0 +1,54 @@
+"""Cursores de paginación por keyset (token opaco y filtros de continuación)"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from pagination import InvalidCursorError, decode_cursor, encode_cursor
+from services import _alert_keyset_query, _alert_position, _id_keyset_query, _id_position
+
+
+def test_cursor_round_trip():
+    values = {"createdAt": "2025-03-10T14:30:00.123000", "id": "65f0c0ffee00000000000001"}
+    token = encode_cursor(values)
+    assert "=" not in token
+    assert decode_cursor(token) == values
+
+
+@pytest.mark.parametrize("token", ["no-es-base64!!", encode_cursor([1, 2])[:-1] + "x", "W10"])
+def test_invalid_cursor(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+def test_id_keyset_continues_after_last_id():
+    last = ObjectId()
+    query = _id_keyset_query(encode_cursor(_id_position({"_id": last})))
+    assert query == {"_id": {"$gt": last}}
+    assert _id_keyset_query(None) == {}
+
+
+def test_id_keyset_keeps_string_ids():
+    assert _id_keyset_query(encode_cursor({"id": "tweet-123"})) == {"_id": {"$gt": "tweet-123"}}
+
+
+def test_id_keyset_requires_id():
+    with pytest.raises(InvalidCursorError):
+        _id_keyset_query(encode_cursor({"createdAt": "2025-01-01T00:00:00"}))
+
+
+def test_alert_keyset_breaks_ties_by_id():
+    created_at = datetime(2025, 3, 10, 14, 30, 0, 123000)
+    last = ObjectId()
+    query = _alert_keyset_query(encode_cursor(_alert_position({"createdAt": created_at, "_id": last})))
+    assert query == {
+        "$or": [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "_id": {"$lt": last}}
+        ]
+    }
+
+
+def test_alert_keyset_rejects_bad_date():
+    with pytest.raises(InvalidCursorError):
+        _alert_keyset_query(encode_cursor({"createdAt": "ayer", "id": str(ObjectId())}))
@@ -0,0 +1,67 @@
+"""Validación y normalización de las reglas publicadas (RuleSet.from_spec)"""
+import pytest
+
+from alert_utils import DocumentFeatures
+from rules import DEFAULT_RULES, RuleSet
+
+
+def _spec(**overrides):
+    spec = {
+        "version": 3,
+        "keyword_patterns": {"critical": {"default": {"weight": "0.9", "context": ["empresa"]}}},
+        "magnitude_words": {"fuerte": "1.3"},
+        "thresholds": {"critical": "0.5"},
+    }
+    spec.update(overrides)
+    return spec
+
+
+def test_default_rules_round_trip():
+    rules = RuleSet.from_spec(DEFAULT_RULES.spec)
+    text = "YPF entra en default y la crisis se profundiza con una caída fuerte del 12%"
+    features = DocumentFeatures.from_text(text, tickers=[])
+    assert rules.find_best_keywords(features) == DEFAULT_RULES.find_best_keywords(features)
+
+
+def test_numbers_are_stored_normalized():
+    rules = RuleSet.from_spec(_spec())
+    info = rules.spec["keyword_patterns"]["critical"]["default"]
+    assert info == {"weight": 0.9, "context": ["empresa"]}
+    assert rules.spec["magnitude_words"] == {"fuerte": 1.3}
+    assert rules.spec["thresholds"] == {"critical": 0.5}
+    assert rules.version == 3
+
+
+def test_missing_weight_and_context_get_defaults():
+    rules = RuleSet.from_spec(_spec(keyword_patterns={"high": {"caída": {}}}))
+    assert rules.spec["keyword_patterns"]["high"]["caída"] == {"weight": 0.5, "context": []}
+
+
+@pytest.mark.parametrize("keyword_patterns", [
+    {"critical": {"default": {"weight": "mucho"}}},
+    {"critical": {"default": {"context": "empresa"}}},
+    {"critical": {"default": {"context": ["empresa", 3]}}},
+    {"critical": ["default"]},
+    {"critical": {"default": "0.9"}},
+])
+def test_invalid_keyword_patterns(keyword_patterns):
+    with pytest.raises(ValueError, match="Reglas inválidas"):
+        RuleSet.from_spec(_spec(keyword_patterns=keyword_patterns))
+
+
+@pytest.mark.parametrize("overrides", [
+    {"version": None},
+    {"magnitude_words": {"fuerte": "x"}},
+    {"thresholds": []},
+    {"market_hours_factor": "rápido"},
+])
+def test_invalid_spec(overrides):
+    with pytest.raises(ValueError, match="Reglas inválidas"):
+        RuleSet.from_spec(_spec(**overrides))
+
+
+def test_missing_keyword_patterns():
+    spec = _spec()
+    del spec["keyword_patterns"]
+    with pytest.raises(ValueError, match="Reglas inválidas"):
+        RuleSet.from_spec(spec)
@@ -0,0 +1,84 @@
+"""Lease de la colección `locks` (elección de líder del scheduler)"""
+import asyncio
+from datetime import datetime, timedelta
+
+from scheduler import AlertScheduler, Lease
+
+
+def test_only_one_owner_holds_the_lease(mongo):
+    first, second = Lease("prueba", 30, "Prueba"), Lease("prueba", 30, "Prueba")
+    
+    async def scenario():
+        return (
+            await first.acquire(),
+            await second.acquire(),
+            await first.acquire(),  # renovación
+            await mongo["locks"].find_one({"_id": "prueba"}),
+        )
+    
+    first_won, second_won, renewed, lock = asyncio.run(scenario())
+    assert first_won and renewed and not second_won
+    assert first.held and not second.held
+    assert lock["owner"] == first.owner
+    assert lock["expiresAt"] > datetime.utcnow()
+
+
+def test_expired_lease_is_taken_over(mongo):
+    lease = Lease("prueba", 30, "Prueba")
+    
+    async def scenario():
+        await mongo["locks"].insert_one({
+            "_id": "prueba", "owner": "otro", "expiresAt": datetime.utcnow() - timedelta(seconds=1)
+        })
+        return await lease.acquire(), await mongo["locks"].find_one({"_id": "prueba"})
+    
+    acquired, lock = asyncio.run(scenario())
+    assert acquired
+    assert lock["owner"] == lease.owner
+
+
+def test_release_lets_another_owner_in(mongo):
+    first, second = Lease("prueba", 30, "Prueba"), Lease("prueba", 30, "Prueba")
+    
+    async def scenario():
+        await first.acquire()
+        await first.release()
+        return await second.acquire()
+    
+    assert asyncio.run(scenario())
+    assert not first.held and second.held
+
+
+def test_leader_loses_the_lease_when_another_owner_takes_it(mongo):
+    first, second = Lease("prueba", 30, "Prueba"), Lease("prueba", 30, "Prueba")
+    
+    async def scenario():
+        await first.acquire()
+        # El lease venció sin renovarse (p. ej. el proceso estuvo colgado)
+        await mongo["locks"].update_one({"_id": "prueba"}, {"$set": {"expiresAt": datetime.utcnow()}})
+        await second.acquire()
+        return await first.acquire()
+    
+    assert not asyncio.run(scenario())
+    assert not first.held and second.held
+
+
+def test_scheduler_runs_only_in_the_leader(mongo, monkeypatch):
+    runs = []
+    
+    async def process_all_and_create_alerts():
+        runs.append(1)
+        return {"news_processed": 2, "tweets_processed": 3, "alerts_created": 1}
+    
+    monkeypatch.setattr("scheduler.AlertService.process_all_and_create_alerts", process_all_and_create_alerts)
+    leader, follower = AlertScheduler(lease=30, name="prueba"), AlertScheduler(lease=30, name="prueba")
+    
+    async def scenario():
+        for scheduler in (leader, follower, leader, follower):
+            if await scheduler._acquire():
+                await scheduler._tick()
+    
+    asyncio.run(scenario())
+    assert len(runs) == 2
+    assert leader.status()["leader"] and not follower.status()["leader"]
+    assert leader.last_run["alerts_created"] == 1 and follower.last_run is None
@@ -0,0 +1,43 @@
+"""Índice de tickers: símbolos, alias y cashtags"""
+from types import SimpleNamespace
+
+from alert_utils import DocumentFeatures, extract_cashtags, extract_tickers
+from ticker_index import TickerIndex
+
+
+INDEX = TickerIndex([
+    {"symbol": "GGAL", "aliases": ["Galicia", "Grupo Galicia"]},
+    {"symbol": "PAMP", "aliases": ["Pampa", "Pampa Energía"]},
+    {"symbol": "TGNO4", "aliases": ["TGN"]},
+    {"symbol": "YPF", "aliases": ["YPFD"]},
+])
+
+
+def _tweet(text):
+    return SimpleNamespace(text=text, retweet_count=0, like_count=0, reply_count=0, created_at=None)
+
+
+def test_resolve_symbols_and_aliases_in_order():
+    assert INDEX.resolve("Pampa Energía y $GGAL suben; TGNO4 y Grupo Galicia también") == ["PAMP", "GGAL", "TGNO4"]
+
+
+def test_symbols_match_whole_words_only():
+    assert INDEX.resolve("YPFX y GGALICIA no son tickers") == []
+    assert INDEX.resolve("") == []
+
+
+def test_cashtags_only_count_dollar_symbols():
+    assert INDEX.cashtags("$GGAL y $TGNO4 suben, YPF y Galicia también") == ["GGAL", "TGNO4"]
+    assert INDEX.cashtags("$Galicia no es un símbolo") == []
+
+
+def test_news_resolve_aliases():
+    assert "GGAL" in extract_tickers("Galicia presenta su balance")
+
+
+def test_tweets_use_cashtags_only():
+    assert extract_cashtags("Se viene lluvia en La Pampa y Galicia cierra temprano") == []
+    features = DocumentFeatures.from_tweet(_tweet("Se viene lluvia en La Pampa, crisis total"))
+    assert features.tickers == []
+    features = DocumentFeatures.from_tweet(_tweet("$GGAL crisis total, Galicia se desploma"))
+    assert features.tickers == ["GGAL"]
@@ -0,0 +1,196 @@
+"""
+Índice de tickers y alias de empresas (BYMA + CEDEARs).
+
+El universo se carga desde la colección `tickers` de MongoDB o, si está
+vacía, desde el archivo `tickers.json` incluido en el proyecto. Símbolos y
+alias ("Galicia" → GGAL, "Pampa" → PAMP) se compilan en un único matcher con
+forma de trie, así que todas las menciones de un texto se resuelven en una
+sola pasada, sin importar el tamaño del universo.
+
+El índice activo se reemplaza de forma atómica (`set_ticker_index`), de modo
+que recargar el universo no requiere reiniciar el servicio. Una recarga
+pedida a un proceso (`publish_ticker_reload`) incrementa el contador
+`tickers` de la colección `counters`; TickerWatcher lo consulta en cada
+proceso (workers de uvicorn, otros contenedores, stream_worker.py) y recarga
+cuando cambia, como RulesWatcher con las reglas.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+from matcher import MultiPatternMatcher
+
+
+TICKERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tickers.json")
+
+
+class TickerIndex:
+    """
+    Resuelve menciones de tickers en un texto.
+    
+    Los símbolos coinciden como palabra completa y en mayúsculas, con o sin
+    `$` adelante ($GGAL, GGAL); los alias coinciden tal como están escritos
+    (nombres propios). Todas las menciones se normalizan al símbolo, sin `$`.
+    """
+    
+    def __init__(self, entries: Iterable[dict]):
+        self.entries = [dict(entry) for entry in entries]
+        self.symbols: Dict[str, dict] = {}
+        resolve = {}
+        
+        for entry in self.entries:
+            symbol = entry["symbol"].upper()
+            self.symbols[symbol] = entry
+            resolve[symbol] = symbol
+            for alias in entry.get("aliases") or []:
+                # Un alias nunca pisa a un símbolo
+                resolve.setdefault(alias, symbol)
+        
+        self._resolve = resolve
+        self._matcher = MultiPatternMatcher(resolve, whole_words=True)
+        # Huella del universo: cambia si cambia cualquier símbolo o alias
+        self.version = hashlib.blake2b(
+            json.dumps(sorted(resolve.items()), ensure_ascii=False).encode(), digest_size=6
+        ).hexdigest()
+    
+    def __len__(self) -> int:
+        return len(self.symbols)
+    
+    def resolve(self, text: str) -> List[str]:
+        """Símbolos mencionados en el texto (por símbolo o alias), en orden de aparición"""
+        if not text:
+            return []
+        
+        found = {}
+        for _, pattern in sorted(self._matcher.find_all(text)):
+            found.setdefault(self._resolve[pattern], None)
+        return list(found)
+    
+    def cashtags(self, text: str) -> List[str]:
+        """Símbolos mencionados con formato $TICKER, sin el `$`"""
+        if not text:
+            return []
+        
+        found = {}
+        for pos, pattern in sorted(self._matcher.find_all(text)):
+            if pos > 0 and text[pos - 1] == '$' and pattern in self.symbols:
+                found.setdefault(pattern, None)
+        return list(found)
+
+
+def load_ticker_file(path: str = TICKERS_FILE) -> List[dict]:
+    """Lee el universo de tickers de un archivo JSON (lista de {symbol, name, market, aliases})"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Índice activo: se reemplaza completo, nunca se modifica en el lugar
+_index: Optional[TickerIndex] = None
+# Versión del contador `tickers` con la que se cargó el índice activo
+_loaded_version: Optional[str] = None
+
+
+def get_ticker_index() -> TickerIndex:
+    """Retorna el índice activo (cargado desde tickers.json la primera vez)"""
+    global _index
+    if _index is None:
+        _index = TickerIndex(load_ticker_file())
+    return _index
+
+
+def set_ticker_index(index: TickerIndex):
+    """Reemplaza el índice activo (las búsquedas en curso terminan con el anterior)"""
+    global _index
+    _index = index
+
+
+async def reload_ticker_index() -> TickerIndex:
+    """
+    Recarga el universo desde la colección `tickers` (documentos con _id o
+    symbol, name, market y aliases); si la colección está vacía usa tickers.json
+    """
+    from database import get_database
+    from services import CounterService
+    
+    global _loaded_version
+    # Se lee antes de cargar: una publicación durante la carga provoca otra recarga
+    version = await CounterService.get_version("tickers")
+    db = await get_database()
+    entries = []
+    async for doc in db["tickers"].find({}, {"symbol": 1, "name": 1, "market": 1, "aliases": 1}):
+        symbol = doc.get("symbol") or doc.get("_id")
+        if isinstance(symbol, str):
+            entries.append({
+                "symbol": symbol,
+                "name": doc.get("name"),
+                "market": doc.get("market"),
+                "aliases": doc.get("aliases") or [],
+            })
+    
+    source = "colección tickers"
+    if not entries:
+        entries = load_ticker_file()
+        source = os.path.basename(TICKERS_FILE)
+    
+    index = TickerIndex(entries)
+    set_ticker_index(index)
+    _loaded_version = version
+    print(f"✓ Índice de tickers cargado desde {source}: {len(index)} símbolos")
+    return index
+
+
+async def publish_ticker_reload() -> TickerIndex:
+    """Recarga el índice en este proceso y avisa al resto (ver TickerWatcher)"""
+    from services import CounterService
+    
+    await CounterService.bump("tickers")
+    return await reload_ticker_index()
+
+
+class TickerWatcher:
+    """Consulta periódicamente la versión del universo de tickers y recarga cuando cambia"""
+    
+    def __init__(self, interval: Optional[float] = None, on_reload: Optional[Callable[[], None]] = None):
+        from config import settings
+        
+        self.interval = interval if interval is not None else settings.tickers_poll_seconds
+        # Para los procesos del motor de análisis, que tienen su propia copia del índice
+        self.on_reload = on_reload
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def check(self) -> bool:
+        """Recarga si otro proceso publicó una versión nueva; True si recargó"""
+        from services import CounterService
+        
+        if await CounterService.get_version("tickers") == _loaded_version:
+            return False
+        await reload_ticker_index()
+        if self.on_reload:
+            self.on_reload()
+        return True
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Mongo caído: se mantiene el índice actual
+                print(f"✗ No se pudo verificar el índice de tickers: {e}")